@@ -5,7 +5,7 @@ import uvicorn
 import json
 
 # Import routes
-from routes import execute_flow, execute_flow_websocket, health_check, log_requests
+from routes import execute_flow, execute_batch, execute_flow_websocket, resume_run, get_run, get_job, get_job_result, get_job_events, cancel_job, register_flow, get_flow, get_flow_version, execute_registered_flow, websocket_session, health_check, prewarm_elements, cache_stats, profiling_stats, log_requests
 
 app = FastAPI(title="Flow Executor Backend")
 
@@ -20,8 +20,25 @@ app.add_middleware(
 
 # Register HTTP routes
 app.post("/execute")(execute_flow)
+app.post("/execute/batch")(execute_batch)
+app.post("/runs/{run_id}/resume")(resume_run)
+app.get("/runs/{run_id}")(get_run)
+app.get("/jobs/{run_id}")(get_job)
+app.get("/jobs/{run_id}/result")(get_job_result)
+app.get("/jobs/{run_id}/events")(get_job_events)
+app.post("/jobs/{run_id}/cancel")(cancel_job)
+app.post("/flows")(register_flow)
+app.get("/flows/{flow_id}")(get_flow)
+app.get("/flows/{flow_id}/versions/{version}")(get_flow_version)
+app.post("/flows/{flow_id}/execute")(execute_registered_flow)
 app.get("/health")(health_check)
+app.get("/cache/stats")(cache_stats)
+app.get("/profiling")(profiling_stats)
 app.middleware("http")(log_requests)
+app.on_event("startup")(prewarm_elements)
+
+# WebSocket protocol v2: one frame per run, many runs per socket
+app.websocket("/ws/v2")(websocket_session)
 
 # Register WebSocket route with two-phase communication
 @app.websocket("/ws/execute/{flow_id}")
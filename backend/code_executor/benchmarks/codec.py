@@ -0,0 +1,124 @@
+# benchmarks/codec.py
+"""
+Compare the installed JSON codecs on the executor's hot paths.
+
+Run from the code_executor directory, e.g.:
+
+    python -m benchmarks.codec --sizes 10,100,1000 --output codec.json
+
+For each flow size it times, per codec, decoding a flow definition sent as
+text and encoding a run's events. Hashing for the plan cache always uses
+the standard library, so it is not compared. The results are printed, or
+written to ``--output``, as JSON.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, List, Optional
+
+from benchmarks.flows import generate
+from utils.codec import CODECS, get_codec
+
+def large_flow(size: int) -> Dict[str, Any]:
+    """A diamond flow whose elements carry long prompts, as real marketplace flows do."""
+    flow_definition = generate("diamonds", size)
+    for element_id, definition in flow_definition["elements"].items():
+        if definition["type"] == "llm_text":
+            definition["wrapper_prompt"] = f"You are step {element_id}. " * 40 + "{prompt}\n{context}"
+    flow_definition["elements"]["prompt"]["data"] = "Compare both answers. " * 200
+    return flow_definition
+
+def flow_events(flow_definition: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The element_started and element_completed events of one run of the flow."""
+    events = []
+    for element_id, definition in flow_definition["elements"].items():
+        events.append({"type": "element_started", "timestamp": time.time(),
+                       "data": {"element_id": element_id, "element_type": definition["type"]}})
+        events.append({"type": "element_completed", "timestamp": time.time(),
+                       "data": {"element_id": element_id, "element_type": definition["type"], "cached": False,
+                                "outputs": {"llm_output": f"Answer from {element_id}. " * 20}}})
+    return events
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    """Fastest of ``repeat`` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+def benchmark_codec(name: str, text: str, events: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """Time one codec on the hot paths."""
+    codec = get_codec(name)
+
+    def encode_events():
+        for event in events:
+            codec.dumps(event)
+
+    decode_time = best_time(lambda: codec.decode_flow_definition(text), repeat)
+    encode_time = best_time(encode_events, repeat)
+    return {
+        "decode_flow_ms": round(decode_time * 1000, 3),
+        "encode_events_ms": round(encode_time * 1000, 3),
+        "events_per_sec": round(len(events) / encode_time, 1) if encode_time else None
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the installed JSON codecs.")
+    parser.add_argument("--sizes", type=lambda value: [int(item) for item in value.split(",") if item.strip()],
+                        default=[10, 100, 1000], help="Comma-separated diamond counts of the flows")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per measurement; the best is kept")
+    parser.add_argument("--output", help="Write the results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        flow_definition = large_flow(size)
+        text = json.dumps(flow_definition)
+        events = flow_events(flow_definition)
+        codecs = {name: benchmark_codec(name, text, events, args.repeat) for name in CODECS}
+
+        # Gain of each codec over the standard library
+        baseline = codecs["json"]
+        for timings in codecs.values():
+            timings["speedup"] = {
+                key[:-3]: round(baseline[key] / timings[key], 2) if timings[key] else None
+                for key in ("decode_flow_ms", "encode_events_ms")
+            }
+
+        results.append({
+            "size": size,
+            "elements": len(flow_definition["elements"]),
+            "definition_bytes": len(text.encode("utf-8")),
+            "events": len(events),
+            "codecs": codecs
+        })
+        print(f"flow of {len(flow_definition['elements'])} elements: " + ", ".join(
+            f"{name} decode {timings['decode_flow_ms']}ms" for name, timings in codecs.items()), file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "codecs": list(CODECS),
+        "repeat": args.repeat,
+        "results": results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# benchmarks/flows.py
+from typing import Dict, Any, List, Optional
+
+STRING = {"type": "string"}
+OBJECT = {"type": "object"}
+
+def element(element_type: str, element_id: str, input_schema: Optional[Dict[str, Any]] = None,
+            output_schema: Optional[Dict[str, Any]] = None, **params) -> Dict[str, Any]:
+    """Build the definition of one element."""
+    definition = {
+        "type": element_type,
+        "element_id": element_id,
+        "name": element_id,
+        "description": f"Benchmark {element_type} element",
+        "input_schema": input_schema or {},
+        "output_schema": output_schema or {}
+    }
+    definition.update(params)
+    return definition
+
+def connect(from_id: str, to_id: str, from_output: Optional[str] = None,
+            to_input: Optional[str] = None) -> Dict[str, Any]:
+    """Build a connection, carrying data when both ends are given."""
+    connection = {"from_id": from_id, "to_id": to_id}
+    if from_output is not None:
+        connection["from_output"] = from_output
+        connection["to_input"] = to_input
+    return connection
+
+def llm_text(element_id: str) -> Dict[str, Any]:
+    return element("llm_text", element_id, {"prompt": {"type": "string", "required": True}},
+                   {"llm_output": STRING}, model="benchmark", max_tokens=64)
+
+def rest_api(element_id: str) -> Dict[str, Any]:
+    return element("rest_api", element_id, {"params": OBJECT}, {"data": OBJECT},
+                   url=f"https://benchmark.invalid/{element_id}", method="GET")
+
+def merger(element_id: str, schema: Dict[str, Any] = STRING) -> Dict[str, Any]:
+    return element("merger", element_id, {"data1": schema, "data2": schema}, {"merged_data": schema})
+
+def end(schema: Dict[str, Any] = STRING) -> Dict[str, Any]:
+    return element("end", "end", {"text_input": schema}, {"text_output": schema})
+
+def flow(shape: str, size: int, elements: Dict[str, Dict[str, Any]],
+         connections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "flow_id": f"benchmark-{shape}-{size}",
+        "start_element_id": "start",
+        "elements": elements,
+        "connections": connections
+    }
+
+def chain(size: int) -> Dict[str, Any]:
+    """A prompt passed through ``size`` LLM elements one after another."""
+    elements = {
+        "start": element("start", "start"),
+        "prompt": element("constants", "prompt", output_schema={"data": STRING},
+                          data="Summarise the previous answer", data_type="string")
+    }
+    connections = [connect("start", "prompt")]
+    previous, output = "prompt", "data"
+    for index in range(size):
+        element_id = f"llm_{index}"
+        elements[element_id] = llm_text(element_id)
+        connections.append(connect(previous, element_id, output, "prompt"))
+        previous, output = element_id, "llm_output"
+    elements["end"] = end()
+    connections.append(connect(previous, "end", output, "text_input"))
+    return flow("chain", size, elements, connections)
+
+def fan_out(size: int) -> Dict[str, Any]:
+    """``size`` independent HTTP requests whose responses are merged into one."""
+    elements = {
+        "start": element("start", "start"),
+        "params": element("constants", "params", output_schema={"data": OBJECT},
+                          data={"page": 1}, data_type="json")
+    }
+    connections = [connect("start", "params")]
+    merged = None
+    for index in range(size):
+        api_id = f"api_{index}"
+        elements[api_id] = rest_api(api_id)
+        connections.append(connect("params", api_id, "data", "params"))
+        if merged is None:
+            merged = api_id
+            continue
+        merger_id = f"merge_{index}"
+        elements[merger_id] = merger(merger_id, OBJECT)
+        connections.append(connect(merged, merger_id, "data" if merged == "api_0" else "merged_data", "data1"))
+        connections.append(connect(api_id, merger_id, "data", "data2"))
+        merged = merger_id
+    elements["end"] = end(OBJECT)
+    connections.append(connect(merged, "end", "data" if merged == "api_0" else "merged_data", "text_input"))
+    return flow("fan_out", size, elements, connections)
+
+def diamonds(size: int) -> Dict[str, Any]:
+    """``size`` diamonds in a row, each splitting into two LLM elements and merging them again."""
+    elements = {
+        "start": element("start", "start"),
+        "prompt": element("constants", "prompt", output_schema={"data": STRING},
+                          data="Compare both answers", data_type="string")
+    }
+    connections = [connect("start", "prompt")]
+    previous, output = "prompt", "data"
+    for index in range(size):
+        left, right, merger_id = f"left_{index}", f"right_{index}", f"merge_{index}"
+        elements[left] = llm_text(left)
+        elements[right] = llm_text(right)
+        elements[merger_id] = merger(merger_id)
+        connections += [
+            connect(previous, left, output, "prompt"),
+            connect(previous, right, output, "prompt"),
+            connect(left, merger_id, "llm_output", "data1"),
+            connect(right, merger_id, "llm_output", "data2")
+        ]
+        previous, output = merger_id, "merged_data"
+    elements["end"] = end()
+    connections.append(connect(previous, "end", output, "text_input"))
+    return flow("diamonds", size, elements, connections)
+
+def nested_cases(size: int) -> Dict[str, Any]:
+    """
+    ``size`` case elements nested in each other.
+
+    Every case takes its first branch, to the next case, and disables its
+    second: a constant that then does not pass execution on to the LLM
+    element behind it.
+    """
+    elements = {
+        "start": element("start", "start"),
+        "variables": element("constants", "variables", output_schema={"data": OBJECT},
+                             data={"depth": 1}, data_type="json"),
+        "prompt": element("constants", "prompt", output_schema={"data": STRING},
+                          data="Answer the innermost case", data_type="string")
+    }
+    connections = [connect("start", "variables"), connect("start", "prompt")]
+    previous = None
+    for index in range(size):
+        case_id = f"case_{index}"
+        elements[case_id] = element("case", case_id, {"variables": OBJECT}, {"result": OBJECT}, cases=[
+            {"taken": {"variable1": "depth", "variable2": 1, "compare": "=="}},
+            {"not_taken": {"variable1": "depth", "variable2": 2, "compare": "=="}}
+        ])
+        connections.append(connect("variables", case_id, "data", "variables"))
+        if previous is not None:
+            connections += nested_branches(elements, previous, case_id)
+        previous = case_id
+    elements["answer"] = llm_text("answer")
+    connections += nested_branches(elements, previous, "answer")
+    connections.append(connect("prompt", "answer", "data", "prompt"))
+    elements["end"] = end()
+    connections.append(connect("answer", "end", "llm_output", "text_input"))
+    return flow("nested_cases", size, elements, connections)
+
+def nested_branches(elements: Dict[str, Dict[str, Any]], case_id: str, taken_id: str) -> List[Dict[str, Any]]:
+    """Connect a case to the element on its taken branch and add its disabled branch."""
+    gate_id, skipped_id = f"{case_id}_gate", f"{case_id}_skipped"
+    elements[gate_id] = element("constants", gate_id, output_schema={"data": STRING},
+                                data="Never answered", data_type="string")
+    elements[skipped_id] = llm_text(skipped_id)
+    # Connection order matches the order of the cases
+    return [
+        connect(case_id, taken_id),
+        connect(case_id, gate_id),
+        connect(gate_id, skipped_id, "data", "prompt")
+    ]
+
+# Flow generators by shape name
+SHAPES = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamonds": diamonds,
+    "nested_cases": nested_cases
+}
+
+def generate(shape: str, size: int) -> Dict[str, Any]:
+    """Generate the flow definition of the given shape and size."""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown flow shape '{shape}', expected one of {sorted(SHAPES)}")
+    if size < 1:
+        raise ValueError("Flow size must be at least 1")
+    return SHAPES[shape](size)
@@ -0,0 +1,207 @@
+# benchmarks/run.py
+"""
+Benchmark the flow executor on synthetic flows.
+
+Run from the code_executor directory, e.g.:
+
+    python -m benchmarks.run --shapes chain,diamonds --sizes 10,100 --output results.json
+
+The results are printed, or written to ``--output``, as JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+# The logger writes to stdout, keep it quiet unless asked otherwise
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks.flows import SHAPES, generate
+from benchmarks.stubs import stub_backends
+from core.compiler import hash_flow_definition
+from routes import flow_compiler, setup_flow_executor
+
+class CountingStreamManager:
+    """Stream manager that only counts the events sent to it."""
+
+    def __init__(self):
+        self.events = 0
+        self.bytes = 0
+
+    async def send_message(self, message: str) -> bool:
+        self.events += 1
+        self.bytes += len(message)
+        return True
+
+    async def send_batch(self, messages: List[str]) -> bool:
+        for message in messages:
+            await self.send_message(message)
+        return True
+
+    async def disconnect(self):
+        pass
+
+def benchmark_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Build the run config, with the caches that would hide repeated work disabled."""
+    return {
+        "execution_mode": args.mode,
+        "max_parallelism": args.max_parallelism,
+        "speculative_execution": args.speculative,
+        "streaming_edges": args.streaming_edges,
+        "event_batching": args.event_batching,
+        "enable_memoization": False,
+        "enable_checkpoints": False,
+        "max_execution_time": None
+    }
+
+async def run_once(flow_definition: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Set up and execute the flow once, timing each step."""
+    stream_manager = CountingStreamManager()
+
+    start_time = time.perf_counter()
+    _, executor = await setup_flow_executor(flow_definition, stream_manager, config)
+    setup_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    await executor.execute_flow({})
+    run_time = time.perf_counter() - start_time
+
+    return {
+        "setup": setup_time,
+        "run": run_time,
+        "executed": len(executor.execution_order),
+        "external": sum(span.external for span in executor.spans),
+        "events": stream_manager.events,
+        "event_bytes": stream_manager.bytes
+    }
+
+async def peak_memory(flow_definition: Dict[str, Any], config: Dict[str, Any]) -> int:
+    """Peak bytes allocated while setting up and executing the flow once."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        await run_once(flow_definition, config)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def benchmark(shape: str, size: int, config: Dict[str, Any], repeat: int, warmup: int,
+                    measure_memory: bool) -> Dict[str, Any]:
+    """Benchmark one flow shape and size."""
+    flow_definition = generate(shape, size)
+
+    # The first setup compiles the plan, later ones get it from the cache
+    flow_compiler.cache.pop(hash_flow_definition(flow_definition))
+    first = await run_once(flow_definition, config)
+    for _ in range(warmup):
+        await run_once(flow_definition, config)
+    runs = [await run_once(flow_definition, config) for _ in range(repeat)]
+
+    run_times = [run["run"] for run in runs]
+    executed = runs[0]["executed"]
+    events = sum(run["events"] for run in runs)
+    # Time not spent waiting on the (stubbed) backends. Concurrent runs overlap
+    # the waits, so it cannot be told apart when they add up to more than the run.
+    overhead = statistics.median(run["run"] - run["external"] for run in runs)
+
+    result = {
+        "shape": shape,
+        "size": size,
+        "elements": len(flow_definition["elements"]),
+        "executed": executed,
+        "setup_cold_ms": milliseconds(first["setup"]),
+        "setup_ms": milliseconds(statistics.median(run["setup"] for run in runs)),
+        "run_ms": milliseconds(statistics.median(run_times)),
+        "run_min_ms": milliseconds(min(run_times)),
+        "run_p95_ms": milliseconds(percentile(run_times, 0.95)),
+        "overhead_per_element_us": round(overhead / max(1, executed) * 1_000_000, 3) if overhead > 0 else None,
+        "events_per_run": runs[0]["events"],
+        "event_bytes_per_run": runs[0]["event_bytes"],
+        "events_per_sec": round(events / sum(run_times), 1) if sum(run_times) else None
+    }
+    if measure_memory:
+        result["peak_memory_kb"] = round(await peak_memory(flow_definition, config) / 1024, 1)
+    return result
+
+def parse_list(value: str, cast=str) -> List[Any]:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the flow executor on synthetic flows.")
+    parser.add_argument("--shapes", type=lambda value: parse_list(value), default=list(SHAPES),
+                        help=f"Comma-separated flow shapes ({', '.join(SHAPES)})")
+    parser.add_argument("--sizes", type=lambda value: parse_list(value, int), default=[10, 100],
+                        help="Comma-separated flow sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per flow")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per flow")
+    parser.add_argument("--mode", choices=("sequential", "concurrent"), default="sequential")
+    parser.add_argument("--max-parallelism", type=int, default=8)
+    parser.add_argument("--speculative", action="store_true", help="Enable speculative execution")
+    parser.add_argument("--streaming-edges", action="store_true", help="Enable streaming edges")
+    parser.add_argument("--event-batching", action="store_true", help="Enable event batching")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency in seconds")
+    parser.add_argument("--llm-chunks", type=int, default=8, help="Chunks per stub LLM generation")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="Stub HTTP latency in seconds")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement")
+    parser.add_argument("--output", help="Write the results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    unknown = [shape for shape in args.shapes if shape not in SHAPES]
+    if unknown:
+        parser.error(f"unknown shapes: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+async def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    config = benchmark_config(args)
+
+    results = []
+    with stub_backends(args.llm_latency, args.http_latency, args.llm_chunks):
+        for shape in args.shapes:
+            for size in args.sizes:
+                results.append(await benchmark(shape, size, config, args.repeat, args.warmup, not args.no_memory))
+                print(f"{shape} x{size}: {results[-1]['run_ms']}ms per run", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "llm_latency": args.llm_latency,
+            "llm_chunks": args.llm_chunks,
+            "http_latency": args.http_latency,
+            "config": config
+        },
+        "results": results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+    return report
+
+if __name__ == "__main__":
+    logging.getLogger("asyncio").setLevel(logging.ERROR)
+    asyncio.run(main())
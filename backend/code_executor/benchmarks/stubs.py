@@ -0,0 +1,75 @@
+# benchmarks/stubs.py
+import asyncio
+import importlib
+import json
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Any, AsyncGenerator
+from unittest import mock
+
+import httpx
+
+from elements import element_registry
+from utils.profiling import external_call
+
+class StubBedrockService:
+    """Stand-in for the Bedrock service that answers every prompt after a fixed latency."""
+
+    latency = 0.0  # Seconds per generation
+    chunks = 8  # Chunks per streamed generation
+
+    def __init__(self, region_name: str = None, aws_access_key_id: str = None,
+                 aws_secret_access_key: str = None, model_id: str = None):
+        self.model_id = model_id
+
+    async def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1000) -> str:
+        async with external_call("bedrock"):
+            await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+    async def generate_text_stream(self, prompt: str, temperature: float = 0.7,
+                                   max_tokens: int = 1000) -> AsyncGenerator[str, None]:
+        answer = self._answer(prompt)
+        size = max(1, -(-len(answer) // self.chunks))
+        for index in range(0, len(answer), size):
+            async with external_call("bedrock"):
+                await asyncio.sleep(self.latency / self.chunks)
+            yield answer[index:index + size]
+
+    async def generate_structured_output(self, prompt: str, output_schema: Dict[str, Any],
+                                         temperature: float = 0.3, max_tokens: int = 1000) -> Dict[str, Any]:
+        async with external_call("bedrock"):
+            await asyncio.sleep(self.latency)
+        return {name: None for name in output_schema}
+
+    def _answer(self, prompt: str) -> str:
+        # Keep answers a fixed size so long chains do not grow their prompts
+        return f"Answer to a {len(prompt)} character prompt from {self.model_id}."
+
+def stub_transport(latency: float) -> httpx.AsyncBaseTransport:
+    """An HTTP transport that answers every request with a small JSON body after a fixed latency."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, content=json.dumps({"path": request.url.path, "items": [1, 2, 3]}),
+                              headers={"content-type": "application/json"})
+    return httpx.MockTransport(handler)
+
+@contextmanager
+def stub_backends(llm_latency: float = 0.0, http_latency: float = 0.0, llm_chunks: int = 8):
+    """Replace the LLM and HTTP backends used by elements with local stubs while the block runs."""
+    bedrock = type("StubBedrockService", (StubBedrockService,),
+                   {"latency": llm_latency, "chunks": max(1, llm_chunks)})
+    transport = stub_transport(http_latency)
+    async_client = httpx.AsyncClient
+
+    def client_factory(*args, **kwargs) -> httpx.AsyncClient:
+        kwargs["transport"] = transport
+        return async_client(*args, **kwargs)
+
+    with ExitStack() as stack:
+        # Element modules are loaded lazily; load them so their backends can be replaced
+        for element_type in ("llm_text", "llm_structured"):
+            module = importlib.import_module(element_registry[element_type].__module__)
+            stack.enter_context(mock.patch.object(module, "BedrockService", bedrock))
+        rest_api = importlib.import_module(element_registry["rest_api"].__module__)
+        stack.enter_context(mock.patch.object(rest_api.httpx, "AsyncClient", client_factory))
+        yield
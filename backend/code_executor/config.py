@@ -27,6 +27,33 @@ class Settings():
     # Application settings
     log_level: str                          = os.getenv("LOG_LEVEL", "INFO")
     max_execution_time: int                 = int(os.getenv("MAX_EXECUTION_TIME", "300"))  # 5 minutes default
+    enable_profiling: bool                  = os.getenv("ENABLE_PROFILING", "true").lower() == "true"
+    element_prewarm: str                    = os.getenv("ELEMENT_PREWARM", "")  # Comma-separated element types, or "all"
+    
+    # Scheduler settings
+    execution_mode: str                     = os.getenv("EXECUTION_MODE", "sequential")  # "sequential" or "concurrent"
+    max_parallelism: int                    = int(os.getenv("MAX_PARALLELISM", "8"))
+    max_concurrent_runs: int                = int(os.getenv("MAX_CONCURRENT_RUNS", "32"))  # 0 for no limit
+    run_queue_size: int                     = int(os.getenv("RUN_QUEUE_SIZE", "100"))
+    speculative_execution: bool             = os.getenv("SPECULATIVE_EXECUTION", "false").lower() == "true"
+    max_speculative_elements: int           = int(os.getenv("MAX_SPECULATIVE_ELEMENTS", "4"))
+    plan_cache_size: int                    = int(os.getenv("FLOW_PLAN_CACHE_SIZE", "256"))
+    batch_max_concurrency: int              = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    batch_max_items: int                    = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    map_max_concurrency: int                = int(os.getenv("MAP_MAX_CONCURRENCY", "8"))
+    enable_static_pruning: bool             = os.getenv("ENABLE_STATIC_PRUNING", "true").lower() == "true"
+    enable_memoization: bool                = os.getenv("ENABLE_MEMOIZATION", "true").lower() == "true"
+    memo_cache_size: int                    = int(os.getenv("MEMO_CACHE_SIZE", "1024"))
+    session_cache_size: int                 = int(os.getenv("SESSION_CACHE_SIZE", "512"))
+    enable_checkpoints: bool                = os.getenv("ENABLE_CHECKPOINTS", "false").lower() == "true"
+    checkpoint_db_path: str                 = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db")
+    checkpoint_ttl: int                     = int(os.getenv("CHECKPOINT_TTL", "86400"))  # Seconds
+    flow_store_path: str                    = os.getenv("FLOW_STORE_PATH", "flows.db")
+    result_store_path: str                  = os.getenv("RESULT_STORE_PATH", "results.db")
+    job_result_ttl: int                     = int(os.getenv("JOB_RESULT_TTL", "86400"))  # Seconds
+    job_max_wait: float                     = float(os.getenv("JOB_MAX_WAIT", "30"))  # Longest long-poll, in seconds
+    job_flush_interval: float               = float(os.getenv("JOB_FLUSH_INTERVAL", "0.5"))
+    job_max_events_per_request: int         = int(os.getenv("JOB_MAX_EVENTS_PER_REQUEST", "1000"))
     
     # Custom code execution settings
     allow_custom_code: bool                 = os.getenv("ALLOW_CUSTOM_CODE", "false").lower() == "true"
@@ -39,7 +66,15 @@ class Settings():
     
     # Streaming settings
     streaming_chunk_size: int               = int(os.getenv("STREAMING_CHUNK_SIZE", "20"))
+    streaming_edges: bool                   = os.getenv("STREAMING_EDGES", "false").lower() == "true"
     max_reconnect_attempts: int             = int(os.getenv("MAX_RECONNECT_ATTEMPTS", "5"))
+    ws_max_runs_per_socket: int             = int(os.getenv("WS_MAX_RUNS_PER_SOCKET", "16"))
+    event_verbosity: str                    = os.getenv("EVENT_VERBOSITY", "full")  # "minimal", "summary" or "full"
+    event_max_value_size: int               = int(os.getenv("EVENT_MAX_VALUE_SIZE", "1024"))
+    event_batching: bool                    = os.getenv("EVENT_BATCHING", "false").lower() == "true"
+    event_batch_interval: float             = float(os.getenv("EVENT_BATCH_INTERVAL", "0.02"))  # Seconds
+    event_batch_max_events: int             = int(os.getenv("EVENT_BATCH_MAX_EVENTS", "64"))
+    event_batch_max_bytes: int              = int(os.getenv("EVENT_BATCH_MAX_BYTES", "65536"))
     
     class Config:
         env_file = ".env"
@@ -51,7 +86,7 @@ settings = Settings()
 # Additional configurations that might be needed at runtime
 runtime_config = {
     "allowed_element_types": [
-        "start", "end", "case", "flow_select",
+        "start", "end", "case", "flow_select", "map",
         "chat_input", "context_history", "datablock", 
         "rest_api", "metadata", "constants",
         "read_blockchain_data", "build_transaction_json",
@@ -0,0 +1,156 @@
+# core/admission.py
+import asyncio
+import heapq
+import itertools
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+
+# Priority classes, most urgent first; queued runs of a class start before any of the next
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+
+class AdmissionRejected(Exception):
+    """Raised when a run cannot start or wait because the queue is full."""
+    pass
+
+class AdmissionTicket:
+    """A run's place in the admission controller: running, or waiting in the queue."""
+
+    def __init__(self, controller: "AdmissionController", priority: str, bounded: bool):
+        self.controller = controller
+        self.priority = priority
+        self.bounded = bounded
+        self.admitted = False
+        self.released = False
+        self.position = 0  # 1-based place in the queue while waiting
+        self._key = (PRIORITY_CLASSES[priority], next(controller._sequence))
+        self._changed = asyncio.Event()
+
+    def __lt__(self, other: "AdmissionTicket") -> bool:
+        return self._key < other._key
+
+    async def wait(self, on_position: Optional[Callable[[int, int], Awaitable[Any]]] = None):
+        """
+        Wait until the run may start.
+
+        ``on_position`` is awaited with the queue position and queue length
+        whenever the position changes. A run cancelled while waiting gives
+        up its place.
+        """
+        reported = None
+        try:
+            while not self.admitted:
+                if on_position is not None and self.position != reported:
+                    reported = self.position
+                    await on_position(self.position, len(self.controller._queue))
+                    continue
+                self._changed.clear()
+                await self._changed.wait()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        """Give up the place, letting the next queued run start; safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+class AdmissionController:
+    """
+    Limits how many runs execute at once.
+
+    Runs beyond ``max_running`` wait in a queue ordered by priority class,
+    then arrival. At most ``max_queued`` runs may wait; further runs are
+    rejected at once instead of piling up. Tickets reserved with
+    ``bounded=False`` wait without counting against that limit, for callers
+    that bound their own concurrency, such as batches.
+
+    Tickets are reserved synchronously, so a request can be rejected before
+    any work starts. A ``max_running`` of 0 disables the limit. Not thread
+    safe; use it from the event loop only.
+    """
+
+    def __init__(self, max_running: int = 0, max_queued: int = 100):
+        self.max_running = max(0, max_running)
+        self.max_queued = max(0, max_queued)
+        self.running = 0
+        self._queue: List[AdmissionTicket] = []
+        self._bounded_waiting = 0
+        self._sequence = itertools.count()
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.rejected_total = 0
+
+    def reserve(self, priority: str = "interactive", bounded: bool = True) -> AdmissionTicket:
+        """Get a ticket that is admitted at once, or queued; raises AdmissionRejected if the queue is full."""
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {', '.join(PRIORITY_CLASSES)}")
+
+        ticket = AdmissionTicket(self, priority, bounded)
+        if not self._queue and self._has_capacity():
+            self._admit(ticket)
+            return ticket
+
+        if bounded and self._bounded_waiting >= self.max_queued:
+            self.rejected_total += 1
+            raise AdmissionRejected(f"Server busy: {self.running} runs executing and "
+                                    f"{self._bounded_waiting} waiting, the queue limit is {self.max_queued}")
+
+        heapq.heappush(self._queue, ticket)
+        if bounded:
+            self._bounded_waiting += 1
+        self.queued_total += 1
+        self._update_positions()
+        return ticket
+
+    def queue_full(self) -> bool:
+        """Whether a bounded run arriving now would be rejected."""
+        return not self._has_capacity() and self._bounded_waiting >= self.max_queued
+
+    def stats(self) -> Dict[str, Any]:
+        """Current occupancy and lifetime counters."""
+        waiting = {priority: 0 for priority in PRIORITY_CLASSES}
+        for ticket in self._queue:
+            waiting[ticket.priority] += 1
+        return {
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "waiting": waiting,
+            "admitted": self.admitted_total,
+            "queued": self.queued_total,
+            "rejected": self.rejected_total
+        }
+
+    def _has_capacity(self) -> bool:
+        return self.max_running == 0 or self.running < self.max_running
+
+    def _admit(self, ticket: AdmissionTicket):
+        ticket.admitted = True
+        ticket.position = 0
+        self.running += 1
+        self.admitted_total += 1
+        ticket._changed.set()
+
+    def _release(self, ticket: AdmissionTicket):
+        if ticket.admitted:
+            self.running -= 1
+        else:
+            # Gave up while waiting
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            if ticket.bounded:
+                self._bounded_waiting -= 1
+
+        while self._queue and self._has_capacity():
+            waiting = heapq.heappop(self._queue)
+            if waiting.bounded:
+                self._bounded_waiting -= 1
+            self._admit(waiting)
+        self._update_positions()
+
+    def _update_positions(self):
+        """Tell queued tickets whose place has changed."""
+        for position, ticket in enumerate(sorted(self._queue), start=1):
+            if ticket.position != position:
+                ticket.position = position
+                ticket._changed.set()
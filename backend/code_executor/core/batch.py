@@ -0,0 +1,116 @@
+# core/batch.py
+import asyncio
+import time
+from typing import Dict, Any, AsyncGenerator, List, Optional
+
+from .admission import AdmissionController
+from .compiler import ExecutionPlan
+from .executor import FlowExecutor
+from .memo import ElementMemo
+from utils.logger import logger
+from utils import codec
+
+class BatchRunner:
+    """
+    Runs one compiled flow over many sets of initial inputs.
+
+    Items run concurrently up to ``max_concurrency``, without a stream
+    manager, and their results are produced as NDJSON lines in completion
+    order, followed by a summary line with aggregate throughput. With an
+    admission controller, each item also waits for a run slot at batch
+    priority.
+    """
+
+    def __init__(self, plan: ExecutionPlan, config: Dict[str, Any],
+                 max_concurrency: int = 8, memo: Optional[ElementMemo] = None,
+                 admission: Optional[AdmissionController] = None):
+        self.plan = plan
+        self.config = config
+        self.max_concurrency = max(1, max_concurrency)
+        self.memo = memo
+        self.admission = admission
+
+    async def stream_results(self, items: List[Optional[Dict[str, Any]]]) -> AsyncGenerator[str, None]:
+        """Run every item and yield one NDJSON line per result, then the summary."""
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [asyncio.create_task(self._run_item(semaphore, index, inputs))
+                 for index, inputs in enumerate(items)]
+
+        completed = 0
+        durations = []
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result["status"] == "completed":
+                    completed += 1
+                durations.append(result["execution_time"])
+                yield codec.dumps(result, default=str) + "\n"
+        finally:
+            # The client went away; stop the items still running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        wall_time = time.time() - start_time
+        yield codec.dumps({
+            "type": "batch_summary",
+            "flow_id": self.plan.flow_id,
+            "total": len(items),
+            "completed": completed,
+            "failed": len(items) - completed,
+            "max_concurrency": self.max_concurrency,
+            "wall_time": wall_time,
+            "items_per_second": len(items) / wall_time if wall_time > 0 else 0.0,
+            "execution_time": _summarize(durations)
+        }) + "\n"
+
+    async def _run_item(self, semaphore: asyncio.Semaphore, index: int,
+                        inputs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one item of the batch and describe its outcome."""
+        async with semaphore:
+            executor = FlowExecutor(self.plan, stream_manager=None, config=self.config, memo=self.memo)
+            start_time = time.time()
+            # The batch bounds its own waiting items, so they do not count against the queue limit
+            ticket = self.admission.reserve("batch", bounded=False) if self.admission is not None else None
+            try:
+                if ticket is not None:
+                    await ticket.wait()
+                result = await executor.execute_flow(inputs)
+            except Exception as e:
+                logger.error(f"Batch item {index} of flow {self.plan.flow_id} failed: {str(e)}")
+                return {
+                    "type": "item_result",
+                    "index": index,
+                    "status": "error",
+                    "error": str(e),
+                    "execution_time": time.time() - start_time
+                }
+            finally:
+                if ticket is not None:
+                    ticket.release()
+
+            item = {
+                "type": "item_result",
+                "index": index,
+                "status": "completed",
+                "final_output": result["final_output"],
+                "execution_order": result["execution_order"],
+                "execution_time": result["execution_time"]
+            }
+            if executor.event_payloads.include_outputs:
+                item["element_outputs"] = executor.event_payloads.all_outputs(result["element_outputs"])
+            return item
+
+def _summarize(durations: List[float]) -> Dict[str, float]:
+    """Get mean and percentiles of item durations, in seconds."""
+    if not durations:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    ordered = sorted(durations)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[int(0.5 * (len(ordered) - 1))],
+        "p95": ordered[int(0.95 * (len(ordered) - 1))],
+        "max": ordered[-1]
+    }
@@ -0,0 +1,148 @@
+# core/checkpoint.py
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from utils.logger import logger
+from utils import codec
+
+class CheckpointStore:
+    """
+    SQLite store of flow runs and the outputs of their completed elements.
+
+    A run is recorded with its flow definition, initial inputs and request
+    config when it starts. Every element that completes is written with its
+    outputs and the run's current branch flags, so a failed or cancelled run
+    can be resumed from the elements that already finished.
+
+    Methods block on SQLite; call them from a worker thread in async code.
+    """
+
+    def __init__(self, path: str = "checkpoints.db", ttl: float = 86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    flow_id TEXT,
+                    flow_hash TEXT,
+                    flow_definition TEXT NOT NULL,
+                    initial_inputs TEXT,
+                    config TEXT,
+                    branch_flags TEXT,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS element_outputs (
+                    run_id TEXT NOT NULL,
+                    element_id TEXT NOT NULL,
+                    outputs TEXT NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, element_id)
+                )
+            """)
+
+    def start_run(self, run_id: str, flow_id: str, flow_hash: str, flow_definition: Dict[str, Any],
+                  initial_inputs: Optional[Dict[str, Any]], config: Optional[Dict[str, Any]]):
+        """Record a new run, dropping runs older than the TTL."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, flow_id, flow_hash, flow_definition, initial_inputs, "
+                "config, branch_flags, status, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, '{}', 'running', NULL, ?, ?)",
+                (run_id, flow_id, flow_hash, codec.dumps(flow_definition, default=str),
+                 codec.dumps(initial_inputs or {}, default=str), codec.dumps(config or {}, default=str), now, now)
+            )
+            self._expire(now)
+
+    def save_element(self, run_id: str, element_id: str, outputs: Dict[str, Any], branch_flags: Dict[str, bool]):
+        """Record a completed element and the branch flags set so far."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO element_outputs (run_id, element_id, outputs, completed_at) VALUES (?, ?, ?, ?)",
+                (run_id, element_id, codec.dumps(outputs, default=str), now)
+            )
+            self._conn.execute(
+                "UPDATE runs SET branch_flags = ?, updated_at = ? WHERE run_id = ?",
+                (codec.dumps(branch_flags), now, run_id)
+            )
+
+    def set_status(self, run_id: str, status: str, error: Optional[str] = None):
+        """Update the status of a run."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id)
+            )
+
+    def claim_run(self, run_id: str, stale_after: float) -> bool:
+        """
+        Mark a run as running again so it can be resumed.
+
+        Failed and cancelled runs can always be claimed. A run still marked
+        running is only claimed once it has not been updated for
+        ``stale_after`` seconds, which means the process running it is gone.
+        Returns False if the run is unknown, completed or still active.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            claimed = self._conn.execute(
+                "UPDATE runs SET status = 'running', error = NULL, updated_at = ? WHERE run_id = ? "
+                "AND (status IN ('failed', 'cancelled') OR (status = 'running' AND updated_at < ?))",
+                (now, run_id, now - stale_after)
+            ).rowcount
+        return claimed == 1
+
+    def load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get a run with the outputs of its completed elements, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT flow_id, flow_hash, flow_definition, initial_inputs, config, branch_flags, status, error, "
+                "created_at, updated_at FROM runs WHERE run_id = ?",
+                (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            outputs = self._conn.execute(
+                "SELECT element_id, outputs FROM element_outputs WHERE run_id = ? ORDER BY completed_at",
+                (run_id,)
+            ).fetchall()
+
+        return {
+            "run_id": run_id,
+            "flow_id": row[0],
+            "flow_hash": row[1],
+            "flow_definition": codec.loads(row[2]),
+            "initial_inputs": codec.loads(row[3]),
+            "config": codec.loads(row[4]),
+            "branch_flags": codec.loads(row[5]),
+            "status": row[6],
+            "error": row[7],
+            "created_at": row[8],
+            "updated_at": row[9],
+            "element_outputs": {element_id: codec.loads(data) for element_id, data in outputs}
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _expire(self, now: float):
+        """Drop runs not updated within the TTL. Called with the lock held."""
+        cutoff = now - self.ttl
+        expired = self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,)).rowcount
+        if expired:
+            self._conn.execute("DELETE FROM element_outputs WHERE run_id NOT IN (SELECT run_id FROM runs)")
+            logger.info(f"Dropped {expired} expired checkpointed runs")
@@ -0,0 +1,360 @@
+# core/compiler.py
+import hashlib
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+from .element_base import ElementBase
+from .optimizer import prune_static_branches
+from utils.cache import LRUCache
+from utils import codec
+from utils.logger import logger
+
+# Element definition fields passed to every element constructor
+COMMON_ELEMENT_FIELDS = ("element_id", "name", "description", "input_schema", "output_schema")
+
+# Element definition fields handled by the executor rather than the element class
+EXECUTION_FIELDS = ("timeout", "session_ttl")
+
+class FlowCompilationError(ValueError):
+    """Raised when a flow definition cannot be compiled into an execution plan."""
+    pass
+
+def content_hash(value: Any) -> str:
+    """Get a hash of a JSON-like value, independent of dict key order."""
+    canonical = codec.canonical_dumps(value, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def hash_flow_definition(flow_definition: Dict[str, Any]) -> str:
+    """Get a content hash for a flow definition."""
+    return content_hash(flow_definition)
+
+class ElementSpec:
+    """Static configuration needed to create one element of a plan."""
+
+    def __init__(self, element_id: str, element_type: str,
+                 element_class: Type[ElementBase], params: Dict[str, Any],
+                 timeout: Optional[float] = None, session_ttl: Optional[float] = None,
+                 subflow: Optional["ExecutionPlan"] = None):
+        self.element_id = element_id
+        self.element_type = element_type
+        self.element_class = element_class
+        self.params = MappingProxyType(params)
+        self.timeout = timeout
+        self.session_ttl = session_ttl
+        self.subflow = subflow
+        self.config_hash = content_hash({"type": element_type, "params": params, "timeout": timeout})
+
+    def instantiate(self) -> ElementBase:
+        """Create the element instance."""
+        try:
+            element = self.element_class(**self.params)
+        except TypeError as e:
+            raise FlowCompilationError(f"Invalid parameters for element '{self.element_id}': {str(e)}")
+        element.timeout = self.timeout
+        element.subflow = self.subflow
+        if self.subflow is not None:
+            try:
+                element.check_subflow()
+            except ValueError as e:
+                raise FlowCompilationError(f"Invalid nested flow settings for element '{self.element_id}': {str(e)}")
+        if self.session_ttl is not None:
+            element.session_ttl = self.session_ttl
+        return element
+
+class ExecutionPlan:
+    """
+    Immutable description of how to execute a flow.
+
+    A plan holds everything that only depends on the flow definition: the
+    element specs and connected element instances, the connection wiring,
+    the topological order of the elements a run visits, their dependency
+    counts and the port wiring table used to pass outputs downstream.
+    Elements keep no run state, so one plan serves any number of concurrent
+    runs; only an ExecutionContext is created per execution.
+
+    With ``prune`` set, branches that statically evaluated Case and
+    FlowSelect elements never enable are removed from the run, and their
+    elements are not instantiated.
+    """
+
+    def __init__(self, flow_hash: str, flow_id: str, start_element_id: str,
+                 specs: Dict[str, ElementSpec],
+                 connections: List[Tuple[str, str, Optional[str], Optional[str]]],
+                 prune: bool = False):
+        self.flow_hash = flow_hash
+        self.flow_id = flow_id
+        self.start_element_id = start_element_id
+        self.specs = MappingProxyType(specs)
+        self.connections = tuple(connections)
+
+        # Unique upstream and downstream element ids, in connection order
+        downstream = {element_id: {} for element_id in specs}
+        upstream = {element_id: {} for element_id in specs}
+        for from_id, to_id, _, _ in self.connections:
+            downstream[from_id][to_id] = None
+            upstream[to_id][from_id] = None
+        self.downstream = MappingProxyType({k: tuple(v) for k, v in downstream.items()})
+        self.upstream = MappingProxyType({k: tuple(v) for k, v in upstream.items()})
+
+        # Downstream element ids with one entry per connection, as in the
+        # element instances' connections, which branch flags index into
+        targets = {element_id: [] for element_id in specs}
+        for from_id, to_id, _, _ in self.connections:
+            targets[from_id].append(to_id)
+        self._targets = {k: tuple(v) for k, v in targets.items()}
+
+        run_order = self._topological_order(self._collect_run_set())
+        wiring = self._build_wiring(run_order)
+
+        # Element instances are created on demand, so pruned elements never are
+        self._instances: Dict[str, ElementBase] = {}
+        self._connected = set()
+        self._unpruned: Optional["ExecutionPlan"] = None
+
+        # Elements the pruning assumed to get no initial inputs
+        self.static_element_ids = frozenset()
+        self.pruned_element_ids = frozenset()
+        if prune:
+            unreachable, self.static_element_ids = prune_static_branches(
+                run_order, self.upstream, self.downstream, self._targets, wiring, self._instance
+            )
+            if unreachable:
+                self.pruned_element_ids = frozenset(unreachable)
+                run_order = tuple(element_id for element_id in run_order if element_id not in unreachable)
+                wiring = {element_id: tuple(route for route in routes if route[0] not in unreachable)
+                          for element_id, routes in wiring.items() if element_id not in unreachable}
+
+        self.run_order = run_order
+        self.dependency_counts = MappingProxyType({
+            element_id: sum(1 for dep_id in self.upstream[element_id] if dep_id not in self.pruned_element_ids)
+            for element_id in self.run_order
+        })
+        self.wiring = MappingProxyType(wiring)
+        self.elements = MappingProxyType(self._build_elements())
+
+    def unpruned(self) -> "ExecutionPlan":
+        """Get the equivalent plan without static pruning, for runs that break its assumptions."""
+        if not self.pruned_element_ids:
+            return self
+        if self._unpruned is None:
+            self._unpruned = ExecutionPlan(self.flow_hash, self.flow_id, self.start_element_id,
+                                           dict(self.specs), list(self.connections))
+        return self._unpruned
+
+    def assumes_no_inputs(self, initial_inputs: Optional[Dict[str, Any]]) -> bool:
+        """Check whether initial inputs target an element the pruning assumed to get none."""
+        return bool(initial_inputs) and not self.static_element_ids.isdisjoint(initial_inputs)
+
+    def _instance(self, element_id: str) -> ElementBase:
+        """Get the shared instance of an element, creating it on first use."""
+        element = self._instances.get(element_id)
+        if element is None:
+            element = self._instances[element_id] = self.specs[element_id].instantiate()
+        return element
+
+    def _connect(self, element_id: str):
+        """Connect an element instance to its downstream elements that can run, once per connection."""
+        if element_id in self._connected:
+            return
+        self._connected.add(element_id)
+        element = self._instance(element_id)
+        for to_id in self._targets[element_id]:
+            if to_id not in self.pruned_element_ids:
+                element.connect(self._instance(to_id))
+
+    def _build_elements(self) -> Dict[str, ElementBase]:
+        """Create the shared element instances that can run and connect them."""
+        elements = {}
+        for element_id in self.specs:
+            if element_id not in self.pruned_element_ids:
+                self._connect(element_id)
+                elements[element_id] = self._instance(element_id)
+        return elements
+
+    def _build_wiring(self, run_order: Tuple[str, ...]) -> Dict[str, Tuple[Tuple[str, str, str], ...]]:
+        """
+        Resolve every connection into (consumer id, output name, input name) routes.
+
+        A connection with ports routes one output into one input; a port left
+        out defaults to the name of the other one. A connection without ports
+        routes each output named after one of the consumer's inputs, which
+        matches the name-based mapping flows without ports rely on. Routes
+        into elements outside the run set are dropped.
+        """
+        run_set = set(run_order)
+        wiring = {element_id: [] for element_id in run_order}
+        for from_id, to_id, from_output, to_input in self.connections:
+            if from_id not in run_set or to_id not in run_set:
+                continue
+
+            if from_output or to_input:
+                input_names = self.specs[to_id].params.get("input_schema") or {}
+                to_input = to_input or from_output
+                if input_names and to_input not in input_names:
+                    logger.warning(f"Connection {from_id} -> {to_id} targets input '{to_input}' "
+                                   f"missing from the input schema of '{to_id}'")
+                wiring[from_id].append((to_id, from_output or to_input, to_input))
+            else:
+                for input_name in self.specs[to_id].params.get("input_schema") or {}:
+                    wiring[from_id].append((to_id, input_name, input_name))
+
+        return {element_id: tuple(routes) for element_id, routes in wiring.items()}
+
+    def _collect_run_set(self) -> List[str]:
+        """
+        Collect the elements a run will visit.
+
+        This is everything reachable from the start element plus all of their
+        upstream dependencies.
+        """
+        reachable = [self.start_element_id]
+        seen = {self.start_element_id}
+        stack = [self.start_element_id]
+        while stack:
+            for conn_id in self.downstream[stack.pop()]:
+                if conn_id not in seen:
+                    seen.add(conn_id)
+                    reachable.append(conn_id)
+                    stack.append(conn_id)
+
+        stack = list(reachable)
+        while stack:
+            for dep_id in self.upstream[stack.pop()]:
+                if dep_id not in seen:
+                    seen.add(dep_id)
+                    reachable.append(dep_id)
+                    stack.append(dep_id)
+
+        return reachable
+
+    def _topological_order(self, run_set: List[str]) -> Tuple[str, ...]:
+        """Order the run set so every element comes after its dependencies."""
+        pending = {element_id: len(self.upstream[element_id]) for element_id in run_set}
+        ready = deque(element_id for element_id in run_set if pending[element_id] == 0)
+        order = []
+        while ready:
+            element_id = ready.popleft()
+            order.append(element_id)
+            for conn_id in self.downstream[element_id]:
+                if conn_id in pending:
+                    pending[conn_id] -= 1
+                    if pending[conn_id] == 0:
+                        ready.append(conn_id)
+
+        if len(order) != len(run_set):
+            cycle = sorted(element_id for element_id in run_set if pending[element_id] > 0)
+            raise FlowCompilationError(f"Flow contains a cycle between elements: {cycle}")
+
+        return tuple(order)
+
+class FlowCompiler:
+    """Compiles flow definitions into execution plans and caches them by content hash."""
+
+    def __init__(self, element_registry: Dict[str, Type[ElementBase]],
+                 definition_model: Optional[Type] = None, cache_size: int = 256,
+                 prune: bool = True):
+        """
+        Initialize the flow compiler.
+
+        Args:
+            element_registry: Mapping of element types to element classes
+            definition_model: Optional Pydantic model used to validate definitions on a cache miss
+            cache_size: Maximum number of plans kept in the LRU cache
+            prune: Remove branches that statically evaluated branch elements never enable
+        """
+        self.element_registry = element_registry
+        self.definition_model = definition_model
+        self.cache = LRUCache(cache_size)
+        self.prune = prune
+
+    def get_plan(self, flow_definition: Dict[str, Any], flow_hash: Optional[str] = None) -> ExecutionPlan:
+        """
+        Get the plan for a flow definition, compiling it only if it is not cached.
+
+        ``flow_hash`` skips hashing the definition when its hash is already known.
+        """
+        flow_hash = flow_hash or hash_flow_definition(flow_definition)
+        plan = self.cache.get(flow_hash)
+        if plan is None:
+            plan = self.compile(flow_definition, flow_hash)
+            self.cache.put(flow_hash, plan)
+            logger.debug(f"Compiled flow {plan.flow_id} ({flow_hash[:12]})")
+        return plan
+
+    def compile(self, flow_definition: Dict[str, Any], flow_hash: Optional[str] = None) -> ExecutionPlan:
+        """Validate a flow definition and compile it into an execution plan."""
+        if self.definition_model is not None:
+            flow_definition = self.definition_model(**flow_definition).dict()
+
+        elements = flow_definition.get("elements") or {}
+        start_element_id = flow_definition.get("start_element_id")
+        if start_element_id not in elements:
+            raise FlowCompilationError(f"Start element '{start_element_id}' not found in flow")
+
+        specs = {}
+        for elem_id, elem_data in elements.items():
+            elem_type = elem_data.get("type")
+            if elem_type not in self.element_registry:
+                raise FlowCompilationError(f"Unknown element type: {elem_type}")
+
+            # Common parameters plus any parameters specific to the element type
+            params = {k: v for k, v in elem_data.items() if k != "type" and k not in EXECUTION_FIELDS}
+            params["element_id"] = elem_id
+            for field in COMMON_ELEMENT_FIELDS:
+                params.setdefault(field, None)
+
+            timeout = self._seconds(elem_id, "timeout", elem_data.get("timeout"))
+            session_ttl = self._seconds(elem_id, "session_ttl", elem_data.get("session_ttl"))
+
+            try:
+                element_class = self.element_registry[elem_type]
+            except ImportError as e:
+                # Element modules may be loaded on first use, so a missing dependency surfaces here
+                raise FlowCompilationError(f"Element type '{elem_type}' is unavailable: {str(e)}")
+            subflow = None
+            if element_class.subflow_field is not None:
+                subflow = self._compile_subflow(elem_id, elem_data.get(element_class.subflow_field))
+
+            specs[elem_id] = ElementSpec(elem_id, elem_type, element_class, params,
+                                         timeout, session_ttl, subflow)
+
+        connections = []
+        for conn in flow_definition.get("connections") or []:
+            from_id = conn.get("from_id")
+            to_id = conn.get("to_id")
+            if from_id in specs and to_id in specs:
+                connections.append((from_id, to_id, conn.get("from_output"), conn.get("to_input")))
+            else:
+                logger.warning(f"Skipping connection {from_id} -> {to_id}: unknown element")
+
+        return ExecutionPlan(
+            flow_hash=flow_hash or hash_flow_definition(flow_definition),
+            flow_id=flow_definition.get("flow_id"),
+            start_element_id=start_element_id,
+            specs=specs,
+            connections=connections,
+            prune=self.prune
+        )
+
+    def _compile_subflow(self, element_id: str, flow_definition: Any) -> ExecutionPlan:
+        """Compile the nested flow of an element, sharing the plan cache with top-level flows."""
+        if not isinstance(flow_definition, dict):
+            raise FlowCompilationError(f"Element '{element_id}' requires a nested flow definition")
+
+        flow_definition = dict(flow_definition)
+        flow_definition.setdefault("flow_id", element_id)
+        flow_definition.setdefault("connections", [])
+        try:
+            return self.get_plan(flow_definition)
+        except FlowCompilationError as e:
+            raise FlowCompilationError(f"Invalid nested flow in element '{element_id}': {str(e)}")
+
+    @staticmethod
+    def _seconds(element_id: str, field: str, value: Any) -> Optional[float]:
+        """Validate an optional positive duration from an element definition."""
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise FlowCompilationError(f"Invalid {field} for element '{element_id}': {value}")
+        return float(value)
@@ -0,0 +1,48 @@
+# core/context.py
+from typing import Dict, Any, Set
+
+class ExecutionContext:
+    """
+    Per-run state of a flow execution.
+    
+    Elements are shared between runs, so everything one run writes is kept
+    here, keyed by element id, instead of on the element objects.
+    """
+    
+    def __init__(self):
+        self.inputs: Dict[str, Dict[str, Any]] = {}
+        self.outputs: Dict[str, Dict[str, Any]] = {}
+        self.executed: Set[str] = set()
+        self.downwards_execute: Dict[str, bool] = {}  # Controls forward flow, True when unset
+    
+    def get_inputs(self, element_id: str) -> Dict[str, Any]:
+        """Get the inputs set for an element in this run."""
+        inputs = self.inputs.get(element_id)
+        if inputs is None:
+            inputs = self.inputs[element_id] = {}
+        return inputs
+    
+    def set_input(self, element_id: str, input_name: str, value: Any):
+        """Set an input value for an element."""
+        self.get_inputs(element_id)[input_name] = value
+    
+    def get_outputs(self, element_id: str) -> Dict[str, Any]:
+        """Get the outputs an element produced in this run."""
+        return self.outputs.get(element_id, {})
+    
+    def set_outputs(self, element_id: str, outputs: Dict[str, Any]):
+        """Record an element's outputs and mark it as executed."""
+        self.outputs[element_id] = outputs
+        self.executed.add(element_id)
+    
+    def is_executed(self, element_id: str) -> bool:
+        """Check whether an element has executed in this run."""
+        return element_id in self.executed
+    
+    def can_execute_downwards(self, element_id: str) -> bool:
+        """Check whether an element passes execution on to its downstream elements."""
+        return self.downwards_execute.get(element_id, True)
+    
+    def set_downwards_execute(self, element_id: str, value: bool):
+        """Allow or stop an element from passing execution downstream."""
+        self.downwards_execute[element_id] = value
@@ -3,7 +3,44 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
 
 class ElementBase(ABC):
-    """Base class for all flow elements."""
+    """
+    Base class for all flow elements.
+    
+    Element objects are read-only definitions that may be shared by many
+    concurrent runs of the same flow. Everything a run produces (inputs,
+    outputs, branch flags) lives in the executor's ExecutionContext.
+    """
+    
+    # Elements whose outputs are a pure function of their config and inputs
+    # set this, so the executor can reuse their outputs across runs
+    deterministic = False
+    
+    # Seconds a non-deterministic element's outputs may be reused by later
+    # turns of a chat session with the same inputs; None disables reuse
+    session_ttl: Optional[float] = None
+    
+    # Elements that only read external state, so running them when their
+    # outputs end up unused is harmless; the executor may run them speculatively
+    side_effect_free = False
+    
+    # Elements that can read a TokenStream in place of a text input; with
+    # streaming edges they start while the upstream element is still producing
+    accepts_streams = False
+    
+    # Elements that send the text of a stream input to the client as it
+    # arrives, so the element producing it does not need to send it too
+    forwards_streams = False
+    
+    # Elements that accept streams and pass their text on as a stream name
+    # the output they stream it to
+    stream_output: Optional[str] = None
+    
+    # Elements that set downwards_execute on their downstream elements
+    controls_branches = False
+    
+    # Elements that run a nested flow name the definition field holding it;
+    # the compiler compiles that flow into ``subflow``
+    subflow_field: Optional[str] = None
     
     def __init__(self, element_id: str, name: str, element_type: str, 
                  description: str, input_schema: Dict[str, Any], 
@@ -14,10 +51,8 @@ class ElementBase(ABC):
         self.description = description
         self.input_schema = input_schema
         self.output_schema = output_schema
-        self.inputs = {}
-        self.outputs = {}
-        self.executed = False
-        self.downwards_execute = True  # Controls forward flow
+        self.timeout: Optional[float] = None  # Per-element deadline in seconds, set from the definition
+        self.subflow = None  # Compiled nested flow, set by the compiler when subflow_field is declared
         self.connections = []  # Downstream elements
         self.dependencies = []  # Upstream elements
         
@@ -26,29 +61,41 @@ class ElementBase(ABC):
         self.connections.append(element)
         element.dependencies.append(self)
     
-    def set_input(self, input_name: str, value: Any):
-        """Set an input value."""
-        self.inputs[input_name] = value
-    
-    def get_output(self, output_name: str) -> Any:
-        """Get an output value."""
-        return self.outputs.get(output_name)
-    
     @abstractmethod
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
-        """Execute the element logic."""
+        """Execute the element logic and return its outputs."""
+        pass
+    
+    def check_subflow(self):
+        """Check the element's settings against its compiled nested flow; raise ValueError if they do not fit."""
         pass
     
-    def validate_inputs(self) -> bool:
+    def static_outputs(self) -> Optional[Dict[str, Any]]:
+        """Get the outputs this element produces without inputs, if they are known before the run."""
+        return None
+    
+    def branch_flags(self, inputs: Optional[Dict[str, Any]], connection_count: int) -> Optional[Dict[int, bool]]:
+        """
+        Get the downwards_execute flags this element sets, by connection index.
+        
+        Only used for elements that control branches, before they are
+        connected. ``inputs`` are the element's inputs when they are known
+        before the run, otherwise None. ``connection_count`` is the number of
+        connections the element will have. Returns None when the flags can
+        only be decided at run time.
+        """
+        return None
+    
+    def validate_inputs(self, inputs: Dict[str, Any]) -> bool:
         """Validate that all required inputs are provided."""
         for name, schema in self.input_schema.items():
-            if schema.get('required', False) and name not in self.inputs:
+            if schema.get('required', False) and name not in inputs:
                 return False
         return True
     
-    def validate_outputs(self) -> bool:
+    def validate_outputs(self, outputs: Dict[str, Any]) -> bool:
         """Validate that all required outputs are produced."""
         for name, schema in self.output_schema.items():
-            if schema.get('required', False) and name not in self.outputs:
+            if schema.get('required', False) and name not in outputs:
                 return False
         return True
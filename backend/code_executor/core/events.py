@@ -0,0 +1,108 @@
+# core/events.py
+import hashlib
+from typing import Dict, Any
+
+from utils.logger import logger
+from utils import codec
+
+# Event verbosity levels, from least to most detailed
+EVENT_VERBOSITY_LEVELS = ("minimal", "summary", "full")
+
+class EventPayloads:
+    """
+    Shapes the element outputs carried by executor events.
+
+    - full: outputs are sent as they are
+    - summary: values larger than ``max_value_size`` are replaced by their
+      size, sha256 and a short preview
+    - minimal: outputs are left out of element events entirely
+
+    Summaries are computed once per element and run, so the same outputs
+    sent in element_completed and flow_completed are only measured once.
+    """
+
+    def __init__(self, verbosity: str = "full", max_value_size: int = 1024, preview_size: int = 200):
+        if verbosity not in EVENT_VERBOSITY_LEVELS:
+            logger.warning(f"Unknown event verbosity '{verbosity}', using 'full'")
+            verbosity = "full"
+        self.verbosity = verbosity
+        self.max_value_size = max_value_size
+        self.preview_size = preview_size
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def include_outputs(self) -> bool:
+        """Whether events carry element outputs at all."""
+        return self.verbosity != "minimal"
+
+    def element_outputs(self, element_id: str, outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Get an element's outputs as they should appear in events."""
+        if self.verbosity == "full" or not isinstance(outputs, dict):
+            return outputs
+
+        summary = self._summaries.get(element_id)
+        if summary is None:
+            summary = self._summaries[element_id] = {
+                name: self.summarize(value) for name, value in outputs.items()
+            }
+        return summary
+
+    def all_outputs(self, outputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Get the outputs of every element as they should appear in events."""
+        if self.verbosity == "full":
+            return outputs
+        return {element_id: self.element_outputs(element_id, element_outputs)
+                for element_id, element_outputs in outputs.items()}
+
+    def summarize(self, value: Any) -> Any:
+        """Replace a value with its size, hash and preview if it is too large to send."""
+        if _bounded_size(value, self.max_value_size) <= self.max_value_size:
+            return value
+
+        if isinstance(value, str):
+            encoded = value.encode("utf-8")
+            preview = value[:self.preview_size]
+        else:
+            text = codec.canonical_dumps(value, default=str)
+            encoded = text.encode("utf-8")
+            preview = text[:self.preview_size]
+
+        return {
+            "elided": True,
+            "size": len(encoded),
+            "sha256": hashlib.sha256(encoded).hexdigest(),
+            "preview": preview
+        }
+
+def _bounded_size(value: Any, limit: int) -> int:
+    """Estimate the serialized size of a value, stopping as soon as it exceeds the limit."""
+    size = 0
+    pending = [iter(((0, value),))]
+    while pending:
+        entry = next(pending[-1], None)
+        if entry is None:
+            pending.pop()
+            continue
+
+        overhead, item = entry
+        size += overhead
+        if isinstance(item, (str, bytes)):
+            size += len(item) + 2
+        elif isinstance(item, (dict, list, tuple)):
+            size += 2
+            pending.append(_children(item))
+        else:
+            size += len(str(item))
+
+        if size > limit:
+            return size
+    return size
+
+def _children(item):
+    """Yield the children of a container with the size of the separators around them."""
+    if isinstance(item, dict):
+        for key, child in item.items():
+            yield len(str(key)) + 4, child
+    else:
+        for child in item:
+            yield 1, child
@@ -1,40 +1,159 @@
 # core/executor.py
 import asyncio
-import json
-from typing import Dict, Any, List, Optional
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Set, Tuple
 from uuid import uuid4
 import time
 
 from .element_base import ElementBase
+from .compiler import ExecutionPlan
+from .context import ExecutionContext
+from .events import EventPayloads
+from .memo import ElementMemo, make_input_key
+from .session import SessionState
+from .checkpoint import CheckpointStore
+from .speculation import Speculation, SpeculationStats, SpeculativeView
 from utils.logger import logger
+from utils import codec
 from services.streaming import WebSocketStreamManager
+from services.event_pipeline import EventBatcher
+from utils.profiling import ElementSpan, current_span, serialization, profiler
+from utils.token_stream import TokenStream
+
+class FlowTimeoutError(Exception):
+    """Raised when a flow run exceeds its max_execution_time."""
+    pass
+
+class ElementTimeoutError(Exception):
+    """Raised when an element exceeds the timeout declared in its definition."""
+    pass
+
+# Events sent by the element running in the current task, recorded so a memo hit can send them again
+recorded_events: ContextVar[Optional[List[Tuple[str, Dict[str, Any]]]]] = ContextVar("recorded_events", default=None)
+
+class DeadlineExpired(Exception):
+    """Raised by wait_with_deadline when the timeout itself ran out."""
+    pass
+
+# The loop may fire a timer up to its clock resolution early
+DEADLINE_SLACK = 0.001
+
+async def wait_with_deadline(awaitable, timeout: Optional[float]):
+    """
+    Await with an optional timeout, raising DeadlineExpired only when the
+    timeout ran out. A TimeoutError raised by the awaited code itself, such
+    as a socket or HTTP timeout inside an element, passes through unchanged.
+    """
+    if timeout is None:
+        return await awaitable
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        if loop.time() < deadline - DEADLINE_SLACK:
+            raise
+        raise DeadlineExpired(f"Timed out after {timeout}s")
 
 class FlowExecutor:
     """Main class for executing flows."""
     
-    def __init__(self, elements: Dict[str, ElementBase], 
-                 start_element_id: str, 
+    def __init__(self, plan: ExecutionPlan, 
                  stream_manager: Optional[WebSocketStreamManager] = None,
-                 config: Dict[str, Any] = None):
-        self.elements = elements
-        self.start_element_id = start_element_id
-        self.output_cache = {}  # Cache for element outputs
+                 config: Dict[str, Any] = None,
+                 memo: Optional[ElementMemo] = None,
+                 session: Optional[SessionState] = None,
+                 checkpoint: Optional[CheckpointStore] = None,
+                 run_id: Optional[str] = None):
+        self.plan = plan
+        self.elements = plan.elements  # Shared, read-only element definitions
+        self.start_element_id = plan.start_element_id
+        self.context = ExecutionContext()  # Per-run element state
+        self.output_cache = self.context.outputs  # Cache for element outputs
         self.execution_order = []  # Tracks execution order
         self.stream_manager = stream_manager
         self.config = config or {}
-        self.flow_id = str(uuid4())
+        self.flow_id = run_id or str(uuid4())
+        
+        # Cross-run cache for deterministic elements
+        self.memo = memo if self.config.get("enable_memoization", True) else None
+        
+        # Outputs kept from earlier turns of a chat session
+        self.session = session
+        self.reused_elements = []  # Elements whose outputs came from the session
+        
+        # Completed elements are saved so a failed run can be resumed
+        self.checkpoint = checkpoint
+        self.restored_elements = []  # Elements whose outputs came from an earlier attempt of this run
+        self._restored: Set[str] = set()
+        self._checkpoint_lock = asyncio.Lock()
+        
+        # Optionally start side-effect-free elements before the branch decisions
+        # above them are made, keeping their outputs only if they end up running
+        self.speculative = self.config.get("speculative_execution", False)
+        self.max_speculative = max(1, int(self.config.get("max_speculative_elements", 4)))
+        self.speculation_stats = SpeculationStats()
+        self._speculations: Dict[str, Speculation] = {}
+        self._pending: Dict[str, int] = {}  # Unfinished dependencies per element, while the plan runs
+        self._settled: Set[str] = set()  # Elements that finished or were skipped
+        
+        # Elements that accept token streams may start while the upstream
+        # element feeding them is still producing text
+        self.streaming_edges = self.config.get("streaming_edges", False)
+        self._early: Dict[str, asyncio.Task] = {}  # Elements started before their dependencies finished
+        self._open_streams: Dict[str, List[tuple]] = {}  # (consumer id, input name, stream) per producing element
+        
+        # How much of the element outputs events carry
+        self.event_payloads = EventPayloads(
+            verbosity=self.config.get("event_verbosity", "full"),
+            max_value_size=int(self.config.get("event_max_value_size", 1024))
+        )
         
+        # Per-element timing spans, also aggregated in the process-wide profiler
+        self.profiling = self.config.get("enable_profiling", True)
+        self.spans: List[ElementSpan] = []
+        self._ready_at: Dict[str, float] = {}  # When each element became ready to run
+        
+        # Optionally send events in batches instead of one frame per event
+        self.event_batcher = None
+        if stream_manager is not None and self.config.get("event_batching", False):
+            self.event_batcher = EventBatcher(
+                stream_manager,
+                flush_interval=float(self.config.get("event_batch_interval", 0.02)),
+                max_events=int(self.config.get("event_batch_max_events", 64)),
+                max_bytes=int(self.config.get("event_batch_max_bytes", 65536))
+            )
+        
+    def restore(self, run: Dict[str, Any]):
+        """
+        Seed this run with the elements an earlier attempt already completed.
+        
+        ``run`` is a run loaded from the checkpoint store. Restored elements
+        are not executed again; their outputs and branch flags are passed
+        downstream as if they had just finished.
+        """
+        for element_id, outputs in run["element_outputs"].items():
+            if element_id in self.plan.specs:
+                self.context.set_outputs(element_id, outputs)
+                self._restored.add(element_id)
+        self.context.downwards_execute.update(run["branch_flags"])
+    
     async def execute_flow(self, initial_inputs: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute the entire flow starting from the start element."""
         start_time = time.time()
         
+        # The plan may have been pruned assuming some elements get no initial inputs
+        if self.plan.assumes_no_inputs(initial_inputs):
+            self.plan = self.plan.unpruned()
+            self.elements = self.plan.elements
+        
         # Set initial inputs to respective elements
         if initial_inputs:
             for element_id, inputs in initial_inputs.items():
-                if element_id in self.elements:
-                    element = self.elements[element_id]
+                if element_id in self.plan.specs:
                     for input_name, input_value in inputs.items():
-                        element.set_input(input_name, input_value)
+                        self.context.set_input(element_id, input_name, input_value)
                 else:
                     logger.warning(f"Element with ID '{element_id}' not found, skipping initial inputs")
         
@@ -44,12 +163,20 @@ class FlowExecutor:
             "start_time": start_time
         })
         
-        # Get the start element (after setting inputs)
-        start_element = self.elements[self.start_element_id]
-        
-        # Execute the start element
+        # Execute every element once its dependencies have settled
         try:
-            result = await self._execute_element(start_element)
+            if self.config.get("execution_mode", "sequential") == "concurrent":
+                max_parallelism = max(1, int(self.config.get("max_parallelism", 8)))
+            else:
+                max_parallelism = 1
+            
+            # Enforce the flow-wide deadline; cancellation reaches every running element
+            max_execution_time = self.config.get("max_execution_time") or None
+            try:
+                await wait_with_deadline(self._execute_plan(max_parallelism), max_execution_time)
+            except DeadlineExpired:
+                raise FlowTimeoutError(f"Flow execution exceeded max_execution_time of {max_execution_time}s")
+            result = self.output_cache.get(self.start_element_id, {})
             
             # Prepare final result
             final_result = {
@@ -57,24 +184,39 @@ class FlowExecutor:
                 "execution_order": self.execution_order,
                 "element_outputs": self.output_cache,
                 "final_output": result,
+                "reused_elements": self.reused_elements,
+                "restored_elements": self.restored_elements,
                 "execution_time": time.time() - start_time
             }
+            if self.profiling:
+                final_result["spans"] = [span.to_dict() for span in self.spans]
+                profiler.record_flow(final_result["execution_time"])
+            if self.speculative:
+                final_result["speculation"] = self.speculation_stats.to_dict()
             
-            await self._stream_event("flow_completed", final_result)
+            # The final output is always sent in full; the other outputs follow the event verbosity
+            completed_event = dict(final_result)
+            if self.event_payloads.include_outputs:
+                completed_event["element_outputs"] = self.event_payloads.all_outputs(self.output_cache)
+            else:
+                del completed_event["element_outputs"]
+            await self._stream_event("flow_completed", completed_event)
+            await self._checkpoint_status("completed")
             
             return final_result
             
-        except Exception as e:
-            error_data = {
-                "flow_id": self.flow_id,
-                "error": str(e),
-                "partial_execution_order": self.execution_order,
-                "partial_outputs": self.output_cache,
-                "execution_time": time.time() - start_time
-            }
-            
-            await self._stream_event("flow_error", error_data)
-            logger.error(f"Flow execution error: {str(e)}")
+        except asyncio.CancelledError:
+            # The client went away or the run was stopped; running elements were cancelled too
+            logger.info(f"Flow {self.flow_id} execution cancelled")
+            try:
+                await self._stream_event("flow_cancelled", {
+                    "flow_id": self.flow_id,
+                    "partial_execution_order": self.execution_order,
+                    "execution_time": time.time() - start_time
+                })
+            except Exception:
+                pass
+            await self._checkpoint_status("cancelled")
             raise
             
         except Exception as e:
@@ -82,27 +224,61 @@ class FlowExecutor:
                 "flow_id": self.flow_id,
                 "error": str(e),
                 "partial_execution_order": self.execution_order,
-                "partial_outputs": self.output_cache,
-                "execution_time": time.time() - start_time
+                "execution_time": time.time() - start_time,
+                "timed_out": isinstance(e, FlowTimeoutError),
+                "resumable": self.checkpoint is not None
             }
+            if self.event_payloads.include_outputs:
+                error_data["partial_outputs"] = self.event_payloads.all_outputs(self.output_cache)
             
+            await self._checkpoint_status("failed", str(e))
             await self._stream_event("flow_error", error_data)
             logger.error(f"Flow execution error: {str(e)}")
             raise
+        
+        finally:
+            if self.profiling:
+                profiler.record_spans(self.spans)
+                if self.speculative:
+                    profiler.record_speculation(self.speculation_stats)
+            
+            # Send the events still waiting in the current batch
+            if self.event_batcher is not None:
+                try:
+                    await self.event_batcher.close()
+                except Exception as e:
+                    logger.error(f"Error flushing events for flow {self.flow_id}: {str(e)}")
+    
+    async def _run_element(self, element: ElementBase, backtracking=False) -> Dict[str, Any]:
+        """Execute a single element, recording a timing span for it if profiling is enabled."""
+        if not self.profiling:
+            return await self._execute_element(element, backtracking)
+        
+        ready_at = self._ready_at.pop(element.element_id, None)
+        span = ElementSpan(element.element_id, element.element_type,
+                           time.perf_counter() - ready_at if ready_at is not None else 0.0)
+        self.spans.append(span)
+        token = current_span.set(span)
+        try:
+            outputs = await self._execute_element(element, backtracking)
+            span.finish("completed")
+            return outputs
+        except ElementTimeoutError:
+            span.finish("timeout")
+            raise
+        except asyncio.CancelledError:
+            span.finish("cancelled")
+            raise
+        except Exception:
+            span.finish("error")
+            raise
+        finally:
+            current_span.reset(token)
     
     async def _execute_element(self, element: ElementBase, backtracking=False) -> Dict[str, Any]:
-        """Execute a single element in the flow."""
+        """Execute a single element and record its outputs, without touching downstream elements."""
         element_id = element.element_id
-        
-        # Check if already executed and cached
-        if element.executed and element_id in self.output_cache:
-            return self.output_cache[element_id]
-            
-        # Check if all dependencies have been executed
-        for dep in element.dependencies:
-            if not dep.executed:
-                # Execute dependency in backtracking mode
-                await self._execute_element(dep, backtracking=True)
+        recorded_events.set(None)  # Elements started from another element's task record nothing for it
         
         # Stream execution start event
         await self._stream_event("element_started", {
@@ -114,35 +290,72 @@ class FlowExecutor:
         })
         
         try:
-            # Execute the element
-            outputs = await element.execute(self, backtracking)
+            # Reuse outputs from an earlier turn of the session, or from the memo,
+            # if the element already ran with the same config and inputs
+            input_key = self._input_key(element)
+            memoized = bool(input_key) and self.memo is not None and element.deterministic
+            in_session = bool(input_key) and self.session is not None
+            entry = None
+            reused = False
+            if in_session:
+                entry = self.session.lookup(element_id, input_key, element.session_ttl)
+                reused = entry is not None
+            if entry is None and memoized:
+                entry = self.memo.get(input_key)
+            if entry is not None:
+                # Send the events the element sent when it produced the outputs
+                outputs, events = entry
+                for event_type, data in events:
+                    await self._stream_event(event_type, data)
+            cached = entry is not None
+            span = current_span.get()
+            if span is not None:
+                span.cached = cached
+            
+            # Otherwise use the outputs of a speculative run with the same inputs, if there is one
+            speculative = False
+            if cached:
+                self._discard_speculation(element_id)
+            else:
+                # Record the element's own events along with its outputs
+                events = [] if memoized or in_session else None
+                token = recorded_events.set(events)
+                try:
+                    if self._speculations:
+                        outputs = await self._take_speculation(element)
+                        speculative = outputs is not None
+                    if not speculative:
+                        outputs = await self._execute_with_timeout(element, backtracking)
+                finally:
+                    recorded_events.reset(token)
+                
+                if memoized:
+                    self.memo.put(input_key, outputs, events)
+            
+            if reused:
+                self.reused_elements.append(element_id)
+            elif in_session:
+                self.session.record(element_id, input_key, outputs, events)
             
             # Mark as executed and cache outputs
-            element.executed = True
-            self.output_cache[element_id] = outputs
+            self.context.set_outputs(element_id, outputs)
             self.execution_order.append(element_id)
+            await self._checkpoint_element(element_id, outputs)
             
             # Stream execution completed event
-            await self._stream_event("element_completed", {
+            completed_event = {
                 "flow_id": self.flow_id,
                 "element_id": element_id,
                 "element_type": element.element_type,
                 "element_name": element.name,
-                "outputs": outputs,
-                "backtracking": backtracking
-            })
-            
-            # If not in backtracking mode and downwards execution is allowed,
-            # continue with downstream elements
-            if not backtracking and element.downwards_execute:
-                for conn in element.connections:
-                    # Map outputs to connected element inputs based on schema
-                    for output_name, output_value in outputs.items():
-                        if output_name in conn.input_schema:
-                            conn.set_input(output_name, output_value)
-                    
-                    # Execute connected element
-                    await self._execute_element(conn)
+                "backtracking": backtracking,
+                "cached": cached
+            }
+            if self.speculative:
+                completed_event["speculative"] = speculative
+            if self.event_payloads.include_outputs:
+                completed_event["outputs"] = self.event_payloads.element_outputs(element_id, outputs)
+            await self._stream_event("element_completed", completed_event)
             
             return outputs
             
@@ -159,13 +372,376 @@ class FlowExecutor:
             logger.error(f"Error executing element {element_id}: {str(e)}")
             raise
     
+    async def _execute_with_timeout(self, element: ElementBase, backtracking=False) -> Dict[str, Any]:
+        """Run an element within its own deadline, if it declares one."""
+        try:
+            return await wait_with_deadline(element.execute(self, backtracking), element.timeout)
+        except DeadlineExpired:
+            await self._stream_event("element_timeout", {
+                "flow_id": self.flow_id,
+                "element_id": element.element_id,
+                "element_type": element.element_type,
+                "element_name": element.name,
+                "timeout": element.timeout
+            })
+            raise ElementTimeoutError(f"Element {element.element_id} exceeded its timeout of {element.timeout}s")
+    
+    def open_stream(self, element_id: str, output_name: str) -> Optional[TokenStream]:
+        """
+        Get a token stream for an element's text output, if a downstream element can read it as it is produced.
+        
+        Called by a running element. With streaming edges enabled, every
+        element wired to the output that accepts streams is given the stream
+        as its input and started as soon as the producer is the only
+        dependency it still waits for. The producer must append its text to
+        the stream and close it, and still return the whole text as the
+        output. Returns None when no downstream element can read the stream.
+        """
+        if not self.streaming_edges or not self._pending or not self.context.can_execute_downwards(element_id):
+            return None
+        
+        consumers = [(conn_id, input_name) for conn_id, routed_output, input_name in self.plan.wiring[element_id]
+                     if routed_output == output_name and conn_id not in self._restored
+                     and self.elements[conn_id].accepts_streams]
+        if not consumers:
+            return None
+        
+        stream = TokenStream()
+        stream.forwarded = any(self._forwards_to_client(conn_id) for conn_id, _ in consumers)
+        for conn_id, input_name in consumers:
+            self._open_streams.setdefault(element_id, []).append((conn_id, input_name, stream))
+            self._start_on_stream(conn_id, input_name, stream)
+        return stream
+    
+    def _forwards_to_client(self, element_id: str) -> bool:
+        """Whether an element reading a stream sends its text to the client, itself or through the elements it streams to."""
+        element = self.elements[element_id]
+        if element.forwards_streams:
+            return True
+        if element.stream_output is None:
+            return False
+        return any(routed_output == element.stream_output and conn_id not in self._restored
+                   and self.elements[conn_id].accepts_streams and self._forwards_to_client(conn_id)
+                   for conn_id, routed_output, _ in self.plan.wiring[element_id])
+    
+    def _start_on_stream(self, element_id: str, input_name: str, stream: TokenStream):
+        """Start an element reading a stream if the stream's producer is its last unfinished dependency."""
+        if element_id in self._early or self._pending.get(element_id) != 1:
+            return
+        self.context.set_input(element_id, input_name, stream)
+        self._early[element_id] = asyncio.create_task(self._run_element(self.elements[element_id]))
+        logger.debug(f"Started element {element_id} on a token stream")
+    
+    def _start_on_open_stream(self, element_id: str):
+        """Start an element now waiting only for an element that is still streaming to it."""
+        for upstream_id in self.plan.upstream[element_id]:
+            for conn_id, input_name, stream in self._open_streams.get(upstream_id, ()):
+                if conn_id == element_id:
+                    self._start_on_stream(conn_id, input_name, stream)
+                    return
+    
+    def _speculate(self, element_id: str):
+        """
+        Start an element speculatively if only branch decisions stand between it and running.
+        
+        An element qualifies when it has no side effects and every upstream
+        element it still waits for is either a branch controller (Case,
+        FlowSelect) or has already finished a speculative run, whose outputs
+        are passed in as inputs. The outputs are used only if the element
+        later runs with exactly the same inputs.
+        """
+        if (element_id in self._speculations or element_id in self._restored or element_id in self._early
+                or self._pending.get(element_id, 0) == 0 or len(self._speculations) >= self.max_speculative):
+            return
+        element = self.elements[element_id]
+        if element.controls_branches or not (element.side_effect_free or element.deterministic):
+            return
+        
+        inputs = dict(self.context.get_inputs(element_id))
+        for upstream_id in self.plan.upstream[element_id]:
+            if upstream_id in self._settled or upstream_id not in self._pending:
+                continue
+            if self.elements[upstream_id].controls_branches:
+                continue
+            upstream = self._speculations.get(upstream_id)
+            if upstream is None or not upstream.succeeded:
+                return
+            upstream_outputs = upstream.task.result()
+            for conn_id, output_name, input_name in self.plan.wiring[upstream_id]:
+                if conn_id == element_id and output_name in upstream_outputs:
+                    inputs[input_name] = upstream_outputs[output_name]
+        
+        input_key = make_input_key(self.plan.specs[element_id].config_hash, inputs)
+        if input_key is None:
+            return
+        
+        view = SpeculativeView(self, element_id, inputs)
+        speculation = Speculation(element_id, input_key, view,
+                                  asyncio.create_task(self._run_speculative(element, view)))
+        self._speculations[element_id] = speculation
+        self.speculation_stats.started += 1
+        speculation.task.add_done_callback(lambda task: self._speculation_finished(speculation))
+        logger.debug(f"Speculatively started element {element_id}")
+    
+    async def _run_speculative(self, element: ElementBase, view: SpeculativeView) -> Dict[str, Any]:
+        """Run an element against a speculative view of this executor."""
+        current_span.set(None)  # External time belongs to the span of the committed run, if any
+        return await wait_with_deadline(element.execute(view, False), element.timeout)
+    
+    def _speculation_finished(self, speculation: Speculation):
+        """Speculate further down the branch once a speculative run has outputs."""
+        if self._speculations.get(speculation.element_id) is not speculation or not speculation.succeeded:
+            return
+        for conn_id in self.plan.downstream[speculation.element_id]:
+            if conn_id in self._pending:
+                self._speculate(conn_id)
+    
+    async def _take_speculation(self, element: ElementBase) -> Optional[Dict[str, Any]]:
+        """Get the outputs of the element's speculative run, if it ran with the inputs it has now."""
+        speculation = self._speculations.pop(element.element_id, None)
+        if speculation is None:
+            return None
+        
+        input_key = make_input_key(self.plan.specs[element.element_id].config_hash,
+                                   self.context.get_inputs(element.element_id))
+        if input_key != speculation.input_key:
+            self._cancel_speculation(speculation)
+            return None
+        
+        # Wait for the run if it has not finished yet; it started ahead of time either way
+        try:
+            outputs = await speculation.task
+        except asyncio.CancelledError:
+            self.speculation_stats.discard(speculation)
+            raise
+        except Exception as e:
+            # Run the element again, so its failure is reported the usual way
+            logger.debug(f"Speculative run of {element.element_id} failed: {str(e)}")
+            self._cancel_speculation(speculation)
+            return None
+        
+        self.speculation_stats.commit(speculation)
+        for event_type, data in speculation.view.events:
+            await self._stream_event(event_type, data)
+        return outputs
+    
+    def _discard_speculation(self, element_id: str):
+        """Throw away the speculative run of an element that will not use it."""
+        speculation = self._speculations.pop(element_id, None)
+        if speculation is not None:
+            self._cancel_speculation(speculation)
+    
+    def _cancel_speculation(self, speculation: Speculation):
+        """Stop a speculative run and count its work as wasted."""
+        if speculation.task.done():
+            if not speculation.task.cancelled():
+                speculation.task.exception()  # Mark a failure as retrieved
+        else:
+            speculation.task.cancel()
+        self.speculation_stats.discard(speculation)
+        logger.debug(f"Discarded speculative run of element {speculation.element_id}")
+    
+    async def _checkpoint_element(self, element_id: str, outputs: Dict[str, Any]):
+        """Save a completed element to the checkpoint store, if there is one."""
+        if self.checkpoint is None:
+            return
+        # Saves are serialized so the branch flags stored last are also the latest
+        async with self._checkpoint_lock:
+            try:
+                await asyncio.to_thread(self.checkpoint.save_element, self.flow_id, element_id,
+                                        outputs, dict(self.context.downwards_execute))
+            except Exception as e:
+                logger.error(f"Failed to checkpoint element {element_id} of run {self.flow_id}: {str(e)}")
+    
+    async def _checkpoint_status(self, status: str, error: Optional[str] = None):
+        """Record the outcome of the run in the checkpoint store, if there is one."""
+        if self.checkpoint is None:
+            return
+        try:
+            await asyncio.to_thread(self.checkpoint.set_status, self.flow_id, status, error)
+        except Exception as e:
+            logger.error(f"Failed to record status of run {self.flow_id}: {str(e)}")
+    
+    async def _restore_element(self, element: ElementBase) -> Dict[str, Any]:
+        """Get the outputs of an element completed by an earlier attempt of this run."""
+        element_id = element.element_id
+        self.restored_elements.append(element_id)
+        outputs = self.context.get_outputs(element_id)
+        
+        restored_event = {
+            "flow_id": self.flow_id,
+            "element_id": element_id,
+            "element_type": element.element_type,
+            "element_name": element.name
+        }
+        if self.event_payloads.include_outputs:
+            restored_event["outputs"] = self.event_payloads.element_outputs(element_id, outputs)
+        await self._stream_event("element_restored", restored_event)
+        
+        return outputs
+    
+    def _input_key(self, element: ElementBase) -> Optional[str]:
+        """Get the key of an element's config and inputs, or None if its outputs cannot be reused."""
+        if element.deterministic:
+            if self.memo is None and self.session is None:
+                return None
+        elif element.session_ttl is None or self.session is None:
+            # Other elements are only reused within a session, for as long as they allow
+            return None
+        config_hash = self.plan.specs[element.element_id].config_hash
+        return make_input_key(config_hash, self.context.get_inputs(element.element_id))
+    
+    def _route_outputs(self, element_id: str, outputs: Dict[str, Any]):
+        """Copy an element's outputs into downstream inputs along the plan's wiring table."""
+        for conn_id, output_name, input_name in self.plan.wiring[element_id]:
+            if output_name in outputs:
+                self.context.set_input(conn_id, input_name, outputs[output_name])
+    
+    async def _execute_plan(self, max_parallelism: int = 1):
+        """
+        Execute the flow from a ready queue, starting each element once its dependencies have finished.
+        
+        The plan's dependency counts are decremented as elements finish, so
+        every element and edge is visited once and the stack depth does not
+        grow with the size of the flow. With ``max_parallelism`` above one,
+        independent branches run at the same time as separate tasks.
+        
+        An element runs when at least one upstream element has passed
+        execution down to it (see ``downwards_execute``); otherwise it is
+        skipped and its own downstream elements are released in turn.
+        Elements restored from a checkpoint release their stored outputs
+        without running again.
+        """
+        # Number of unfinished dependencies per element, and whether any
+        # finished dependency passed execution down to it
+        pending = dict(self.plan.dependency_counts)
+        live = dict.fromkeys(self.plan.run_order, False)
+        ready = deque(element_id for element_id in self.plan.run_order if pending[element_id] == 0)
+        self._ready_at = dict.fromkeys(ready, time.perf_counter())
+        self._pending = pending
+        
+        try:
+            if self.speculative:
+                for element_id in self.plan.run_order:
+                    self._speculate(element_id)
+            
+            if max_parallelism == 1:
+                while ready:
+                    element = self.elements[ready.popleft()]
+                    early = self._early.pop(element.element_id, None)
+                    if element.element_id in self._restored:
+                        outputs = await self._restore_element(element)
+                    elif early is not None:
+                        outputs = await early
+                    else:
+                        outputs = await self._run_element(element)
+                    self._release_downstream(element, outputs,
+                                             self.context.can_execute_downwards(element.element_id),
+                                             pending, live, ready)
+            else:
+                await self._execute_concurrently(max_parallelism, pending, live, ready)
+        finally:
+            # Elements started early on a stream that failed are stopped with the run
+            early = list(self._early.values())
+            self._early = {}
+            self._open_streams = {}
+            for task in early:
+                task.cancel()
+            if early:
+                await asyncio.gather(*early, return_exceptions=True)
+            
+            # Speculative runs still unclaimed belong to elements that never ran
+            self._pending = {}
+            speculations = list(self._speculations.values())
+            for element_id in list(self._speculations):
+                self._discard_speculation(element_id)
+            if speculations:
+                await asyncio.gather(*(speculation.task for speculation in speculations), return_exceptions=True)
+    
+    async def _execute_concurrently(self, max_parallelism: int, pending: Dict[str, int],
+                                    live: Dict[str, bool], ready: deque):
+        """Run ready elements as separate tasks, at most ``max_parallelism`` at a time."""
+        running: Dict[asyncio.Task, str] = {}
+        
+        try:
+            while ready or running:
+                while ready and len(running) < max_parallelism:
+                    element = self.elements[ready.popleft()]
+                    if element.element_id in self._restored:
+                        outputs = await self._restore_element(element)
+                        self._release_downstream(element, outputs,
+                                                 self.context.can_execute_downwards(element.element_id),
+                                                 pending, live, ready)
+                        continue
+                    task = self._early.pop(element.element_id, None) or asyncio.create_task(self._run_element(element))
+                    running[task] = element.element_id
+                if not running:
+                    continue
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    element = self.elements[running.pop(task)]
+                    outputs = task.result()
+                    self._release_downstream(element, outputs,
+                                             self.context.can_execute_downwards(element.element_id),
+                                             pending, live, ready)
+        finally:
+            # Stop sibling branches if one of them failed
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    def _release_downstream(self, element: ElementBase, outputs: Dict[str, Any], propagate: bool,
+                            pending: Dict[str, int], live: Dict[str, bool], ready: deque):
+        """Settle an element's outgoing edges and queue downstream elements whose dependencies are done."""
+        settled = [(element, outputs, propagate)]
+        while settled:
+            element, outputs, propagate = settled.pop()
+            self._settled.add(element.element_id)
+            self._open_streams.pop(element.element_id, None)
+            if propagate:
+                self._route_outputs(element.element_id, outputs)
+            
+            for conn_id in self.plan.downstream[element.element_id]:
+                if conn_id not in pending:
+                    continue
+                conn = self.elements[conn_id]
+                
+                if propagate:
+                    live[conn_id] = True
+                
+                pending[conn_id] -= 1
+                if pending[conn_id] == 0:
+                    if live[conn_id]:
+                        ready.append(conn_id)
+                        self._ready_at[conn_id] = time.perf_counter()
+                    else:
+                        # Nothing passed execution down to this element, so skip it
+                        logger.debug(f"Skipping element {conn_id}: no upstream element enabled it")
+                        self._discard_speculation(conn_id)
+                        settled.append((conn, {}, False))
+                else:
+                    if self._open_streams and pending[conn_id] == 1:
+                        self._start_on_open_stream(conn_id)
+                    if self.speculative:
+                        self._speculate(conn_id)
+    
     async def _stream_event(self, event_type: str, data: Dict[str, Any]):
         """Stream execution events to Backend 2."""
+        recording = recorded_events.get()
+        if recording is not None:
+            recording.append((event_type, data))
         if self.stream_manager:
             event = {
                 "type": event_type,
                 "timestamp": time.time(),
                 "data": data
             }
-            await self.stream_manager.send_message(json.dumps(event))
+            with serialization():
+                message = codec.dumps(event)
+            if self.event_batcher is not None:
+                await self.event_batcher.publish(message)
+            else:
+                await self.stream_manager.send_message(message)
             logger.debug(f"Streamed event: {event_type}")
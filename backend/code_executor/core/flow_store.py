@@ -0,0 +1,106 @@
+# core/flow_store.py
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from utils import codec
+
+class FlowStore:
+    """
+    SQLite store of registered flow definitions and their versions.
+
+    Registering a definition that differs from the flow's latest version
+    adds a new version; registering the same definition again returns the
+    existing one. Versions are never changed once written.
+
+    Methods block on SQLite; call them from a worker thread in async code.
+    """
+
+    def __init__(self, path: str = "flows.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS flows (
+                    flow_id TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    flow_hash TEXT NOT NULL,
+                    flow_definition TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (flow_id, version)
+                )
+            """)
+
+    def register(self, flow_id: str, flow_hash: str, flow_definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a flow definition as the flow's next version.
+
+        Returns the version's ``flow_id``, ``version``, ``flow_hash`` and
+        ``created_at``, and whether it was ``created`` or already the latest.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            latest = self._conn.execute(
+                "SELECT version, flow_hash, created_at FROM flows WHERE flow_id = ? ORDER BY version DESC LIMIT 1",
+                (flow_id,)
+            ).fetchone()
+            if latest is not None and latest[1] == flow_hash:
+                return {"flow_id": flow_id, "version": latest[0], "flow_hash": flow_hash,
+                        "created_at": latest[2], "created": False}
+
+            version = latest[0] + 1 if latest is not None else 1
+            self._conn.execute(
+                "INSERT INTO flows (flow_id, version, flow_hash, flow_definition, created_at) VALUES (?, ?, ?, ?, ?)",
+                (flow_id, version, flow_hash, codec.dumps(flow_definition, default=str), now)
+            )
+        return {"flow_id": flow_id, "version": version, "flow_hash": flow_hash, "created_at": now, "created": True}
+
+    def latest_version(self, flow_id: str) -> Optional[int]:
+        """Get the latest version of a flow, or None if it is not registered."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(version) FROM flows WHERE flow_id = ?", (flow_id,)).fetchone()
+        return row[0]
+
+    def get(self, flow_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Get a version of a flow, the latest by default, or None if it does not exist."""
+        with self._lock:
+            if version is None:
+                row = self._conn.execute(
+                    "SELECT version, flow_hash, flow_definition, created_at FROM flows WHERE flow_id = ? "
+                    "ORDER BY version DESC LIMIT 1",
+                    (flow_id,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT version, flow_hash, flow_definition, created_at FROM flows "
+                    "WHERE flow_id = ? AND version = ?",
+                    (flow_id, version)
+                ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "flow_id": flow_id,
+            "version": row[0],
+            "flow_hash": row[1],
+            "flow_definition": codec.loads(row[2]),
+            "created_at": row[3]
+        }
+
+    def versions(self, flow_id: str) -> List[Dict[str, Any]]:
+        """List the versions of a flow, oldest first, without their definitions."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, flow_hash, created_at FROM flows WHERE flow_id = ? ORDER BY version",
+                (flow_id,)
+            ).fetchall()
+        return [{"version": version, "flow_hash": flow_hash, "created_at": created_at}
+                for version, flow_hash, created_at in rows]
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
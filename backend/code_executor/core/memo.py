@@ -0,0 +1,42 @@
+# core/memo.py
+import hashlib
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from utils.cache import LRUCache
+from utils import codec
+
+def make_input_key(config_hash: str, inputs: Dict[str, Any]) -> Optional[str]:
+    """Build the key for an element's config and inputs, or None if the inputs cannot be hashed."""
+    try:
+        encoded = codec.canonical_dumps(inputs)
+    except (TypeError, ValueError):
+        # Inputs that are not plain JSON are never cached
+        return None
+    return f"{config_hash}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+class ElementMemo:
+    """
+    Cross-run cache of outputs from deterministic elements.
+    
+    Elements opt in by setting ``deterministic = True``. Their outputs are
+    cached by (element config hash, input hash), so repeated runs of the same
+    flow, or different flows using identically configured elements, skip the
+    work. The events an element sent while producing its outputs are cached
+    with them, so a cached run sends the same events. Cached outputs are
+    shared between runs and must not be mutated.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        self.cache = LRUCache(maxsize)
+    
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]:
+        """Get cached outputs and the events sent with them, as (event type, data) pairs."""
+        return self.cache.get(key)
+    
+    def put(self, key: str, outputs: Dict[str, Any], events: Iterable[Tuple[str, Dict[str, Any]]] = ()):
+        """Cache an element's outputs and the events it sent while producing them."""
+        self.cache.put(key, (outputs, list(events)))
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counters."""
+        return self.cache.stats()
@@ -0,0 +1,137 @@
+# core/optimizer.py
+from typing import Dict, Any, Callable, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+from .element_base import ElementBase
+from utils.logger import logger
+
+# How sure the pass is that an element executes
+RUNS = "runs"
+MAY_RUN = "may_run"
+SKIPPED = "skipped"
+
+def prune_static_branches(run_order: Tuple[str, ...],
+                          upstream: Mapping[str, Tuple[str, ...]],
+                          downstream: Mapping[str, Tuple[str, ...]],
+                          targets: Mapping[str, Tuple[str, ...]],
+                          wiring: Mapping[str, Tuple[Tuple[str, str, str], ...]],
+                          get_element: Callable[[str], ElementBase]) -> Tuple[Set[str], FrozenSet[str]]:
+    """
+    Find the elements of a run that can never execute.
+
+    Walks the run in topological order and mirrors the executor's rule: an
+    element executes when at least one finished upstream element passes
+    execution down to it. Branch decisions are evaluated ahead of time when
+    the controlling element's inputs only come from elements whose outputs
+    are known before the run (constants, and metadata without inputs).
+    Anything that cannot be decided is assumed to execute, so the result is
+    always a subset of what the executor would skip.
+
+    ``targets`` lists each element's downstream element ids once per
+    connection, the order branch flags index into. ``get_element`` returns
+    the element instance, unconnected; it is only called for elements that
+    may execute, so elements of pruned branches are never created.
+
+    Returns the unreachable element ids, and the ids of the elements whose
+    static evaluation assumed they receive no initial inputs.
+    """
+    incoming: Dict[str, List[Tuple[str, str, str]]] = {element_id: [] for element_id in run_order}
+    for producer_id, routes in wiring.items():
+        for consumer_id, output_name, input_name in routes:
+            incoming[consumer_id].append((producer_id, output_name, input_name))
+
+    status: Dict[str, str] = {}
+    propagates: Dict[str, Optional[bool]] = {}  # None when only known at run time
+    flag_sources: Dict[str, List[Tuple[str, Optional[bool]]]] = {}
+    known_outputs: Dict[str, Dict[str, Any]] = {}
+    assumed: Set[str] = set()
+
+    for element_id in run_order:
+        status[element_id] = _element_status(upstream[element_id], status, propagates)
+        if status[element_id] == SKIPPED:
+            propagates[element_id] = False
+            continue
+
+        element = get_element(element_id)
+        propagates[element_id] = _own_flag(element, flag_sources.get(element_id, ()), status)
+
+        if status[element_id] != RUNS or propagates[element_id] is not True:
+            # Branch flags of elements that may not run are not known to be set
+            if element.controls_branches:
+                for conn_id in downstream[element_id]:
+                    flag_sources.setdefault(conn_id, []).append((element_id, None))
+            continue
+
+        if not incoming[element_id]:
+            outputs = element.static_outputs()
+            if outputs is not None:
+                known_outputs[element_id] = outputs
+
+        if element.controls_branches:
+            inputs = _static_inputs(incoming[element_id], known_outputs)
+            # Flags index the element's connections, which list a downstream
+            # element once per connection, like they do at run time
+            conn_ids = targets[element_id]
+            flags = element.branch_flags(inputs, len(conn_ids))
+            if flags is not None and inputs is not None:
+                assumed.add(element_id)
+                assumed.update(producer_id for producer_id, _, _ in incoming[element_id])
+
+            if flags is None:
+                for conn_id in conn_ids:
+                    flag_sources.setdefault(conn_id, []).append((element_id, None))
+            else:
+                for index, flag in flags.items():
+                    if index < len(conn_ids):
+                        flag_sources.setdefault(conn_ids[index], []).append((element_id, bool(flag)))
+
+    unreachable = {element_id for element_id in run_order if status[element_id] == SKIPPED}
+    if unreachable:
+        logger.debug(f"Pruned unreachable elements: {sorted(unreachable)}")
+        return unreachable, frozenset(assumed)
+    return unreachable, frozenset()
+
+def _element_status(dependencies: Tuple[str, ...], status: Dict[str, str],
+                    propagates: Dict[str, Optional[bool]]) -> str:
+    """Decide whether an element executes from the state of its upstream elements."""
+    if not dependencies:
+        return RUNS
+
+    result = SKIPPED
+    for dep_id in dependencies:
+        if status[dep_id] == SKIPPED or propagates[dep_id] is False:
+            continue
+        if status[dep_id] == RUNS and propagates[dep_id] is True:
+            return RUNS
+        result = MAY_RUN
+    return result
+
+def _own_flag(element: ElementBase, sources, status: Dict[str, str]) -> Optional[bool]:
+    """Decide whether an element passes execution downstream, from the flags set on it."""
+    if not sources:
+        return True
+    if any(flag is None for _, flag in sources):
+        return None
+    if all(flag for _, flag in sources):
+        return True
+    if len(sources) > 1:
+        # Several elements set the flag; the last one to run wins
+        return None
+
+    controller_id, _ = sources[0]
+    if status[controller_id] != RUNS or element.controls_branches:
+        # A disabled branch element still sets flags by connection index,
+        # so keep its downstream elements
+        return None
+    return False
+
+def _static_inputs(routes: List[Tuple[str, str, str]],
+                   known_outputs: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Get an element's inputs if every route into it carries a value known before the run."""
+    inputs = {}
+    for producer_id, output_name, input_name in routes:
+        if producer_id not in known_outputs or input_name in inputs:
+            return None
+        outputs = known_outputs[producer_id]
+        if output_name in outputs:
+            inputs[input_name] = outputs[output_name]
+    return inputs
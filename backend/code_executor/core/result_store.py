@@ -0,0 +1,148 @@
+# core/result_store.py
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.logger import logger
+from utils import codec
+
+# Statuses of a job that has stopped for good
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+class ResultStore:
+    """
+    SQLite store of job runs: their status, result and event log.
+
+    Events are stored as the encoded JSON text they were streamed as, so
+    they can be served again without decoding them. Jobs not updated within
+    the TTL are no longer returned, and are deleted when a new job is
+    created.
+
+    Methods block on SQLite; call them from a worker thread in async code.
+    """
+
+    def __init__(self, path: str = "results.db", ttl: float = 86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    run_id TEXT PRIMARY KEY,
+                    flow_id TEXT,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    event_count INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    run_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    PRIMARY KEY (run_id, seq)
+                )
+            """)
+
+    def create_job(self, run_id: str, flow_id: str, status: str = "queued"):
+        """Record a new job, replacing an earlier one with the same run id, and drop expired jobs."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_events WHERE run_id = ?", (run_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (run_id, flow_id, status, result, error, event_count, "
+                "created_at, updated_at, finished_at) VALUES (?, ?, ?, NULL, NULL, 0, ?, ?, NULL)",
+                (run_id, flow_id, status, now, now)
+            )
+            self._expire(now)
+
+    def set_status(self, run_id: str, status: str):
+        """Update the status of a job that is still going."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE run_id = ?",
+                (status, time.time(), run_id)
+            )
+
+    def append_events(self, run_id: str, first_seq: int, events: List[str]):
+        """Append encoded events to a job's log, numbered from ``first_seq``."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_events (run_id, seq, event) VALUES (?, ?, ?)",
+                [(run_id, first_seq + offset, event) for offset, event in enumerate(events)]
+            )
+            self._conn.execute(
+                "UPDATE jobs SET event_count = ?, updated_at = ? WHERE run_id = ?",
+                (first_seq + len(events) - 1, time.time(), run_id)
+            )
+
+    def finish_job(self, run_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None):
+        """Record how a job ended, with its result if it completed."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, finished_at = ? WHERE run_id = ?",
+                (status, codec.dumps(result, default=str) if result is not None else None, error, now, now, run_id)
+            )
+
+    def get_job(self, run_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a job's status, and its result if asked, or None if it is unknown or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT flow_id, status, error, event_count, created_at, updated_at, finished_at"
+                + (", result" if include_result else "") + " FROM jobs WHERE run_id = ? AND updated_at >= ?",
+                (run_id, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "run_id": run_id,
+            "flow_id": row[0],
+            "status": row[1],
+            "error": row[2],
+            "event_count": row[3],
+            "created_at": row[4],
+            "updated_at": row[5],
+            "finished_at": row[6]
+        }
+        if include_result:
+            job["result"] = codec.loads(row[7]) if row[7] is not None else None
+        return job
+
+    def get_events(self, run_id: str, after: int = 0, until: Optional[int] = None,
+                   limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Get the encoded events of a job numbered after ``after``, up to ``until``, as (seq, event) pairs."""
+        query = ("SELECT seq, event FROM job_events WHERE run_id = ? AND seq > ? "
+                 "AND EXISTS (SELECT 1 FROM jobs WHERE jobs.run_id = job_events.run_id AND updated_at >= ?)")
+        params: List[Any] = [run_id, after, time.time() - self.ttl]
+        if until is not None:
+            query += " AND seq <= ?"
+            params.append(until)
+        query += " ORDER BY seq"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _expire(self, now: float):
+        """Drop jobs not updated within the TTL. Called with the lock held."""
+        cutoff = now - self.ttl
+        expired = self._conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,)).rowcount
+        if expired:
+            self._conn.execute("DELETE FROM job_events WHERE run_id NOT IN (SELECT run_id FROM jobs)")
+            logger.info(f"Dropped {expired} expired jobs")
@@ -0,0 +1,59 @@
+# core/session.py
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from utils.cache import LRUCache
+
+class SessionState:
+    """
+    Element outputs kept from the previous turns of one chat session.
+
+    Each record holds the key of the config and inputs an element last ran
+    with, its outputs, the events it sent while producing them and when they
+    were produced.
+    """
+
+    def __init__(self, flow_hash: str):
+        self.flow_hash = flow_hash
+        self.records: Dict[str, Tuple[str, Dict[str, Any], List[Tuple[str, Dict[str, Any]]], float]] = {}
+
+    def lookup(self, element_id: str, input_key: str,
+               ttl: Optional[float] = None) -> Optional[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]]:
+        """
+        Get an element's previous outputs and the events sent with them, as
+        (event type, data) pairs, if it last ran with the same inputs and
+        they have not expired.
+        """
+        record = self.records.get(element_id)
+        if record is None or record[0] != input_key:
+            return None
+        if ttl is not None and time.time() - record[3] > ttl:
+            return None
+        return record[1], record[2]
+
+    def record(self, element_id: str, input_key: str, outputs: Dict[str, Any],
+               events: Iterable[Tuple[str, Dict[str, Any]]] = ()):
+        """Remember the outputs an element produced in this turn and the events it sent while producing them."""
+        self.records[element_id] = (input_key, outputs, list(events), time.time())
+
+class SessionStore:
+    """Size-bounded store of chat session state, keyed by session id."""
+
+    def __init__(self, maxsize: int = 512):
+        self.cache = LRUCache(maxsize)
+
+    def get_session(self, session_id: str, flow_hash: str) -> SessionState:
+        """Get the state of a session, starting over if the session now runs a different flow."""
+        session = self.cache.get(session_id)
+        if session is None or session.flow_hash != flow_hash:
+            session = SessionState(flow_hash)
+            self.cache.put(session_id, session)
+        return session
+
+    def drop_session(self, session_id: str):
+        """Forget a session."""
+        self.cache.pop(session_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Get store size and hit/miss counters."""
+        return self.cache.stats()
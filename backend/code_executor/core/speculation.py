@@ -0,0 +1,91 @@
+# core/speculation.py
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from .context import ExecutionContext
+
+class SpeculativeView:
+    """
+    The executor as seen by an element running speculatively.
+
+    The element gets a context of its own holding a copy of its inputs, so
+    later writes by the run do not leak in, and its events are buffered
+    until the speculation is committed. Everything else is read from the
+    real executor.
+    """
+
+    def __init__(self, executor, element_id: str, inputs: Dict[str, Any]):
+        self._executor = executor
+        self.context = ExecutionContext()
+        self.context.inputs[element_id] = inputs
+        self.context.outputs = executor.context.outputs
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def _stream_event(self, event_type: str, data: Dict[str, Any]):
+        """Buffer an event until the speculation is committed."""
+        self.events.append((event_type, data))
+
+    def open_stream(self, element_id: str, output_name: str):
+        """Speculative runs never stream to downstream elements."""
+        return None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._executor, name)
+
+class Speculation:
+    """An element started before it was known whether, and with which inputs, it would run."""
+
+    def __init__(self, element_id: str, input_key: str, view: SpeculativeView, task: asyncio.Task):
+        self.element_id = element_id
+        self.input_key = input_key
+        self.view = view
+        self.task = task
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the speculative run finished with outputs."""
+        return self.task.done() and not self.task.cancelled() and self.task.exception() is None
+
+    def elapsed(self, until: Optional[float] = None) -> float:
+        """Seconds of work the speculation did before ``until``, or until now."""
+        end = until if until is not None else time.perf_counter()
+        if self.finished_at is not None:
+            end = min(end, self.finished_at)
+        return max(0.0, end - self.started_at)
+
+class SpeculationStats:
+    """What speculation gained and cost in one run."""
+
+    def __init__(self):
+        self.started = 0
+        self.committed = 0
+        self.wasted = 0
+        self.saved_time = 0.0  # Work done ahead of time by committed speculations
+        self.wasted_time = 0.0  # Work done by discarded speculations
+
+    def commit(self, speculation: Speculation):
+        """Count a speculation whose outputs were used."""
+        self.committed += 1
+        self.saved_time += speculation.elapsed()
+
+    def discard(self, speculation: Speculation):
+        """Count a speculation whose outputs were thrown away."""
+        self.wasted += 1
+        self.wasted_time += speculation.elapsed()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the counters, with times in milliseconds."""
+        return {
+            "started": self.started,
+            "committed": self.committed,
+            "wasted": self.wasted,
+            "saved_ms": round(self.saved_time * 1000, 3),
+            "wasted_ms": round(self.wasted_time * 1000, 3)
+        }
@@ -1,54 +1,124 @@
-# Flow Control
-from .flow_control.start import Start
-from .flow_control.end import End
-from .flow_control.case import Case
-from .flow_control.flow_select import FlowSelect
-
-# Inputs
-from .inputs.chat_input import ChatInput
-from .inputs.context_history import ContextHistory
-from .inputs.datablocks import Datablocks
-from .inputs.rest_api import RestAPI
-from .inputs.metadata import Metadata
-from .inputs.constants import Constants
-
-# Onchain
-from .onchain.read_blockchain_data import ReadBlockchainData
-from .onchain.build_transaction_json import BuildTransactionJSON
-
-# Util
-from .util.selector import Selector
-from .util.merger import Merger
-from .util.random_generator import RandomGenerator
-from .util.time_block import TimeBlock
-
-# AI
-from .ai.llm_text import LLMText
-from .ai.llm_structured import LLMStructured
-
-# Custom
-from .custom.custom import Custom
+import importlib
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
 
+from core.element_base import ElementBase
+from utils.logger import logger
+
+# Module and class of every element type. Modules are imported the first time
+# their type is used, so heavy dependencies (pandas, boto3, RestrictedPython,
+# psutil, pytz) are only loaded by flows that need them.
+ELEMENT_MODULES: Dict[str, Tuple[str, str]] = {
+    # Flow Control
+    "start": ("flow_control.start", "Start"),
+    "end": ("flow_control.end", "End"),
+    "case": ("flow_control.case", "Case"),
+    "flow_select": ("flow_control.flow_select", "FlowSelect"),
+    "map": ("flow_control.map", "Map"),
+
+    # Inputs
+    "chat_input": ("inputs.chat_input", "ChatInput"),
+    "context_history": ("inputs.context_history", "ContextHistory"),
+    "datablock": ("inputs.datablocks", "Datablocks"),
+    "rest_api": ("inputs.rest_api", "RestAPI"),
+    "metadata": ("inputs.metadata", "Metadata"),
+    "constants": ("inputs.constants", "Constants"),
+
+    # Onchain
+    "read_blockchain_data": ("onchain.read_blockchain_data", "ReadBlockchainData"),
+    "build_transaction_json": ("onchain.build_transaction_json", "BuildTransactionJSON"),
+
+    # Util
+    "selector": ("util.selector", "Selector"),
+    "merger": ("util.merger", "Merger"),
+    "random_generator": ("util.random_generator", "RandomGenerator"),
+    "time": ("util.time_block", "TimeBlock"),
+
+    # AI
+    "llm_text": ("ai.llm_text", "LLMText"),
+    "llm_structured": ("ai.llm_structured", "LLMStructured"),
+
+    # Custom
+    "custom": ("custom.custom", "Custom")
+}
+
+class LazyElementRegistry(MutableMapping):
+    """
+    Mapping of element types to their classes that imports element modules on first use.
+    
+    Membership checks and iteration never import anything. Classes can
+    also be registered directly, which takes precedence over the module table.
+    """
+    
+    def __init__(self, modules: Dict[str, Tuple[str, str]]):
+        self._modules = dict(modules)
+        self._classes: Dict[str, Type[ElementBase]] = {}
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, element_type: str) -> Type[ElementBase]:
+        element_class = self._classes.get(element_type)
+        if element_class is not None:
+            return element_class
+        if element_type not in self._modules:
+            raise KeyError(element_type)
+        
+        with self._lock:
+            element_class = self._classes.get(element_type)
+            if element_class is None:
+                module_name, class_name = self._modules[element_type]
+                start_time = time.perf_counter()
+                module = importlib.import_module(f".{module_name}", __name__)
+                element_class = self._classes[element_type] = getattr(module, class_name)
+                logger.debug(f"Loaded element type '{element_type}' in "
+                             f"{(time.perf_counter() - start_time) * 1000:.1f}ms")
+        return element_class
+    
+    def __setitem__(self, element_type: str, element_class: Type[ElementBase]):
+        self._classes[element_type] = element_class
+    
+    def __delitem__(self, element_type: str):
+        if element_type not in self:
+            raise KeyError(element_type)
+        self._classes.pop(element_type, None)
+        self._modules.pop(element_type, None)
+    
+    def __contains__(self, element_type: object) -> bool:
+        return element_type in self._classes or element_type in self._modules
+    
+    def __iter__(self) -> Iterator[str]:
+        yield from self._modules
+        yield from (element_type for element_type in self._classes if element_type not in self._modules)
+    
+    def __len__(self) -> int:
+        return len(self._modules.keys() | self._classes.keys())
+    
+    def loaded(self) -> List[str]:
+        """Get the element types whose classes are loaded."""
+        return list(self._classes)
+    
+    def prewarm(self, element_types: Optional[Iterable[str]] = None) -> List[str]:
+        """Import the given element types now, or all of them; types that cannot be loaded are skipped."""
+        loaded = []
+        for element_type in (element_types if element_types is not None else list(self)):
+            if element_type not in self:
+                logger.warning(f"Cannot prewarm unknown element type '{element_type}'")
+                continue
+            try:
+                self[element_type]
+            except ImportError as e:
+                logger.error(f"Cannot prewarm element type '{element_type}': {str(e)}")
+                continue
+            loaded.append(element_type)
+        return loaded
 
 # Registry of element types to their classes
-element_registry = {
-    "start": Start,
-    "end": End,
-    "case": Case,
-    "flow_select": FlowSelect,
-    "chat_input": ChatInput,
-    "context_history": ContextHistory,
-    "datablock": Datablocks,
-    "rest_api": RestAPI,
-    "metadata": Metadata,
-    "constants": Constants,
-    "read_blockchain_data": ReadBlockchainData,
-    "build_transaction_json": BuildTransactionJSON,
-    "selector": Selector,
-    "merger": Merger,
-    "random_generator": RandomGenerator,
-    "time": TimeBlock,
-    "llm_text": LLMText,
-    "llm_structured": LLMStructured,
-    "custom": Custom
-}
\ No newline at end of file
+element_registry = LazyElementRegistry(ELEMENT_MODULES)
+
+def __getattr__(name: str):
+    """Resolve element classes imported by name, e.g. ``from elements import Start``."""
+    for element_type, (_, class_name) in ELEMENT_MODULES.items():
+        if class_name == name:
+            return element_registry[element_type]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -30,15 +30,17 @@ class LLMStructured(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute LLM structured output generation."""
-        if not self.validate_inputs():
+        inputs = executor.context.get_inputs(self.element_id)
+        
+        if not self.validate_inputs(inputs):
             missing_inputs = [name for name, schema in self.input_schema.items() 
-                             if schema.get('required', False) and name not in self.inputs]
+                             if schema.get('required', False) and name not in inputs]
             raise ValueError(f"Missing required inputs for LLM Structured element: {missing_inputs}")
         
         # Get inputs
-        prompt = self.inputs.get("prompt", "")
-        context = self.inputs.get("context", [])
-        additional_data = self.inputs.get("additional_data", {})
+        prompt = inputs.get("prompt", "")
+        context = inputs.get("context", [])
+        additional_data = inputs.get("additional_data", {})
         
         # Format the complete prompt
         formatted_prompt = self._format_prompt(prompt, context, additional_data)
@@ -100,7 +102,7 @@ class LLMStructured(ElementBase):
                     structured_output = recovered_output
             
             # Set output based on structured result
-            self.outputs = structured_output
+            outputs = structured_output
             
             # Stream structured result
             await executor._stream_event("llm_structured_result", {
@@ -117,12 +119,12 @@ class LLMStructured(ElementBase):
             raise
         
         # Validate output
-        if not self.validate_outputs():
+        if not self.validate_outputs(outputs):
             missing_outputs = [name for name, schema in self.output_schema.items() 
-                              if schema.get('required', False) and name not in self.outputs]
+                              if schema.get('required', False) and name not in outputs]
             raise ValueError(f"LLM structured output does not match required schema. Missing: {missing_outputs}")
         
-        return self.outputs
+        return outputs
     
     def _format_prompt(self, prompt: str, context: List[str], additional_data: Dict[str, Any]) -> str:
         """Format the complete prompt for structured generation."""
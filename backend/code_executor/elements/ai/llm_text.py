@@ -28,15 +28,17 @@ class LLMText(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute LLM text generation."""
-        if not self.validate_inputs():
+        inputs = executor.context.get_inputs(self.element_id)
+        
+        if not self.validate_inputs(inputs):
             missing_inputs = [name for name, schema in self.input_schema.items() 
-                             if schema.get('required', False) and name not in self.inputs]
+                             if schema.get('required', False) and name not in inputs]
             raise ValueError(f"Missing required inputs for LLM Text element: {missing_inputs}")
         
         # Get inputs
-        prompt = self.inputs.get("prompt", "")
-        context = self.inputs.get("context", [])
-        additional_data = self.inputs.get("additional_data", {})
+        prompt = inputs.get("prompt", "")
+        context = inputs.get("context", [])
+        additional_data = inputs.get("additional_data", {})
         
         # Format the prompt with wrapper and context
         formatted_prompt = self._format_prompt(prompt, context, additional_data)
@@ -59,10 +61,14 @@ class LLMText(ElementBase):
             model_id=self.model
         )
         
-        # Stream the generation to Backend 2
+        # Stream the generation to Backend 2, and to downstream elements that
+        # read the output as it is produced
         llm_output = ""
+        stream = executor.open_stream(self.element_id, "llm_output")
         
-        if executor.stream_manager:
+        if executor.stream_manager or stream is not None:
+            # An element downstream already sends the text to the client as it arrives
+            send_chunks = stream is None or not stream.forwarded
             metadata = {
                 "element_id": self.element_id,
                 "element_type": self.element_type,
@@ -78,14 +84,24 @@ class LLMText(ElementBase):
             )
             
             # Accumulate output while streaming chunks
-            async for chunk in chunk_generator:
-                llm_output += chunk
-                # Stream each chunk with metadata
-                await executor._stream_event("llm_chunk", {
-                    "element_id": self.element_id,
-                    "content": chunk,
-                    "metadata": metadata
-                })
+            try:
+                async for chunk in chunk_generator:
+                    llm_output += chunk
+                    if stream is not None:
+                        stream.append(chunk)
+                    # Stream each chunk with metadata
+                    if send_chunks:
+                        await executor._stream_event("llm_chunk", {
+                            "element_id": self.element_id,
+                            "content": chunk,
+                            "metadata": metadata
+                        })
+            except BaseException as e:
+                if stream is not None:
+                    stream.fail(e)
+                raise
+            if stream is not None:
+                stream.close()
         else:
             # Non-streaming generation (fallback)
             logger.warning("No stream manager available, using non-streaming LLM generation")
@@ -96,15 +112,15 @@ class LLMText(ElementBase):
             )
         
         # Set output
-        self.outputs = {"llm_output": llm_output}
+        outputs = {"llm_output": llm_output}
         
         # Validate output
-        if not self.validate_outputs():
+        if not self.validate_outputs(outputs):
             missing_outputs = [name for name, schema in self.output_schema.items() 
-                              if schema.get('required', False) and name not in self.outputs]
+                              if schema.get('required', False) and name not in outputs]
             raise ValueError(f"LLM output does not match required schema. Missing: {missing_outputs}")
         
-        return self.outputs
+        return outputs
     
     def _format_prompt(self, prompt: str, context: List[str], additional_data: Dict[str, Any]) -> str:
         """Format the prompt with wrapper, context, and additional data."""
@@ -1,6 +1,8 @@
 # elements/custom/custom.py
 from typing import Dict, Any, Optional
+import asyncio
 import multiprocessing
+import threading
 import time
 import psutil
 import traceback
@@ -31,11 +33,13 @@ class Custom(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the custom element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing custom element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for custom element: {validation_result['error']}"
             logger.error(error_msg)
@@ -62,14 +66,22 @@ class Custom(ElementBase):
         })
         
         try:
-            # Execute the custom code with restrictions
-            result = self._execute_restricted_code(
-                self.inputs,
-                self.hyperparameters,
-                self.constants,
-                max_memory_mb,
-                max_cpu_seconds
-            )
+            # Execute the custom code with restrictions in a worker thread, so the
+            # event loop keeps running; cancelling the element stops the sandbox
+            cancel_event = threading.Event()
+            try:
+                result = await asyncio.to_thread(
+                    self._execute_restricted_code,
+                    inputs,
+                    self.hyperparameters,
+                    self.constants,
+                    max_memory_mb,
+                    max_cpu_seconds,
+                    cancel_event
+                )
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
             
             # Check result status
             if result["status"] == "error":
@@ -84,10 +96,10 @@ class Custom(ElementBase):
                 raise ValueError(f"Custom code execution failed: {error_msg}")
             
             # Set outputs
-            self.outputs = result["output"]
+            outputs = result["output"]
             
             # Validate outputs
-            validation_result = validate_outputs(self.outputs, self.output_schema)
+            validation_result = validate_outputs(outputs, self.output_schema)
             if not validation_result["valid"]:
                 error_msg = f"Invalid outputs from custom code: {validation_result['error']}"
                 logger.error(error_msg)
@@ -102,10 +114,10 @@ class Custom(ElementBase):
             # Stream code execution completion
             await executor._stream_event("custom_code_complete", {
                 "element_id": self.element_id,
-                "output_preview": str(self.outputs)[:1000] + ("..." if len(str(self.outputs)) > 1000 else "")
+                "output_preview": str(outputs)[:1000] + ("..." if len(str(outputs)) > 1000 else "")
             })
             
-            return self.outputs
+            return outputs
             
         except Exception as e:
             error_msg = f"Error executing custom code: {str(e)}"
@@ -124,7 +136,8 @@ class Custom(ElementBase):
                                hyperparameters: Dict[str, Any],
                                constants: Dict[str, Any],
                                max_memory_mb: int,
-                               max_cpu_seconds: int) -> Dict[str, Any]:
+                               max_cpu_seconds: int,
+                               cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
         """
         Execute code with restrictions on I/O, memory, and CPU time.
         
@@ -134,6 +147,7 @@ class Custom(ElementBase):
             constants: Constants dictionary
             max_memory_mb: Maximum memory in MB
             max_cpu_seconds: Maximum CPU time in seconds
+            cancel_event: Optional event that stops the sandbox process when set
         
         Returns:
             Dict with status and output or error message
@@ -198,6 +212,14 @@ class Custom(ElementBase):
         while time.time() - start_time < max_cpu_seconds:
             if not process.is_alive():
                 break
+            
+            if cancel_event is not None and cancel_event.is_set():
+                process.terminate()
+                return {
+                    "status": "error", 
+                    "message": "Execution cancelled",
+                    "output": {}
+                }
                 
             try:
                 p = psutil.Process(process.pid)
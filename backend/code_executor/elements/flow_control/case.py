@@ -9,6 +9,8 @@ from utils.validators import validate_inputs
 class Case(ElementBase):
     """Case element for conditional flow control."""
     
+    controls_branches = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  cases: List[Dict[str, Any]] = None):
@@ -35,20 +37,37 @@ class Case(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the case element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing case element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for case element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get variables from inputs
-        variables = self.inputs.get("variables", {})
+        variables = inputs.get("variables", {})
         
         # Evaluate each case
+        results = self.evaluate(variables)
+        
+        # Set outputs
+        outputs = {"result": results}
+        
+        # Set up flow branching based on case results; a False case stops
+        # the corresponding downstream flow from executing further
+        for index, flag in self._flags_for(results).items():
+            if index < len(self.connections):
+                executor.context.set_downwards_execute(self.connections[index].element_id, flag)
+        
+        return outputs
+    
+    def evaluate(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate every case against the given variables."""
         results = {}
         for case in self.cases:
             case_id = list(case.keys())[0]
@@ -90,24 +109,25 @@ class Case(ElementBase):
                 logger.error(f"Error evaluating case '{case_id}': {str(e)}")
                 results[case_id] = False
         
-        # Set outputs
-        self.outputs = {"result": results}
+        return results
+    
+    def branch_flags(self, inputs: Optional[Dict[str, Any]], connection_count: int) -> Optional[Dict[int, bool]]:
+        """Get the flags for statically known inputs."""
+        if inputs is None:
+            return None
+        return self._flags_for(self.evaluate(inputs.get("variables", {})))
+    
+    def _flags_for(self, results: Dict[str, Any]) -> Dict[int, bool]:
+        """
+        Map case results to downwards_execute flags by connection index.
         
-        # Set up flow branching based on case results
-        for case_id, result in results.items():
-            # If a case is False, mark corresponding downstream flow as not to be executed
+        Note: This assumes connections are ordered to match cases. For proper
+        implementation, connections would need to be tagged with case IDs.
+        Only False cases set a flag; the others leave their flow enabled.
+        """
+        flags = {}
+        for index, case in enumerate(self.cases):
+            result = results.get(list(case.keys())[0])
             if not result:
-                # Note: This assumes connections are ordered to match cases
-                # For proper implementation, connections would need to be tagged with case IDs
-                # Here we're using a simple approximation
-                for i, conn in enumerate(self.connections):
-                    case_match = False
-                    for j, case in enumerate(self.cases):
-                        if list(case.keys())[0] == case_id and i == j:
-                            case_match = True
-                            break
-                    
-                    if case_match:
-                        conn.downwards_execute = result
-        
-        return self.outputs
+                flags[index] = result
+        return flags
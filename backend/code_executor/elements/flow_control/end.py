@@ -4,10 +4,14 @@ from typing import Dict, Any, Optional
 from core.element_base import ElementBase
 from utils.logger import logger
 from utils.validators import validate_inputs
+from utils.token_stream import TokenStream
 
 class End(ElementBase):
     """End element for flow execution."""
     
+    accepts_streams = True
+    forwards_streams = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any]):
         super().__init__(
@@ -21,33 +25,50 @@ class End(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the end element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing end element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for end element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Process inputs
-        text_output = self.inputs.get("text_input")
-        proposed_transaction = self.inputs.get("proposed_transaction")
+        text_output = inputs.get("text_input")
+        proposed_transaction = inputs.get("proposed_transaction")
+        
+        # Forward streamed text to Backend 2 as it arrives
+        streamed = isinstance(text_output, TokenStream)
+        if streamed:
+            async for chunk in text_output:
+                await executor._stream_event("final_output_chunk", {
+                    "flow_id": executor.flow_id,
+                    "element_id": self.element_id,
+                    "content": chunk
+                })
+            text_output = "".join(text_output.chunks)
         
         # Set outputs
-        self.outputs = {
+        outputs = {
             "text_output": text_output,
             "proposed_transaction": proposed_transaction
         }
         
-        # Stream final output to Backend 2
-        await executor._stream_event("final_output", {
+        # Stream final output to Backend 2; streamed text was already sent in chunks
+        final_output = {
             "flow_id": executor.flow_id,
             "text_output": text_output,
             "proposed_transaction": proposed_transaction
-        })
+        }
+        if streamed:
+            del final_output["text_output"]
+            final_output["streamed"] = True
+        await executor._stream_event("final_output", final_output)
         
         # End element marks the end of flow execution
         # The flow executor will handle finishing the flow
-        return self.outputs
+        return outputs
@@ -7,6 +7,8 @@ from utils.logger import logger
 class FlowSelect(ElementBase):
     """Flow Select element for choosing between multiple flow paths."""
     
+    controls_branches = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  flows_to_switch: List[str] = None):
@@ -22,18 +24,20 @@ class FlowSelect(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the flow select element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing flow select element: {self.name} ({self.element_id})")
         
         # If there are no flows to switch between, just pass through
         if not self.flows_to_switch or not self.connections:
             # Just forward the first input as output
-            if self.inputs:
-                first_input_key = next(iter(self.inputs))
-                self.outputs = {first_input_key: self.inputs[first_input_key]}
+            if inputs:
+                first_input_key = next(iter(inputs))
+                outputs = {first_input_key: inputs[first_input_key]}
             else:
-                self.outputs = {}
-            return self.outputs
+                outputs = {}
+            return outputs
         
         # Get the connections that correspond to the flows_to_switch
         flow_connections = {}
@@ -44,15 +48,15 @@ class FlowSelect(ElementBase):
         
         # Default: disable all flows
         for conn in self.connections:
-            conn.downwards_execute = False
+            executor.context.set_downwards_execute(conn.element_id, False)
         
         # Find the first flow that is executable (not marked as non-executable)
         chosen_flow = None
         for flow_id, conn in flow_connections.items():
-            if not hasattr(conn, 'downwards_execute') or conn.downwards_execute:
+            if executor.context.can_execute_downwards(conn.element_id):
                 chosen_flow = flow_id
                 # Enable only this flow
-                conn.downwards_execute = True
+                executor.context.set_downwards_execute(conn.element_id, True)
                 # Log the selected flow
                 logger.info(f"Flow select element chose flow: {flow_id}")
                 break
@@ -61,14 +65,25 @@ class FlowSelect(ElementBase):
         if not chosen_flow and self.flows_to_switch and flow_connections:
             first_flow = self.flows_to_switch[0]
             if first_flow in flow_connections:
-                flow_connections[first_flow].downwards_execute = True
+                executor.context.set_downwards_execute(flow_connections[first_flow].element_id, True)
                 chosen_flow = first_flow
                 logger.info(f"Flow select element defaulted to first flow: {first_flow}")
         
         # Set output to input (flow select just selects which downstream path to execute)
-        self.outputs = self.inputs.copy()
+        outputs = inputs.copy()
         
         # Add the chosen flow to outputs
-        self.outputs["chosen_flow"] = chosen_flow
+        outputs["chosen_flow"] = chosen_flow
+        
+        return outputs
+    
+    def branch_flags(self, inputs: Optional[Dict[str, Any]], connection_count: int) -> Optional[Dict[int, bool]]:
+        """
+        Get the flags set by execute, which do not depend on inputs.
         
-        return self.outputs
+        execute disables every flow before looking for an enabled one, so it
+        always falls back to the first flow.
+        """
+        if not self.flows_to_switch:
+            return {}
+        return {index: index == 0 for index in range(connection_count)}
@@ -0,0 +1,141 @@
+# elements/flow_control/map.py
+import asyncio
+import json
+from typing import Dict, Any, List, Optional
+
+from core.element_base import ElementBase
+from core.executor import FlowExecutor
+from utils.logger import logger
+
+class Map(ElementBase):
+    """Map element for running a nested flow on every item of a list."""
+    
+    subflow_field = "flow"
+    
+    def __init__(self, element_id: str, name: str, description: str,
+                 input_schema: Dict[str, Any], output_schema: Dict[str, Any],
+                 flow: Dict[str, Any] = None, item_element_id: Optional[str] = None,
+                 item_input: str = "item", index_input: Optional[str] = None,
+                 output_element_id: Optional[str] = None,
+                 output_name: Optional[str] = None, max_concurrency: int = 4,
+                 on_error: str = "fail"):
+        super().__init__(
+            element_id=element_id,
+            name=name,
+            element_type="map",
+            description=description,
+            input_schema=input_schema,
+            output_schema=output_schema
+        )
+        self.item_element_id = item_element_id
+        self.item_input = item_input
+        self.index_input = index_input
+        self.output_element_id = output_element_id
+        self.output_name = output_name
+        self.max_concurrency = max(1, int(max_concurrency))
+        if on_error not in ("fail", "skip"):
+            raise ValueError(f"Invalid on_error for map element: {on_error}")
+        self.on_error = on_error
+    
+    async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
+        """Execute the map element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
+        # Log execution
+        logger.info(f"Executing map element: {self.name} ({self.element_id})")
+        
+        items = self._get_items(inputs.get("items"))
+        results: List[Any] = [None] * len(items)
+        errors: List[Dict[str, Any]] = []
+        
+        # Nested runs share the memo but not the session or checkpoints of the parent run
+        config = dict(executor.config)
+        config.pop("session_id", None)
+        config["enable_checkpoints"] = False
+        
+        max_concurrency = min(self.max_concurrency, int(config.get("map_max_concurrency", 8)))
+        remaining = iter(range(len(items)))
+        completed = 0
+        
+        async def worker():
+            nonlocal completed
+            # Workers take the next index from the shared iterator, so at most
+            # max_concurrency items run at a time whatever the list length
+            for index in remaining:
+                try:
+                    results[index] = await self._run_item(executor, config, index, items[index])
+                except Exception as e:
+                    if self.on_error == "fail":
+                        raise ValueError(f"Map item {index} failed: {str(e)}")
+                    errors.append({"index": index, "error": str(e)})
+                    logger.warning(f"Map item {index} of {self.element_id} failed: {str(e)}")
+                
+                completed += 1
+                await executor._stream_event("map_progress", {
+                    "flow_id": executor.flow_id,
+                    "element_id": self.element_id,
+                    "index": index,
+                    "completed": completed,
+                    "total": len(items)
+                })
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(items)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # Stop the other items if one of them failed or the run was cancelled
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        errors.sort(key=lambda error: error["index"])
+        return {
+            "results": results,
+            "errors": errors,
+            "count": len(items)
+        }
+    
+    def check_subflow(self):
+        """Check that the item and output elements are in the nested flow."""
+        for field in ("item_element_id", "output_element_id"):
+            element_id = getattr(self, field)
+            if element_id is not None and element_id not in self.subflow.specs:
+                raise ValueError(f"{field} '{element_id}' is not an element of the nested flow")
+    
+    async def _run_item(self, executor, config: Dict[str, Any], index: int, item: Any) -> Any:
+        """Run the nested flow on one item and get its result."""
+        item_element_id = self.item_element_id or self.subflow.start_element_id
+        child = FlowExecutor(self.subflow, stream_manager=None, config=config, memo=executor.memo)
+        item_inputs = {self.item_input: item}
+        if self.index_input is not None:
+            item_inputs[self.index_input] = index
+        result = await child.execute_flow({item_element_id: item_inputs})
+        
+        outputs = result["element_outputs"].get(self._output_element_id(), {})
+        if self.output_name is not None:
+            return outputs.get(self.output_name)
+        return outputs
+    
+    def _output_element_id(self) -> str:
+        """Get the nested element whose outputs are collected: the one given, the End element, or the start."""
+        if self.output_element_id:
+            return self.output_element_id
+        for element_id, spec in self.subflow.specs.items():
+            if spec.element_type == "end":
+                return element_id
+        return self.subflow.start_element_id
+    
+    def _get_items(self, items: Any) -> List[Any]:
+        """Get the list to map over from the items input."""
+        if items is None:
+            return []
+        if isinstance(items, str):
+            try:
+                items = json.loads(items)
+            except json.JSONDecodeError:
+                raise ValueError("Map element items must be a list or a JSON array")
+        if isinstance(items, dict):
+            return list(items.values())
+        if not isinstance(items, (list, tuple)):
+            raise ValueError(f"Map element items must be a list, got {type(items).__name__}")
+        return list(items)
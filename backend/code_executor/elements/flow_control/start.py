@@ -20,11 +20,13 @@ class Start(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the start element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing start element: {self.name} ({self.element_id})")
         
         # Start doesn't do much, just passes its inputs as outputs
-        self.outputs = self.inputs.copy()
+        outputs = inputs.copy()
         
         # Return the outputs
-        return self.outputs
+        return outputs
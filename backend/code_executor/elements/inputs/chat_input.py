@@ -20,18 +20,20 @@ class ChatInput(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the chat input element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing chat input element: {self.name} ({self.element_id})")
         
         # Chat input should already be provided in the initial inputs
-        chat_input = self.inputs.get("chat_input")
+        chat_input = inputs.get("chat_input")
         
         if not chat_input:
             logger.warning(f"No chat input provided to element {self.element_id}")
             chat_input = ""  # Default to empty string
         
         # Set output to the same chat input
-        self.outputs = {"chat_input": chat_input}
+        outputs = {"chat_input": chat_input}
         
         # Stream the chat input to the flow
         await executor._stream_event("chat_input", {
@@ -39,4 +41,4 @@ class ChatInput(ElementBase):
             "chat_input": chat_input
         })
         
-        return self.outputs
+        return outputs
@@ -9,6 +9,8 @@ from utils.validators import coerce_value
 class Constants(ElementBase):
     """Constants element for providing fixed values."""
     
+    deterministic = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  data_type: str = "string", data: Any = None):
@@ -33,7 +35,7 @@ class Constants(ElementBase):
             processed_data = self._process_data()
             
             # Set output to the processed data
-            self.outputs = {"data": processed_data}
+            outputs = {"data": processed_data}
             
             # Stream the constant information
             data_preview = str(processed_data)
@@ -46,20 +48,27 @@ class Constants(ElementBase):
                 "data_preview": data_preview
             })
             
-            return self.outputs
+            return outputs
             
         except Exception as e:
             logger.error(f"Error processing constant in element {self.element_id}: {str(e)}")
             # Return default value for the type
             default_value = self._get_default_for_type()
-            self.outputs = {"data": default_value}
+            outputs = {"data": default_value}
             
             await executor._stream_event("constant_error", {
                 "element_id": self.element_id,
                 "error": str(e)
             })
             
-            return self.outputs
+            return outputs
+    
+    def static_outputs(self) -> Optional[Dict[str, Any]]:
+        """Constants do not read inputs, so their outputs are always known before the run."""
+        try:
+            return {"data": self._process_data()}
+        except Exception:
+            return {"data": self._get_default_for_type()}
     
     def _process_data(self) -> Any:
         """Process the data based on the specified type."""
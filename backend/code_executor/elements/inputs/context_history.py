@@ -7,6 +7,8 @@ from utils.logger import logger
 class ContextHistory(ElementBase):
     """Context History element for providing conversation context."""
     
+    deterministic = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any]):
         super().__init__(
@@ -20,11 +22,13 @@ class ContextHistory(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the context history element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing context history element: {self.name} ({self.element_id})")
         
         # Get context history from inputs
-        context_history = self.inputs.get("context_history", [])
+        context_history = inputs.get("context_history", [])
         
         # Ensure it's a list
         if not isinstance(context_history, list):
@@ -35,7 +39,7 @@ class ContextHistory(ElementBase):
                 context_history = []
         
         # Set output to the context history
-        self.outputs = {"context_history": context_history}
+        outputs = {"context_history": context_history}
         
         # Stream the context history to provide visibility
         await executor._stream_event("context_history", {
@@ -43,4 +47,4 @@ class ContextHistory(ElementBase):
             "context_history": context_history
         })
         
-        return self.outputs
+        return outputs
@@ -10,6 +10,8 @@ from utils.logger import logger
 class Datablocks(ElementBase):
     """Datablocks element for providing constant data (JSON or CSV)."""
     
+    deterministic = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  data_type: str = "json", data: Any = None):
@@ -60,7 +62,7 @@ class Datablocks(ElementBase):
                 processed_data = self.data
             
             # Set output to the processed data
-            self.outputs = {"data": processed_data}
+            outputs = {"data": processed_data}
             
             # Stream the datablock information
             data_preview = str(processed_data)
@@ -73,10 +75,10 @@ class Datablocks(ElementBase):
                 "data_preview": data_preview
             })
             
-            return self.outputs
+            return outputs
             
         except Exception as e:
             logger.error(f"Error processing datablock in element {self.element_id}: {str(e)}")
             # Return empty data on error
-            self.outputs = {"data": {} if self.data_type == "json" else []}
-            return self.outputs
+            outputs = {"data": {} if self.data_type == "json" else []}
+            return outputs
@@ -7,6 +7,8 @@ from utils.logger import logger
 class Metadata(ElementBase):
     """Metadata element for providing user and environment metadata."""
     
+    deterministic = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  data: Optional[Dict[str, Any]] = None):
@@ -22,9 +24,31 @@ class Metadata(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the metadata element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing metadata element: {self.name} ({self.element_id})")
         
+        metadata = self._build_metadata(inputs)
+        
+        # Set output
+        outputs = metadata
+        
+        # Stream metadata information
+        safe_metadata = self._redact_sensitive_data(metadata)
+        await executor._stream_event("metadata", {
+            "element_id": self.element_id,
+            "metadata": safe_metadata
+        })
+        
+        return outputs
+    
+    def static_outputs(self) -> Optional[Dict[str, Any]]:
+        """Metadata without inputs is the configured data plus schema defaults."""
+        return self._build_metadata({})
+    
+    def _build_metadata(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine the configured metadata, explicit inputs and schema defaults."""
         # Get the configured metadata
         metadata = self.data.copy()
         
@@ -36,8 +60,8 @@ class Metadata(ElementBase):
                 command = schema["option"][0]  # Default to first option
         
         # Override with explicit inputs if any
-        if self.inputs:
-            metadata.update(self.inputs)
+        if inputs:
+            metadata.update(inputs)
         
         # Add default values for required fields if not present
         for key, schema in self.output_schema.items():
@@ -48,17 +72,7 @@ class Metadata(ElementBase):
         if command is not None and "command" not in metadata:
             metadata["command"] = command
         
-        # Set output
-        self.outputs = metadata
-        
-        # Stream metadata information
-        safe_metadata = self._redact_sensitive_data(metadata)
-        await executor._stream_event("metadata", {
-            "element_id": self.element_id,
-            "metadata": safe_metadata
-        })
-        
-        return self.outputs
+        return metadata
     
     def _redact_sensitive_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Redact sensitive data like wallet addresses and tokens."""
@@ -7,6 +7,7 @@ import asyncio
 from core.element_base import ElementBase
 from utils.logger import logger
 from utils.validators import validate_inputs
+from utils.profiling import external_call
 
 class RestAPI(ElementBase):
     """REST API element for making HTTP requests to external APIs."""
@@ -25,6 +26,7 @@ class RestAPI(ElementBase):
         )
         self.url = url
         self.method = method.upper()
+        self.side_effect_free = self.method == "GET"  # Only reads may run speculatively
         self.headers = headers or {}
         self.api_key = api_key
         
@@ -34,18 +36,20 @@ class RestAPI(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the REST API element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing REST API element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for REST API element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get params from input
-        params = self.inputs.get("params", {})
+        params = inputs.get("params", {})
         
         # Stream API request info
         safe_params = self._redact_sensitive_data(params)
@@ -62,16 +66,17 @@ class RestAPI(ElementBase):
         try:
             # Make the request
             async with httpx.AsyncClient(timeout=30.0) as client:
-                if self.method == "GET":
-                    response = await client.get(self.url, headers=self.headers, params=params)
-                elif self.method == "POST":
-                    response = await client.post(self.url, headers=self.headers, json=params)
-                elif self.method == "PUT":
-                    response = await client.put(self.url, headers=self.headers, json=params)
-                elif self.method == "DELETE":
-                    response = await client.delete(self.url, headers=self.headers, params=params)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {self.method}")
+                async with external_call("http"):
+                    if self.method == "GET":
+                        response = await client.get(self.url, headers=self.headers, params=params)
+                    elif self.method == "POST":
+                        response = await client.post(self.url, headers=self.headers, json=params)
+                    elif self.method == "PUT":
+                        response = await client.put(self.url, headers=self.headers, json=params)
+                    elif self.method == "DELETE":
+                        response = await client.delete(self.url, headers=self.headers, params=params)
+                    else:
+                        raise ValueError(f"Unsupported HTTP method: {self.method}")
                 
                 # Check for errors
                 response.raise_for_status()
@@ -84,7 +89,7 @@ class RestAPI(ElementBase):
                     data = {"text": response.text}
                 
                 # Set output to the response data
-                self.outputs = {"data": data}
+                outputs = {"data": data}
                 
                 # Stream response info
                 await executor._stream_event("api_response", {
@@ -93,7 +98,7 @@ class RestAPI(ElementBase):
                     "response_preview": str(data)[:1000] + ("..." if len(str(data)) > 1000 else "")
                 })
                 
-                return self.outputs
+                return outputs
                 
         except httpx.HTTPStatusError as e:
             error_msg = f"HTTP error {e.response.status_code} from API: {e.response.text}"
@@ -107,13 +112,13 @@ class RestAPI(ElementBase):
             })
             
             # Return error data
-            self.outputs = {
+            outputs = {
                 "data": {
                     "error": error_msg,
                     "status_code": e.response.status_code
                 }
             }
-            return self.outputs
+            return outputs
             
         except Exception as e:
             error_msg = f"Error making API request: {str(e)}"
@@ -126,12 +131,12 @@ class RestAPI(ElementBase):
             })
             
             # Return error data
-            self.outputs = {
+            outputs = {
                 "data": {
                     "error": error_msg
                 }
             }
-            return self.outputs
+            return outputs
     
     def _redact_sensitive_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Redact sensitive data like API keys and tokens."""
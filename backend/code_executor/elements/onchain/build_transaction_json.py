@@ -29,6 +29,8 @@ class BuildTransactionJSON(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the build transaction JSON element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing build transaction JSON element: {self.name} ({self.element_id})")
         
@@ -43,22 +45,21 @@ class BuildTransactionJSON(ElementBase):
             raise ValueError(error_msg)
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for build transaction JSON element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get node URL from config if not specified
-        if not self.node_url:
-            self.node_url = executor.config.get("aptos_node_url", "https://testnet.aptoslabs.com")
+        node_url = self.node_url or executor.config.get("aptos_node_url", "https://testnet.aptoslabs.com")
         
         # Get sender address
         sender = executor.config.get("aptos_sender_address")
         if not sender:
             # Try to get from metadata input if available
-            if "wallet_address" in self.inputs:
-                sender = self.inputs["wallet_address"]
+            if "wallet_address" in inputs:
+                sender = inputs["wallet_address"]
             
         if not sender:
             error_msg = "No sender address provided for transaction"
@@ -72,7 +73,7 @@ class BuildTransactionJSON(ElementBase):
         # Stream transaction build request info
         await executor._stream_event("transaction_build_request", {
             "element_id": self.element_id,
-            "node_url": self.node_url,
+            "node_url": node_url,
             "contract_address": self.contract_address,
             "function_name": self.function_name,
             "function_args": self.function_args,
@@ -82,7 +83,7 @@ class BuildTransactionJSON(ElementBase):
         try:
             # Initialize blockchain service
             blockchain_service = AptosBlockchainService(
-                node_url=self.node_url,
+                node_url=node_url,
                 private_key=executor.config.get("aptos_private_key")
             )
             
@@ -90,8 +91,8 @@ class BuildTransactionJSON(ElementBase):
             args = []
             for arg_name in self.function_args:
                 # Get arg value from inputs if available
-                if arg_name in self.inputs:
-                    args.append(self.inputs[arg_name])
+                if arg_name in inputs:
+                    args.append(inputs[arg_name])
                 else:
                     logger.warning(f"Argument '{arg_name}' not found in inputs for element {self.element_id}")
                     # Use empty value for missing arguments
@@ -110,18 +111,18 @@ class BuildTransactionJSON(ElementBase):
             
             full_function = f"{self.contract_address}::{module_name}::{func_name}"
             
-            # Build transaction
-            transaction_json = await blockchain_service.build_transaction(
-                sender=sender,
-                function_name=full_function,
-                arguments=args
-            )
-            
-            # Close blockchain service
-            await blockchain_service.close()
+            # Build transaction, closing the client even if the call fails or is cancelled
+            try:
+                transaction_json = await blockchain_service.build_transaction(
+                    sender=sender,
+                    function_name=full_function,
+                    arguments=args
+                )
+            finally:
+                await blockchain_service.close()
             
             # Set output to the transaction JSON
-            self.outputs = {"transaction_json": transaction_json}
+            outputs = {"transaction_json": transaction_json}
             
             # Stream transaction build response
             safe_tx = self._redact_sensitive_tx_data(transaction_json)
@@ -130,7 +131,7 @@ class BuildTransactionJSON(ElementBase):
                 "transaction_json": safe_tx
             })
             
-            return self.outputs
+            return outputs
             
         except Exception as e:
             error_msg = f"Error building transaction JSON: {str(e)}"
@@ -143,12 +144,12 @@ class BuildTransactionJSON(ElementBase):
             })
             
             # Return error data
-            self.outputs = {
+            outputs = {
                 "transaction_json": {
                     "error": error_msg
                 }
             }
-            return self.outputs
+            return outputs
     
     def _redact_sensitive_tx_data(self, tx_data: Dict[str, Any]) -> Dict[str, Any]:
         """Redact sensitive data from transaction JSON for logging."""
@@ -10,6 +10,10 @@ from services.blockchain import AptosBlockchainService
 class ReadBlockchainData(ElementBase):
     """Read Blockchain Data element for reading data from the Aptos blockchain."""
     
+    # Chain state changes slowly enough to reuse reads between chat turns
+    session_ttl = 10.0
+    side_effect_free = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  node_url: str = "", contract_address: str = "",
@@ -29,6 +33,8 @@ class ReadBlockchainData(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the read blockchain data element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing read blockchain data element: {self.name} ({self.element_id})")
         
@@ -43,20 +49,19 @@ class ReadBlockchainData(ElementBase):
             raise ValueError(error_msg)
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for read blockchain data element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get node URL from config if not specified
-        if not self.node_url:
-            self.node_url = executor.config.get("aptos_node_url", "https://testnet.aptoslabs.com")
+        node_url = self.node_url or executor.config.get("aptos_node_url", "https://testnet.aptoslabs.com")
         
         # Stream blockchain request info
         await executor._stream_event("blockchain_request", {
             "element_id": self.element_id,
-            "node_url": self.node_url,
+            "node_url": node_url,
             "contract_address": self.contract_address,
             "function_name": self.function_name,
             "function_args": self.function_args
@@ -65,7 +70,7 @@ class ReadBlockchainData(ElementBase):
         try:
             # Initialize blockchain service
             blockchain_service = AptosBlockchainService(
-                node_url=self.node_url,
+                node_url=node_url,
                 private_key=executor.config.get("aptos_private_key")
             )
             
@@ -73,8 +78,8 @@ class ReadBlockchainData(ElementBase):
             args = []
             for arg_name in self.function_args:
                 # Get arg value from inputs if available
-                if arg_name in self.inputs:
-                    args.append(self.inputs[arg_name])
+                if arg_name in inputs:
+                    args.append(inputs[arg_name])
                 else:
                     logger.warning(f"Argument '{arg_name}' not found in inputs for element {self.element_id}")
                     # Use empty value for missing arguments
@@ -95,18 +100,18 @@ class ReadBlockchainData(ElementBase):
             
             full_function = f"{self.contract_address}::{module_name}::{func_name}"
             
-            # Call view function
-            result = await blockchain_service.call_view_function(
-                address=self.contract_address,
-                function_name=full_function,
-                arguments=args
-            )
-            
-            # Close blockchain service
-            await blockchain_service.close()
+            # Call view function, closing the client even if the call fails or is cancelled
+            try:
+                result = await blockchain_service.call_view_function(
+                    address=self.contract_address,
+                    function_name=full_function,
+                    arguments=args
+                )
+            finally:
+                await blockchain_service.close()
             
             # Set output to the result
-            self.outputs = {"data": result}
+            outputs = {"data": result}
             
             # Stream blockchain response
             await executor._stream_event("blockchain_response", {
@@ -114,7 +119,7 @@ class ReadBlockchainData(ElementBase):
                 "response": result
             })
             
-            return self.outputs
+            return outputs
             
         except Exception as e:
             error_msg = f"Error reading blockchain data: {str(e)}"
@@ -127,9 +132,9 @@ class ReadBlockchainData(ElementBase):
             })
             
             # Return error data
-            self.outputs = {
+            outputs = {
                 "data": {
                     "error": error_msg
                 }
             }
-            return self.outputs
+            return outputs
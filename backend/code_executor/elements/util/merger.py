@@ -5,10 +5,15 @@ import copy
 from core.element_base import ElementBase
 from utils.logger import logger
 from utils.validators import validate_inputs
+from utils.token_stream import TokenStream, resolve_text
 
 class Merger(ElementBase):
     """Merger element for combining multiple data inputs."""
     
+    deterministic = True
+    accepts_streams = True
+    stream_output = "merged_data"
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any]):
         super().__init__(
@@ -22,25 +27,30 @@ class Merger(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the merger element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing merger element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for merger element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get input data
-        data1 = self.inputs.get("data1", {})
-        data2 = self.inputs.get("data2", {})
+        data1 = inputs.get("data1", {})
+        data2 = inputs.get("data2", {})
         
         # Determine merge strategy based on data types
-        merged_data = self._merge_data(data1, data2)
+        if isinstance(data1, TokenStream) or isinstance(data2, TokenStream):
+            merged_data = await self._merge_streams(executor, data1, data2)
+        else:
+            merged_data = self._merge_data(data1, data2)
         
         # Set output to the merged data
-        self.outputs = {"merged_data": merged_data}
+        outputs = {"merged_data": merged_data}
         
         # Stream the merge info
         await executor._stream_event("merger", {
@@ -48,7 +58,32 @@ class Merger(ElementBase):
             "merged_data_preview": str(merged_data)[:1000] + ("..." if len(str(merged_data)) > 1000 else "")
         })
         
-        return self.outputs
+        return outputs
+    
+    async def _merge_streams(self, executor, data1: Any, data2: Any) -> Any:
+        """Concatenate streamed text, passing it downstream as it arrives."""
+        parts = [data for data in (data1, data2) if data is not None]
+        if not all(isinstance(part, (str, TokenStream)) for part in parts):
+            return self._merge_data(await resolve_text(data1), await resolve_text(data2))
+        
+        stream = executor.open_stream(self.element_id, "merged_data")
+        try:
+            for part in parts:
+                if not isinstance(part, TokenStream):
+                    if stream is not None:
+                        stream.append(part)
+                    continue
+                async for chunk in part:
+                    if stream is not None:
+                        stream.append(chunk)
+        except BaseException as e:
+            if stream is not None:
+                stream.fail(e)
+            raise
+        if stream is not None:
+            stream.close()
+        
+        return "".join(part if isinstance(part, str) else "".join(part.chunks) for part in parts)
     
     def _merge_data(self, data1: Any, data2: Any) -> Any:
         """Merge two data items based on their types."""
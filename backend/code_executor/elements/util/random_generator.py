@@ -59,7 +59,7 @@ class RandomGenerator(ElementBase):
                 random_data = None
         
         # Set output to the random data
-        self.outputs = {"random_data": random_data}
+        outputs = {"random_data": random_data}
         
         # Stream the random data
         await executor._stream_event("random_generator", {
@@ -68,7 +68,7 @@ class RandomGenerator(ElementBase):
             "random_data": random_data
         })
         
-        return self.outputs
+        return outputs
     
     def _generate_random_string(self) -> str:
         """Generate a random string of specified length."""
@@ -8,6 +8,8 @@ from utils.validators import validate_inputs
 class Selector(ElementBase):
     """Selector element for selecting values from data based on a key."""
     
+    deterministic = True
+    
     def __init__(self, element_id: str, name: str, description: str,
                  input_schema: Dict[str, Any], output_schema: Dict[str, Any],
                  key: Union[str, List[str]] = None):
@@ -23,18 +25,20 @@ class Selector(ElementBase):
     
     async def execute(self, executor, backtracking=False) -> Dict[str, Any]:
         """Execute the selector element."""
+        inputs = executor.context.get_inputs(self.element_id)
+        
         # Log execution
         logger.info(f"Executing selector element: {self.name} ({self.element_id})")
         
         # Validate inputs
-        validation_result = validate_inputs(self.inputs, self.input_schema)
+        validation_result = validate_inputs(inputs, self.input_schema)
         if not validation_result["valid"]:
             error_msg = f"Invalid inputs for selector element: {validation_result['error']}"
             logger.error(error_msg)
             raise ValueError(error_msg)
         
         # Get data from inputs
-        data = self.inputs.get("data", {})
+        data = inputs.get("data", {})
         
         # Set default value
         selected_value = None
@@ -79,7 +83,7 @@ class Selector(ElementBase):
             selected_value = None
         
         # Set output to the selected value
-        self.outputs = {"value": selected_value}
+        outputs = {"value": selected_value}
         
         # Stream the selection info
         await executor._stream_event("selector", {
@@ -88,4 +92,4 @@ class Selector(ElementBase):
             "selected_value": selected_value
         })
         
-        return self.outputs
+        return outputs
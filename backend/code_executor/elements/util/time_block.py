@@ -39,7 +39,7 @@ class TimeBlock(ElementBase):
             time_data = self._get_default_time_value()
         
         # Set output to the time data
-        self.outputs = {"time_data": time_data}
+        outputs = {"time_data": time_data}
         
         # Stream the time data
         await executor._stream_event("time_block", {
@@ -50,7 +50,7 @@ class TimeBlock(ElementBase):
             "time_data": time_data
         })
         
-        return self.outputs
+        return outputs
     
     def _generate_time_data(self) -> Any:
         """Generate time data based on format and timezone."""
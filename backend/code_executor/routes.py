@@ -1,15 +1,28 @@
-from fastapi import FastAPI, HTTPException, Request, WebSocket, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 import asyncio
-import json
+import time
+import uuid
 from typing import Optional, Dict, Any, List
 
 from config import settings
 from core.executor import FlowExecutor
-from services.streaming import WebSocketStreamManager, DirectResponseStreamManager, SSEStreamManager
+from core.compiler import FlowCompiler, FlowCompilationError
+from core.memo import ElementMemo
+from core.batch import BatchRunner
+from core.session import SessionStore
+from core.checkpoint import CheckpointStore
+from core.flow_store import FlowStore
+from core.admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from core.result_store import ResultStore, FINISHED_STATUSES
+from services.streaming import (WebSocketStreamManager, DirectResponseStreamManager, MultiplexedStreamManager,
+                                SSEStreamManager, JobStreamManager)
+from utils import codec
+from utils.cache import LRUCache
 from utils.logger import logger
-from elements import element_registry  # Import from app.py
+from utils.profiling import profiler
+from elements import element_registry  # Element modules are imported on first use
 
 class ElementDefinition(BaseModel):
     type: str
@@ -35,110 +48,379 @@ class FlowDefinition(BaseModel):
     start_element_id: str
     metadata: dict | None = None
 
+# Compiled plans are cached by content hash, so a flow definition is only
+# validated and compiled the first time it is seen
+flow_compiler = FlowCompiler(element_registry, FlowDefinition, cache_size=settings.plan_cache_size,
+                             prune=settings.enable_static_pruning)
+
+# Outputs of deterministic elements, shared by all runs in this process
+element_memo = ElementMemo(settings.memo_cache_size)
+
+# Outputs kept between the turns of chat sessions, keyed by config["session_id"]
+session_store = SessionStore(settings.session_cache_size)
+
+# Completed element outputs of checkpointed runs, opened on first use so the
+# database is only created once a run asks for checkpoints
+checkpoint_store: Optional[CheckpointStore] = None
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the process-wide checkpoint store, opening it if needed."""
+    global checkpoint_store
+    if checkpoint_store is None:
+        checkpoint_store = CheckpointStore(settings.checkpoint_db_path, ttl=settings.checkpoint_ttl)
+    return checkpoint_store
+
+# Registered flow definitions by flow_id and version, opened on first use
+flow_store: Optional[FlowStore] = None
+
+# Registered flow versions already read from the store; versions never change
+registered_flows = LRUCache(settings.plan_cache_size)
+
+def get_flow_store() -> FlowStore:
+    """Get the process-wide flow store, opening it if needed."""
+    global flow_store
+    if flow_store is None:
+        flow_store = FlowStore(settings.flow_store_path)
+    return flow_store
+
+# Status, result and event log of runs started in job mode, opened on first use
+result_store: Optional[ResultStore] = None
+
+def get_result_store() -> ResultStore:
+    """Get the process-wide result store, opening it if needed."""
+    global result_store
+    if result_store is None:
+        result_store = ResultStore(settings.result_store_path, ttl=settings.job_result_ttl)
+    return result_store
+
+# Jobs still going in this process, by run id, so readers can wait on them
+active_jobs: Dict[str, JobStreamManager] = {}
+
+# Limits how many runs execute at once; the others wait in a bounded queue
+admission = AdmissionController(settings.max_concurrent_runs, settings.run_queue_size)
+
+def reserve_run(user_config: Optional[Dict[str, Any]] = None) -> AdmissionTicket:
+    """Reserve a place for a run at its config's priority, rejecting it with 429 if the queue is full."""
+    priority = (user_config or {}).get("priority", "interactive")
+    try:
+        return admission.reserve(priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+# Settings values are class attributes, so read them from the class once;
+# the request config is merged on top of these for every run
+base_config = {k: v for k, v in vars(type(settings)).items()
+               if not k.startswith('_') and not isinstance(v, type)}
+
 class ExecuteFlowRequest(BaseModel):
     flow_id: str
-    flow_definition: FlowDefinition
+    flow_definition: Dict[str, Any]  # Validated by the flow compiler on a cache miss
     initial_inputs: dict | None = None
     backend2_ws_url: Optional[str] = None  # Make this optional
-    stream_mode: str = "sse"  # Options: "sse", "ws", "backend2"
+    stream_mode: str = "sse"  # Options: "sse", "ws", "backend2", "job"
     config: dict | None = None
 
+async def create_stream_manager(stream_mode: str, backend2_ws_url: Optional[str] = None,
+                                run_id: Optional[str] = None):
+    """Create the stream manager for an HTTP-started run."""
+    if stream_mode == "backend2" and backend2_ws_url:
+        # Legacy mode: stream to Backend 2
+        stream_manager = WebSocketStreamManager(backend2_ws_url)
+        connected = await stream_manager.connect()
+        
+        if not connected:
+            raise HTTPException(status_code=500, detail="Failed to connect to Backend 2 WebSocket")
+        return stream_manager
+    if stream_mode == "sse":
+        # Server-Sent Events mode
+        return SSEStreamManager()
+    if stream_mode == "job":
+        # Job mode: events and the result are recorded for the client to poll
+        return JobStreamManager(get_result_store(), run_id, flush_interval=settings.job_flush_interval)
+    # The "ws" mode will be handled separately in the WebSocket endpoint
+    return None
+
+async def start_flow_run(executor: FlowExecutor, initial_inputs, flow_id: str, stream_manager,
+                         stream_mode: str, background_tasks: BackgroundTasks,
+                         ticket: Optional[AdmissionTicket] = None):
+    """Start a run and get the response for it: an SSE stream, or a status message."""
+    # If SSE streaming, run the flow alongside the response and cancel it
+    # if the client goes away before the run finishes
+    if stream_mode == "sse":
+        run_task = asyncio.create_task(execute_flow_task(
+            executor, 
+            initial_inputs, 
+            flow_id, 
+            stream_manager,
+            ticket
+        ))
+        stream_manager.add_disconnect_listener(run_task.cancel)
+        
+        return StreamingResponse(
+            stream_manager.get_messages(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Content-Type": "text/event-stream"
+            }
+        )
+    
+    # In job mode, record the job before answering so it can be polled at once
+    if stream_mode == "job":
+        stream_manager.status = "queued" if ticket is not None and not ticket.admitted else "running"
+        await asyncio.to_thread(stream_manager.store.create_job, executor.flow_id, flow_id, stream_manager.status)
+        run_task = asyncio.create_task(execute_job_task(executor, initial_inputs, flow_id, stream_manager, ticket))
+        stream_manager.add_disconnect_listener(run_task.cancel)
+        active_jobs[executor.flow_id] = stream_manager
+        
+        return {
+            "status": stream_manager.status,
+            "flow_id": flow_id,
+            "run_id": executor.flow_id,
+            "message": "Flow execution started in job mode"
+        }
+    
+    # Otherwise, execute the flow in the background and return a status message
+    background_tasks.add_task(
+        execute_flow_task, 
+        executor, 
+        initial_inputs, 
+        flow_id, 
+        stream_manager,
+        ticket
+    )
+    
+    return {
+        "status": "started", 
+        "flow_id": flow_id,
+        "run_id": executor.flow_id,
+        "message": f"Flow execution started in {stream_mode} mode"
+    }
+
+async def notify_flow_error(stream_manager, flow_id: str, error: Exception):
+    """Try to send an error to the stream of a run that could not start."""
+    # A job that could not start has no record; the error response is all there is
+    if not stream_manager or isinstance(stream_manager, JobStreamManager):
+        return
+    try:
+        await stream_manager.send_message(codec.dumps({
+            "type": "flow_error",
+            "data": {
+                "flow_id": flow_id,
+                "error": str(error)
+            }
+        }))
+    except Exception as ws_error:
+        logger.error(f"Failed to send error to stream: {str(ws_error)}")
+
 async def execute_flow(request: ExecuteFlowRequest, background_tasks: BackgroundTasks):
     """Execute a flow and stream results back to the caller."""
+    ticket = reserve_run(request.config)
+    run_id = str(uuid.uuid4())
+    stream_manager = None
     try:
-        stream_manager = None
-        
-        # Handle streaming mode
-        if request.stream_mode == "backend2" and request.backend2_ws_url:
-            # Legacy mode: stream to Backend 2
-            stream_manager = WebSocketStreamManager(request.backend2_ws_url)
-            connected = await stream_manager.connect()
-            
-            if not connected:
-                raise HTTPException(status_code=500, detail="Failed to connect to Backend 2 WebSocket")
-        elif request.stream_mode == "sse":
-            # Server-Sent Events mode
-            stream_manager = SSEStreamManager()
-        # The "ws" mode will be handled separately in the WebSocket endpoint
-        
-        # Parse the flow definition
-        flow_def = request.flow_definition
+        stream_manager = await create_stream_manager(request.stream_mode, request.backend2_ws_url, run_id)
         
         # Create element instances and setup the flow executor
-        elements, executor = await setup_flow_executor(flow_def, stream_manager, request.config)
+        elements, executor = await setup_flow_executor(request.flow_definition, stream_manager, request.config,
+                                                       initial_inputs=request.initial_inputs, flow_id=request.flow_id,
+                                                       run_id=run_id)
         
-        # Execute the flow in the background
-        background_tasks.add_task(
-            execute_flow_task, 
-            executor, 
-            request.initial_inputs, 
-            request.flow_id, 
-            stream_manager
+        return await start_flow_run(executor, request.initial_inputs, request.flow_id, stream_manager,
+                              request.stream_mode, background_tasks, ticket)
+    
+    except HTTPException:
+        ticket.release()
+        raise
+    except Exception as e:
+        ticket.release()
+        logger.error(f"Error executing flow: {str(e)}")
+        await notify_flow_error(stream_manager, request.flow_id, e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ResumeRunRequest(BaseModel):
+    backend2_ws_url: Optional[str] = None
+    stream_mode: str = "sse"  # Options: "sse", "ws", "backend2", "job"
+    config: dict | None = None  # Merged over the config the run was started with
+
+async def resume_run(run_id: str, request: ResumeRunRequest, background_tasks: BackgroundTasks):
+    """Resume a failed or cancelled checkpointed run, executing only the elements it did not complete."""
+    store = get_checkpoint_store()
+    run = await asyncio.to_thread(store.load_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    
+    user_config = dict(run["config"])
+    user_config.update(request.config or {})
+    ticket = reserve_run(user_config)
+    
+    # A run only counts as abandoned once it has been silent for longer than a run may take
+    if not await asyncio.to_thread(store.claim_run, run_id, settings.max_execution_time):
+        ticket.release()
+        raise HTTPException(status_code=409, detail=f"Run '{run_id}' is {run['status']} and cannot be resumed")
+    
+    stream_manager = None
+    try:
+        plan = get_flow_plan(run["flow_definition"])
+        config = merge_config(user_config)
+        
+        stream_manager = await create_stream_manager(request.stream_mode, request.backend2_ws_url, run_id)
+        executor = FlowExecutor(
+            plan=plan,
+            stream_manager=stream_manager,
+            config=config,
+            memo=element_memo,
+            checkpoint=store,
+            run_id=run_id
         )
+        executor.restore(run)
+        logger.info(f"Resuming run {run_id} of flow {run['flow_id']} with "
+                    f"{len(run['element_outputs'])} completed elements")
         
-        # If SSE streaming, return a streaming response
-        if request.stream_mode == "sse":
-            return StreamingResponse(
-                stream_manager.get_messages(),
-                media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Content-Type": "text/event-stream"
-                }
-            )
+        return await start_flow_run(executor, run["initial_inputs"], run["flow_id"], stream_manager,
+                              request.stream_mode, background_tasks, ticket)
+    
+    except Exception as e:
+        ticket.release()
+        await asyncio.to_thread(store.set_status, run_id, "failed", str(e))
+        if isinstance(e, HTTPException):
+            raise
+        logger.error(f"Error resuming run {run_id}: {str(e)}")
+        await notify_flow_error(stream_manager, run["flow_id"], e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def get_run(run_id: str):
+    """Status of a checkpointed run and the elements it has completed."""
+    run = await asyncio.to_thread(get_checkpoint_store().load_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    return {
+        "run_id": run_id,
+        "flow_id": run["flow_id"],
+        "status": run["status"],
+        "error": run["error"],
+        "completed_elements": list(run["element_outputs"]),
+        "created_at": run["created_at"],
+        "updated_at": run["updated_at"]
+    }
+
+class RegisterFlowRequest(BaseModel):
+    flow_id: str
+    flow_definition: Dict[str, Any]  # Validated and compiled before it is stored
+
+async def register_flow(request: RegisterFlowRequest):
+    """Store a flow definition as a new version of the flow, so it can be executed by id."""
+    plan = get_flow_plan(request.flow_definition)
+    registered = await asyncio.to_thread(get_flow_store().register, request.flow_id, plan.flow_hash,
+                                         request.flow_definition)
+    if registered["created"]:
+        logger.info(f"Registered version {registered['version']} of flow {request.flow_id}")
+    return registered
+
+async def get_flow(flow_id: str):
+    """List the registered versions of a flow."""
+    versions = await asyncio.to_thread(get_flow_store().versions, flow_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail=f"Flow '{flow_id}' is not registered")
+    return {
+        "flow_id": flow_id,
+        "latest_version": versions[-1]["version"],
+        "versions": versions
+    }
+
+async def get_flow_version(flow_id: str, version: int):
+    """Get the definition of a registered flow version."""
+    return await get_registered_flow(flow_id, version)
+
+async def get_registered_flow(flow_id: str, version: Optional[int] = None) -> Dict[str, Any]:
+    """Get a registered flow version, the latest by default, reading the store only on a cache miss."""
+    store = get_flow_store()
+    if version is None:
+        version = await asyncio.to_thread(store.latest_version, flow_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail=f"Flow '{flow_id}' is not registered")
+    
+    registered = registered_flows.get((flow_id, version))
+    if registered is None:
+        registered = await asyncio.to_thread(store.get, flow_id, version)
+        if registered is None:
+            raise HTTPException(status_code=404, detail=f"Flow '{flow_id}' has no version {version}")
+        registered_flows.put((flow_id, version), registered)
+    return registered
+
+class ExecuteRegisteredFlowRequest(BaseModel):
+    version: int | None = None  # Latest version by default
+    initial_inputs: dict | None = None
+    backend2_ws_url: Optional[str] = None
+    stream_mode: str = "sse"  # Options: "sse", "ws", "backend2", "job"
+    config: dict | None = None
+
+async def execute_registered_flow(flow_id: str, request: ExecuteRegisteredFlowRequest,
+                                  background_tasks: BackgroundTasks):
+    """Execute a registered flow by id, without sending its definition."""
+    registered = await get_registered_flow(flow_id, request.version)
+    ticket = reserve_run(request.config)
+    
+    run_id = str(uuid.uuid4())
+    stream_manager = None
+    try:
+        stream_manager = await create_stream_manager(request.stream_mode, request.backend2_ws_url, run_id)
         
-        # Otherwise, return a status message
-        return {
-            "status": "started", 
-            "flow_id": request.flow_id,
-            "message": f"Flow execution started in {request.stream_mode} mode"
-        }
+        # The stored hash finds the compiled plan without hashing the definition again
+        elements, executor = await setup_flow_executor(registered["flow_definition"], stream_manager, request.config,
+                                                       initial_inputs=request.initial_inputs, flow_id=flow_id,
+                                                       flow_hash=registered["flow_hash"], run_id=run_id)
+        
+        return await start_flow_run(executor, request.initial_inputs, flow_id, stream_manager,
+                              request.stream_mode, background_tasks, ticket)
     
+    except HTTPException:
+        ticket.release()
+        raise
     except Exception as e:
-        logger.error(f"Error executing flow: {str(e)}")
-        # Try to notify about the error if stream_manager exists
-        if 'stream_manager' in locals() and stream_manager:
-            try:
-                await stream_manager.send_message(json.dumps({
-                    "type": "flow_error",
-                    "data": {
-                        "flow_id": request.flow_id,
-                        "error": str(e)
-                    }
-                }))
-            except Exception as ws_error:
-                logger.error(f"Failed to send error to stream: {str(ws_error)}")
-                
+        ticket.release()
+        logger.error(f"Error executing flow {flow_id} version {registered['version']}: {str(e)}")
+        await notify_flow_error(stream_manager, flow_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 async def execute_flow_websocket(websocket: WebSocket, flow_id: str, flow_definition_str: str, 
                                initial_inputs_str: Optional[str] = None, config_str: Optional[str] = None):
     """WebSocket endpoint for executing flows with direct WebSocket streaming."""
-    
+    ticket = None
     try:
         # Parse the JSON strings
-        flow_definition = json.loads(flow_definition_str)
-        initial_inputs = json.loads(initial_inputs_str) if initial_inputs_str else None
-        config = json.loads(config_str) if config_str else None
-        
-        # Create flow definition model
-        flow_def = FlowDefinition(**flow_definition)
+        flow_definition = codec.decode_flow_definition(flow_definition_str)
+        initial_inputs = codec.loads(initial_inputs_str) if initial_inputs_str else None
+        config = codec.loads(config_str) if config_str else None
+        ticket = reserve_run(config)
         
         # Create a direct WebSocket stream manager
         stream_manager = DirectResponseStreamManager(websocket)
         
         # Setup the flow executor
-        elements, executor = await setup_flow_executor(flow_def, stream_manager, config)
+        elements, executor = await setup_flow_executor(flow_definition, stream_manager, config,
+                                                       initial_inputs=initial_inputs, flow_id=flow_id)
         
-        # Execute the flow
-        await execute_flow_task(executor, initial_inputs, flow_id, stream_manager)
+        # Execute the flow, cancelling it if the client disconnects
+        run_task = asyncio.create_task(execute_flow_task(executor, initial_inputs, flow_id, stream_manager, ticket))
+        stream_manager.add_disconnect_listener(run_task.cancel)
+        stream_manager.watch_disconnect()
+        try:
+            await asyncio.wait({run_task})
+        finally:
+            if not run_task.done():
+                run_task.cancel()
         
     except Exception as e:
+        if ticket is not None:
+            ticket.release()
         error_msg = f"Error executing flow via WebSocket: {str(e)}"
         logger.error(error_msg)
         try:
-            await websocket.send_text(json.dumps({
+            await websocket.send_text(codec.dumps({
                 "type": "flow_error",
                 "data": {
                     "flow_id": flow_id,
@@ -148,76 +430,238 @@ async def execute_flow_websocket(websocket: WebSocket, flow_id: str, flow_defini
         except Exception:
             pass
 
-async def setup_flow_executor(flow_def: FlowDefinition, stream_manager, user_config: Optional[Dict[str, Any]] = None):
-    """Setup the flow executor with elements and connections."""
-    # Create element instances
-    elements = {}
-    for elem_id, elem_data in flow_def.elements.items():
-        elem_type = elem_data.type
-        if elem_type not in element_registry:
-            raise HTTPException(status_code=400, detail=f"Unknown element type: {elem_type}")
-        
-        # Create element instance based on type
-        ElementClass = element_registry[elem_type]
-        
-        # Extract common parameters
-        common_params = {
-            "element_id": elem_id,
-            "name": elem_data.name,
-            "description": elem_data.description,
-            "input_schema": elem_data.input_schema,
-            "output_schema": elem_data.output_schema,
-        }
+class ExecuteRunFrame(BaseModel):
+    type: str
+    request_id: str | None = None  # Echoed in run_started so the client can match it
+    flow_id: str
+    flow_definition: Dict[str, Any] | None = None  # The registered flow is run when omitted
+    version: int | None = None  # Version of the registered flow, latest by default
+    initial_inputs: dict | None = None
+    config: dict | None = None
+
+async def websocket_session(websocket: WebSocket):
+    """
+    WebSocket protocol v2: any number of runs over one long-lived socket.
+    
+    Each ``execute`` frame carries a whole request and starts a run at once,
+    answered by ``run_started`` with the run's ``run_id``. All events of a
+    run are tagged with its ``run_id``. ``cancel`` frames stop a run, and
+    runs still going when the socket closes are cancelled.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+    runs: Dict[str, asyncio.Task] = {}
+    
+    async def send(message: Dict[str, Any]):
+        try:
+            async with send_lock:
+                await websocket.send_text(codec.dumps(message))
+        except Exception as e:
+            logger.error(f"Failed to send WebSocket message: {str(e)}")
+    
+    async def send_error(error: str, request_id: Optional[str] = None, run_id: Optional[str] = None):
+        await send({"type": "error", "run_id": run_id, "data": {"error": error, "request_id": request_id}})
+    
+    async def start_run(frame: Dict[str, Any]):
+        try:
+            request = ExecuteRunFrame(**frame)
+        except ValidationError as e:
+            await send_error(f"Invalid execute frame: {str(e)}", frame.get("request_id"))
+            return
+        if len(runs) >= settings.ws_max_runs_per_socket:
+            await send_error(f"Too many runs on this connection, the limit is {settings.ws_max_runs_per_socket}",
+                             request.request_id)
+            return
         
-        # Extract additional parameters specific to the element type
-        additional_params = {k: v for k, v in elem_data.dict().items() 
-                           if k not in ["type", "element_id", "name", "description", "input_schema", "output_schema"]}
+        try:
+            ticket = reserve_run(request.config)
+        except HTTPException as e:
+            await send_error(str(e.detail), request.request_id)
+            return
+        
+        run_id = str(uuid.uuid4())
+        stream_manager = MultiplexedStreamManager(websocket, run_id, send_lock)
+        try:
+            flow_definition, flow_hash = request.flow_definition, None
+            if flow_definition is None:
+                registered = await get_registered_flow(request.flow_id, request.version)
+                flow_definition, flow_hash = registered["flow_definition"], registered["flow_hash"]
+            elements, executor = await setup_flow_executor(flow_definition, stream_manager, request.config,
+                                                           initial_inputs=request.initial_inputs,
+                                                           flow_id=request.flow_id, flow_hash=flow_hash,
+                                                           run_id=run_id)
+        except HTTPException as e:
+            ticket.release()
+            await send_error(str(e.detail), request.request_id)
+            return
+        except Exception as e:
+            ticket.release()
+            logger.error(f"Error starting flow {request.flow_id} via WebSocket: {str(e)}")
+            await send_error(str(e), request.request_id)
+            return
         
-        # Create the element instance
-        elements[elem_id] = ElementClass(**common_params, **additional_params)
+        # Announce the run before any of its events
+        await send({"type": "run_started", "run_id": run_id,
+                    "data": {"request_id": request.request_id, "flow_id": request.flow_id}})
+        task = asyncio.create_task(execute_flow_task(executor, request.initial_inputs, request.flow_id,
+                                                     stream_manager, ticket))
+        runs[run_id] = task
+        task.add_done_callback(lambda _: runs.pop(run_id, None))
     
-    # Set up connections between elements
-    for conn in flow_def.connections:
-        from_id = conn.from_id
-        to_id = conn.to_id
-        if from_id in elements and to_id in elements:
-            elements[from_id].connect(elements[to_id])
+    try:
+        while True:
+            try:
+                text = await websocket.receive_text()
+            except (WebSocketDisconnect, RuntimeError):
+                break
             
-            # If specific input/output ports are specified, set up the mapping
-            if conn.from_output and conn.to_input:
-                # This would require additional logic in your ElementBase class
-                # For example: elements[from_id].map_output_to_input(conn.from_output, elements[to_id], conn.to_input)
-                pass
-    
-    # Merge configuration
-    config = {}
-    if settings:
-        config.update({k: v for k, v in vars(settings).items() if not k.startswith('_')})
+            try:
+                frame = codec.loads(text)
+            except ValueError as e:
+                await send_error(f"Invalid JSON: {str(e)}")
+                continue
+            if not isinstance(frame, dict):
+                await send_error("Frames must be JSON objects")
+                continue
+            
+            frame_type = frame.get("type")
+            if frame_type == "execute":
+                await start_run(frame)
+            elif frame_type == "cancel":
+                task = runs.get(frame.get("run_id"))
+                if task is None:
+                    await send_error("Unknown or finished run", run_id=frame.get("run_id"))
+                else:
+                    task.cancel()
+            elif frame_type == "ping":
+                await send({"type": "pong"})
+            else:
+                await send_error(f"Unknown frame type: {frame_type}", frame.get("request_id"))
+    finally:
+        # The client is gone; stop whatever it left running
+        pending = list(runs.values())
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.info(f"WebSocket closed, cancelling {len(pending)} runs")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+def get_flow_plan(flow_definition: Dict[str, Any], flow_hash: Optional[str] = None):
+    """Get the compiled plan for a flow, compiling it only if it is not cached yet."""
+    try:
+        return flow_compiler.get_plan(flow_definition, flow_hash)
+    except (FlowCompilationError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def limit_setting(requested: Any, limit: Optional[float]) -> Optional[float]:
+    """
+    A client-requested value bounded by the server setting. A missing, zero
+    or invalid request gets the setting; a setting of 0 or None has no bound.
+    """
+    if isinstance(requested, str):
+        try:
+            requested = float(requested)
+        except ValueError:
+            requested = None
+    if not isinstance(requested, (int, float)) or isinstance(requested, bool) or requested <= 0:
+        return limit
+    if not limit:
+        return requested
+    return min(limit, requested)
+
+def merge_config(user_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge the request config over the settings; clients may tighten the run limits but not lift them."""
+    config = dict(base_config)
     if user_config:
         config.update(user_config)
+        config["max_execution_time"] = limit_setting(config["max_execution_time"], settings.max_execution_time)
+        config["max_parallelism"] = int(limit_setting(config["max_parallelism"], settings.max_parallelism))
+        config["map_max_concurrency"] = int(limit_setting(config["map_max_concurrency"], settings.map_max_concurrency))
+        config["max_speculative_elements"] = int(limit_setting(config["max_speculative_elements"],
+                                                                settings.max_speculative_elements))
+    return config
+
+async def setup_flow_executor(flow_definition: Dict[str, Any], stream_manager, user_config: Optional[Dict[str, Any]] = None,
+                              initial_inputs: Optional[Dict[str, Any]] = None, flow_id: Optional[str] = None,
+                              flow_hash: Optional[str] = None, run_id: Optional[str] = None):
+    """Setup the flow executor with elements and connections."""
+    plan = get_flow_plan(flow_definition, flow_hash)
+    config = merge_config(user_config)
+    
+    # Runs in the same chat session reuse the outputs of unchanged elements
+    session_id = config.get("session_id")
+    session = session_store.get_session(str(session_id), plan.flow_hash) if session_id else None
     
     # Create the flow executor
     executor = FlowExecutor(
-        elements=elements,
-        start_element_id=flow_def.start_element_id,
+        plan=plan,
         stream_manager=stream_manager,
-        config=config
+        config=config,
+        memo=element_memo,
+        session=session,
+        checkpoint=get_checkpoint_store() if config.get("enable_checkpoints") else None,
+        run_id=run_id
     )
     
-    return elements, executor
+    # Record the run so it can be resumed; only the request config is stored,
+    # the settings (and any credentials in them) are merged in again on resume
+    if executor.checkpoint is not None:
+        await asyncio.to_thread(executor.checkpoint.start_run, executor.flow_id, flow_id or plan.flow_id,
+                                plan.flow_hash, flow_definition, initial_inputs, user_config)
+    
+    return executor.elements, executor
 
-async def execute_flow_task(executor: FlowExecutor, initial_inputs, flow_id, stream_manager):
-    """Execute the flow and handle cleanup."""
+class ExecuteBatchRequest(BaseModel):
+    flow_id: str
+    flow_definition: Dict[str, Any]
+    inputs: List[dict | None]  # One set of initial_inputs per run
+    max_concurrency: int | None = None
+    config: dict | None = None
+
+async def execute_batch(request: ExecuteBatchRequest):
+    """Run one flow over many input sets and stream the results as NDJSON."""
+    if len(request.inputs) > settings.batch_max_items:
+        raise HTTPException(status_code=400,
+                            detail=f"Batch has {len(request.inputs)} items, the limit is {settings.batch_max_items}")
+    
+    # Batch items queue behind interactive runs, but a full queue turns the batch away
+    if admission.queue_full():
+        raise HTTPException(status_code=429, detail="Server busy, the run queue is full", headers={"Retry-After": "1"})
+    
+    # Compile once for the whole batch
+    plan = get_flow_plan(request.flow_definition)
+    config = merge_config(request.config)
+    config.pop("session_id", None)  # Batch items are independent runs
+    
+    max_concurrency = min(request.max_concurrency or settings.batch_max_concurrency,
+                          settings.batch_max_concurrency)
+    runner = BatchRunner(plan, config, max_concurrency=max_concurrency, memo=element_memo, admission=admission)
+    logger.info(f"Running batch of {len(request.inputs)} items for flow {request.flow_id}")
+    
+    return StreamingResponse(
+        runner.stream_results(request.inputs),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+async def execute_flow_task(executor: FlowExecutor, initial_inputs, flow_id, stream_manager,
+                            ticket: Optional[AdmissionTicket] = None):
+    """Wait for admission, execute the flow and handle cleanup."""
     try:
+        await wait_for_admission(executor, ticket)
+        
         # Execute the flow
         result = await executor.execute_flow(initial_inputs)
         logger.info(f"Flow {flow_id} execution completed successfully")
         
+    except asyncio.CancelledError:
+        logger.info(f"Flow {flow_id} execution cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error during flow {flow_id} execution: {str(e)}")
         # Try to notify about the error
         try:
-            await stream_manager.send_message(json.dumps({
+            await stream_manager.send_message(codec.dumps({
                 "type": "flow_error",
                 "data": {
                     "flow_id": flow_id,
@@ -227,15 +671,161 @@ async def execute_flow_task(executor: FlowExecutor, initial_inputs, flow_id, str
         except Exception:
             pass
     finally:
+        if ticket is not None:
+            ticket.release()
+        
         # Disconnect stream manager
         try:
             await stream_manager.disconnect()
         except Exception as disconnect_error:
             logger.error(f"Error disconnecting stream manager: {str(disconnect_error)}")
 
+async def wait_for_admission(executor: FlowExecutor, ticket: Optional[AdmissionTicket]):
+    """Wait for a free slot, telling the client where the run is in the queue."""
+    if ticket is None:
+        return
+    
+    async def report_position(position: int, queued: int):
+        await executor._stream_event("queue_position", {
+            "flow_id": executor.flow_id,
+            "position": position,
+            "queued": queued,
+            "priority": ticket.priority
+        })
+    await ticket.wait(report_position)
+
+async def execute_job_task(executor: FlowExecutor, initial_inputs, flow_id, job: JobStreamManager,
+                           ticket: Optional[AdmissionTicket] = None):
+    """Execute the flow of a job and record its outcome in the result store."""
+    status, result, error = "failed", None, None
+    try:
+        await wait_for_admission(executor, ticket)
+        if job.status != "running":
+            await job.set_status("running")
+        
+        output = await executor.execute_flow(initial_inputs)
+        status = "completed"
+        result = {
+            "final_output": output["final_output"],
+            "execution_order": output["execution_order"],
+            "execution_time": output["execution_time"]
+        }
+        if executor.event_payloads.include_outputs:
+            result["element_outputs"] = executor.event_payloads.all_outputs(output["element_outputs"])
+        logger.info(f"Job {job.run_id} of flow {flow_id} completed")
+        
+    except asyncio.CancelledError:
+        status = "cancelled"
+        logger.info(f"Job {job.run_id} of flow {flow_id} cancelled")
+        raise
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Job {job.run_id} of flow {flow_id} failed: {error}")
+    finally:
+        if ticket is not None:
+            ticket.release()
+        try:
+            await job.finish(status, result, error)
+        except Exception as store_error:
+            logger.error(f"Failed to store the outcome of job {job.run_id}: {str(store_error)}")
+        active_jobs.pop(job.run_id, None)
+
+def job_wait_time(wait: float) -> float:
+    """Clamp the long-poll time a client asked for to the allowed range."""
+    return min(max(wait, 0.0), settings.job_max_wait)
+
+async def get_job_record(run_id: str, include_result: bool = False) -> Dict[str, Any]:
+    """Get a job from the result store, or raise 404."""
+    job = await asyncio.to_thread(get_result_store().get_job, run_id, include_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{run_id}' not found")
+    return job
+
+async def get_job(run_id: str, wait: float = 0):
+    """Status of a job; with ``wait``, wait up to that many seconds for it to finish."""
+    job = active_jobs.get(run_id)
+    if job is not None and wait > 0:
+        await job.wait(job_wait_time(wait))
+    return await get_job_record(run_id)
+
+async def get_job_result(run_id: str, wait: float = 0):
+    """Result of a finished job; 202 with its status while it is still going after ``wait`` seconds."""
+    job = active_jobs.get(run_id)
+    if job is not None and wait > 0:
+        await job.wait(job_wait_time(wait))
+    
+    record = await get_job_record(run_id, include_result=True)
+    if record["status"] not in FINISHED_STATUSES:
+        record.pop("result")
+        return Response(content=codec.dumps(record), status_code=202, media_type="application/json")
+    return record
+
+async def get_job_events(run_id: str, after: int = 0, limit: int = 1000, wait: float = 0):
+    """
+    Events of a job numbered after ``after``, oldest first. With ``wait``,
+    wait up to that many seconds for a new event if there is none yet.
+    """
+    limit = max(1, min(limit, settings.job_max_events_per_request))
+    job = active_jobs.get(run_id)
+    if job is not None and wait > 0:
+        await job.wait(job_wait_time(wait), after=after)
+    
+    # Take the events held in memory first; the older ones are in the store by then
+    if job is not None:
+        unstored = job.unstored_events(after)
+        stored_count = job.stored_count
+    else:
+        unstored, stored_count = [], None
+    
+    record = await get_job_record(run_id)
+    events = await asyncio.to_thread(get_result_store().get_events, run_id, after, stored_count, limit)
+    events = (events + unstored)[:limit]
+    
+    # The events are stored encoded, so splice them into the response instead of decoding them
+    next_after = events[-1][0] if events else after
+    content = ('{"run_id":' + codec.dumps(run_id) + ',"status":' + codec.dumps(record["status"])
+               + ',"events":[' + ",".join(event for _, event in events) + '],"next":' + str(next_after) + '}')
+    return Response(content=content, media_type="application/json")
+
+async def cancel_job(run_id: str):
+    """Cancel a job still going in this process."""
+    job = active_jobs.get(run_id)
+    if job is None:
+        record = await get_job_record(run_id)
+        raise HTTPException(status_code=409, detail=f"Job '{run_id}' is {record['status']} and cannot be cancelled")
+    job.cancel()
+    await job.wait(job_wait_time(settings.job_max_wait))
+    return await get_job_record(run_id)
+
+def prewarm_elements():
+    """Import the element types listed in ELEMENT_PREWARM, so the first requests do not pay for it."""
+    prewarm = settings.element_prewarm.strip()
+    if not prewarm:
+        return
+    element_types = None if prewarm == "all" else [t.strip() for t in prewarm.split(",") if t.strip()]
+    start_time = time.perf_counter()
+    loaded = element_registry.prewarm(element_types)
+    logger.info(f"Prewarmed {len(loaded)} element types in {time.perf_counter() - start_time:.2f}s")
+
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint, with the run admission counters."""
+    return {"status": "healthy", "runs": admission.stats()}
+
+async def cache_stats():
+    """Hit/miss counters for the plan cache and the element memo."""
+    return {
+        "plans": flow_compiler.cache.stats(),
+        "element_memo": element_memo.stats(),
+        "sessions": session_store.stats(),
+        "registered_flows": registered_flows.stats()
+    }
+
+async def profiling_stats(reset: bool = False):
+    """Latency histograms per element type and span phase, aggregated over all runs."""
+    stats = profiler.snapshot()
+    if reset:
+        profiler.reset()
+    return stats
 
 async def log_requests(request: Request, call_next):
     """Middleware to log all requests."""
@@ -4,6 +4,8 @@ import json
 from typing import Dict, Any, List, AsyncGenerator, Optional
 import asyncio
 
+from utils.profiling import external_call
+
 class BedrockService:
     """Service for interacting with AWS Bedrock."""
     
@@ -51,15 +53,15 @@ class BedrockService:
             }
         
         loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
+        async with external_call("bedrock"):
+            response = await loop.run_in_executor(
+                None,
+                lambda: self.client.invoke_model(
+                    modelId=self.model_id,
+                    body=json.dumps(request_body)
+                )
             )
-        )
-        
-        response_body = json.loads(response['body'].read())
+            response_body = json.loads(response['body'].read())
         
         # Extract text based on model response format
         if "anthropic" in self.model_id:
@@ -90,31 +92,44 @@ class BedrockService:
             }
         
         loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self.client.invoke_model_with_response_stream(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
+        async with external_call("bedrock"):
+            response = await loop.run_in_executor(
+                None,
+                lambda: self.client.invoke_model_with_response_stream(
+                    modelId=self.model_id,
+                    body=json.dumps(request_body)
+                )
             )
-        )
         
         stream = response.get('body', None)
         if not stream:
             yield ""
             return
         
-        for event in stream:
-            if 'chunk' in event:
-                chunk_bytes = event['chunk']['bytes']
-                chunk_data = json.loads(chunk_bytes)
+        # Read events in a worker thread so waiting for the next chunk does not
+        # block the event loop. If the consumer stops early or is cancelled, the
+        # stream is closed so the model stops generating.
+        events = iter(stream)
+        try:
+            while True:
+                async with external_call("bedrock"):
+                    event = await loop.run_in_executor(None, next, events, None)
+                if event is None:
+                    break
                 
-                # Extract text based on model response format
-                if "anthropic" in self.model_id:
-                    content_block = chunk_data.get('content', [{}])[0]
-                    if content_block.get('type') == 'text':
-                        yield content_block.get('text', '')
-                else:
-                    yield chunk_data.get('generation', '')
+                if 'chunk' in event:
+                    chunk_bytes = event['chunk']['bytes']
+                    chunk_data = json.loads(chunk_bytes)
+                    
+                    # Extract text based on model response format
+                    if "anthropic" in self.model_id:
+                        content_block = chunk_data.get('content', [{}])[0]
+                        if content_block.get('type') == 'text':
+                            yield content_block.get('text', '')
+                    else:
+                        yield chunk_data.get('generation', '')
+        finally:
+            stream.close()
     
     async def generate_structured_output(self, 
                                       prompt: str, 
@@ -7,6 +7,7 @@ import base64
 import time
 
 from utils.logger import logger
+from utils.profiling import external_call
 
 class AptosBlockchainService:
     """Service for interacting with the Aptos blockchain."""
@@ -38,7 +39,8 @@ class AptosBlockchainService:
             Account information
         """
         try:
-            response = await self.client.get(f"{self.node_url}/v1/accounts/{address}")
+            async with external_call("aptos"):
+                response = await self.client.get(f"{self.node_url}/v1/accounts/{address}")
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -59,7 +61,8 @@ class AptosBlockchainService:
         try:
             resource_type_encoded = resource_type.replace("::", "/")
             url = f"{self.node_url}/v1/accounts/{address}/resource/{resource_type_encoded}"
-            response = await self.client.get(url)
+            async with external_call("aptos"):
+                response = await self.client.get(url)
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
@@ -101,10 +104,11 @@ class AptosBlockchainService:
                 "arguments": arguments
             }
             
-            response = await self.client.post(
-                f"{self.node_url}/v1/view",
-                json=payload
-            )
+            async with external_call("aptos"):
+                response = await self.client.post(
+                    f"{self.node_url}/v1/view",
+                    json=payload
+                )
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -0,0 +1,68 @@
+# services/event_pipeline.py
+import asyncio
+from typing import List, Optional
+
+from services.streaming import StreamManager
+from utils.logger import logger
+
+class EventBatcher:
+    """
+    Buffers encoded events and sends them to a stream manager in batches.
+
+    Events are flushed as one frame when the batch reaches ``max_events`` or
+    ``max_bytes``, or ``flush_interval`` seconds after the first event of the
+    batch was queued, whichever comes first. Event order is preserved.
+    """
+
+    def __init__(self, stream_manager: StreamManager, flush_interval: float = 0.02,
+                 max_events: int = 64, max_bytes: int = 65536):
+        self.stream_manager = stream_manager
+        self.flush_interval = flush_interval
+        self.max_events = max(1, max_events)
+        self.max_bytes = max_bytes
+        self.buffer: List[str] = []
+        self.buffer_bytes = 0
+        self.batches_sent = 0
+        self.events_sent = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def publish(self, message: str):
+        """Queue an encoded event, flushing the batch if it is full."""
+        self.buffer.append(message)
+        self.buffer_bytes += len(message)
+
+        if len(self.buffer) >= self.max_events or self.buffer_bytes >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        """Send every queued event as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            if not self.buffer:
+                return
+            batch, self.buffer, self.buffer_bytes = self.buffer, [], 0
+
+            if not await self.stream_manager.send_batch(batch):
+                logger.warning(f"Failed to send batch of {len(batch)} events")
+            self.batches_sent += 1
+            self.events_sent += len(batch)
+
+    async def close(self):
+        """Flush the remaining events."""
+        await self.flush()
+
+    async def _flush_later(self):
+        """Flush the batch once the flush interval has passed."""
+        await asyncio.sleep(self.flush_interval)
+        # Detach first, so flush() does not cancel the task running it
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing event batch: {str(e)}")
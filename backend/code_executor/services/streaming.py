@@ -1,15 +1,32 @@
 # services/streaming.py
-import json
 import asyncio
-from typing import Dict, Any, Optional, AsyncGenerator, List
+import time
+from typing import Dict, Any, Optional, AsyncGenerator, Callable, List
 import websockets
 from abc import ABC, abstractmethod
 from fastapi import WebSocket
+from utils import codec
 from utils.logger import logger
 
 class StreamManager(ABC):
     """Abstract base class for streaming data."""
     
+    def __init__(self):
+        self.disconnect_listeners: List[Callable[[], Any]] = []
+    
+    def add_disconnect_listener(self, callback: Callable[[], Any]):
+        """Register a callback to run when the client goes away before the stream ends."""
+        self.disconnect_listeners.append(callback)
+    
+    def _notify_disconnect(self):
+        """Run the disconnect callbacks once."""
+        listeners, self.disconnect_listeners = self.disconnect_listeners, []
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in disconnect listener: {str(e)}")
+    
     @abstractmethod
     async def connect(self) -> bool:
         """Connect to the streaming endpoint."""
@@ -25,6 +42,13 @@ class StreamManager(ABC):
         """Send a message through the stream."""
         pass
     
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Send several messages; subclasses send them as a single frame."""
+        success = True
+        for message in messages:
+            success = await self.send_message(message) and success
+        return success
+    
     @abstractmethod
     async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
                            metadata: Dict[str, Any] = None):
@@ -35,6 +59,7 @@ class WebSocketStreamManager(StreamManager):
     """Manages WebSocket streaming to a remote endpoint."""
     
     def __init__(self, ws_url: str):
+        super().__init__()
         self.ws_url = ws_url
         self.websocket = None
         self.connected = False
@@ -93,6 +118,10 @@ class WebSocketStreamManager(StreamManager):
             self.connected = False
             return False
     
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Send several encoded messages as one JSON array frame."""
+        return await self.send_message("[" + ",".join(messages) + "]")
+    
     async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
                            metadata: Dict[str, Any] = None):
         """Stream chunks from an async generator with metadata."""
@@ -103,7 +132,7 @@ class WebSocketStreamManager(StreamManager):
                     "content": chunk,
                     "metadata": metadata or {}
                 }
-                success = await self.send_message(json.dumps(message))
+                success = await self.send_message(codec.dumps(message))
                 if not success:
                     logger.warning("Failed to stream chunk, continuing...")
                     
@@ -115,16 +144,17 @@ class WebSocketStreamManager(StreamManager):
                 "content": str(e),
                 "metadata": metadata or {}
             }
-            await self.send_message(json.dumps(error_message))
+            await self.send_message(codec.dumps(error_message))
 
 class DirectResponseStreamManager(StreamManager):
     """Stream directly to a FastAPI WebSocket connection."""
     
     def __init__(self, websocket: WebSocket):
+        super().__init__()
         self.websocket = websocket
         self.connected = True  # Assume the websocket is already connected by FastAPI
         self.queue = asyncio.Queue()
-        self.task = None
+        self.task = None  # Disconnect watcher
     
     async def connect(self) -> bool:
         """Already connected through FastAPI websocket."""
@@ -150,8 +180,34 @@ class DirectResponseStreamManager(StreamManager):
         except Exception as e:
             logger.error(f"Failed to send message: {str(e)}")
             self.connected = False
+            self._notify_disconnect()
             return False
     
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Send several encoded messages as one JSON array frame."""
+        return await self.send_message("[" + ",".join(messages) + "]")
+    
+    def watch_disconnect(self):
+        """Start watching the socket so disconnect listeners run as soon as the client leaves."""
+        if self.task is None:
+            self.task = asyncio.create_task(self._watch_disconnect())
+    
+    async def _watch_disconnect(self):
+        """Wait for the client's disconnect message."""
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message.get("type") == "websocket.disconnect":
+                    break
+        except Exception:
+            # Receiving fails once the socket is closed
+            pass
+        
+        if self.connected:
+            logger.info("WebSocket client disconnected")
+            self.connected = False
+            self._notify_disconnect()
+    
     async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
                            metadata: Dict[str, Any] = None):
         """Stream chunks directly to the client."""
@@ -162,7 +218,7 @@ class DirectResponseStreamManager(StreamManager):
                     "content": chunk,
                     "metadata": metadata or {}
                 }
-                success = await self.send_message(json.dumps(message))
+                success = await self.send_message(codec.dumps(message))
                 if not success:
                     break
         except Exception as e:
@@ -173,7 +229,7 @@ class DirectResponseStreamManager(StreamManager):
                 "content": str(e),
                 "metadata": metadata or {}
             }
-            await self.send_message(json.dumps(error_message))
+            await self.send_message(codec.dumps(error_message))
     
     async def get_messages(self) -> AsyncGenerator[str, None]:
         """Get messages from the queue as an async generator."""
@@ -184,10 +240,217 @@ class DirectResponseStreamManager(StreamManager):
             yield message
             self.queue.task_done()
 
+class MultiplexedStreamManager(StreamManager):
+    """
+    Stream the events of one run over a FastAPI WebSocket shared with other runs.
+    
+    Every message is tagged with the run's ``run_id`` so the client can tell
+    the runs apart. Sends of all runs on the socket go through one lock, so
+    frames are never interleaved.
+    """
+    
+    def __init__(self, websocket: WebSocket, run_id: str, send_lock: asyncio.Lock):
+        super().__init__()
+        self.websocket = websocket
+        self.run_id = run_id
+        self.send_lock = send_lock
+        self.connected = True
+        # Spliced into each encoded event instead of decoding and encoding it again
+        self._prefix = '{"run_id":' + codec.dumps(run_id) + ','
+    
+    async def connect(self) -> bool:
+        """The socket is accepted by the endpoint that owns it."""
+        return self.connected
+    
+    async def disconnect(self):
+        """Stop sending for this run; the socket stays open for the others."""
+        self.connected = False
+    
+    async def send_message(self, message: str) -> bool:
+        """Send a message of this run to the client."""
+        if not self.connected:
+            return False
+        return await self._send(self._tag(message))
+    
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Send several encoded messages as one JSON array frame."""
+        if not self.connected:
+            return False
+        return await self._send("[" + ",".join(self._tag(message) for message in messages) + "]")
+    
+    def _tag(self, message: str) -> str:
+        """Add the run id to an encoded JSON object."""
+        if message.startswith("{") and message[1:].lstrip()[:1] not in ("}", ""):
+            return self._prefix + message[1:]
+        return codec.dumps({"run_id": self.run_id, "data": codec.loads(message)})
+    
+    async def _send(self, text: str) -> bool:
+        try:
+            async with self.send_lock:
+                await self.websocket.send_text(text)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send message for run {self.run_id}: {str(e)}")
+            self.connected = False
+            self._notify_disconnect()
+            return False
+    
+    async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
+                           metadata: Dict[str, Any] = None):
+        """Stream chunks to the client, tagged with the run id."""
+        try:
+            async for chunk in chunk_generator:
+                message = {
+                    "type": "chunk",
+                    "content": chunk,
+                    "metadata": metadata or {}
+                }
+                if not await self.send_message(codec.dumps(message)):
+                    break
+        except Exception as e:
+            logger.error(f"Error in stream_chunks: {str(e)}")
+            error_message = {
+                "type": "error",
+                "content": str(e),
+                "metadata": metadata or {}
+            }
+            await self.send_message(codec.dumps(error_message))
+
+class JobStreamManager(StreamManager):
+    """
+    Record the events of a job in a result store instead of streaming them.
+    
+    Events are held in memory and appended to the store in batches, at most
+    every ``flush_interval`` seconds, so a run does not write to the database
+    once per LLM chunk. Events are numbered from 1. Readers can wait for new
+    events, or for the job to finish, without polling the store.
+    """
+    
+    def __init__(self, store, run_id: str, flush_interval: float = 0.5):
+        super().__init__()
+        self.store = store
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self.status = "queued"
+        self.finished = False
+        self.event_count = 0  # Events recorded, stored or not
+        self.stored_count = 0
+        self.pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._flush_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+    
+    async def connect(self) -> bool:
+        """The store is opened by the caller."""
+        return True
+    
+    async def disconnect(self):
+        """Store the events still held in memory."""
+        await self.flush()
+    
+    async def send_message(self, message: str) -> bool:
+        """Record an event of the job."""
+        return await self.send_batch([message])
+    
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Record several events, storing them once the flush interval has passed."""
+        self.pending.extend(messages)
+        self.event_count += len(messages)
+        self._notify()
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+        return True
+    
+    async def flush(self):
+        """Append the events held in memory to the store."""
+        async with self._flush_lock:
+            events = self.pending[:]
+            self._last_flush = time.monotonic()
+            if not events:
+                return
+            try:
+                await asyncio.to_thread(self.store.append_events, self.run_id, self.stored_count + 1, events)
+            except Exception as e:
+                # Keep the events in memory and try again on the next flush
+                logger.error(f"Failed to store events of job {self.run_id}: {str(e)}")
+                return
+            # Events are only dropped from memory once readers can find them in the store
+            del self.pending[:len(events)]
+            self.stored_count += len(events)
+    
+    async def set_status(self, status: str):
+        """Record that a job still going changed status, e.g. from queued to running."""
+        self.status = status
+        await asyncio.to_thread(self.store.set_status, self.run_id, status)
+        self._notify()
+    
+    async def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Store the remaining events and the outcome of the job, and wake its readers."""
+        try:
+            await self.flush()
+            await asyncio.to_thread(self.store.finish_job, self.run_id, status, result, error)
+        finally:
+            self.status = status
+            self.finished = True
+            self._notify()
+    
+    def cancel(self):
+        """Stop the job; its disconnect listeners cancel the run."""
+        self._notify_disconnect()
+    
+    def unstored_events(self, after: int = 0) -> List[tuple]:
+        """(seq, event) pairs of the events numbered after ``after`` that are only held in memory."""
+        first_seq = self.stored_count + 1
+        return [(first_seq + offset, event) for offset, event in enumerate(self.pending)
+                if first_seq + offset > after]
+    
+    async def wait(self, timeout: float, after: Optional[int] = None) -> bool:
+        """
+        Wait up to ``timeout`` seconds for the job to finish or, with ``after``,
+        for an event numbered after it. Returns whether that happened.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.finished and (after is None or self.event_count <= after):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+    
+    def _notify(self):
+        """Wake the readers waiting on this job."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
+                           metadata: Dict[str, Any] = None):
+        """Record chunks as events of the job."""
+        try:
+            async for chunk in chunk_generator:
+                message = {
+                    "type": "chunk",
+                    "content": chunk,
+                    "metadata": metadata or {}
+                }
+                await self.send_message(codec.dumps(message))
+        except Exception as e:
+            logger.error(f"Error in stream_chunks: {str(e)}")
+            error_message = {
+                "type": "error",
+                "content": str(e),
+                "metadata": metadata or {}
+            }
+            await self.send_message(codec.dumps(error_message))
+
 class SSEStreamManager(StreamManager):
     """Manager for Server-Sent Events (SSE) streaming."""
     
     def __init__(self):
+        super().__init__()
         self.connected = True
         self.messages = []
         self.queue = asyncio.Queue()
@@ -210,6 +473,14 @@ class SSEStreamManager(StreamManager):
         await self.queue.put(message)
         return True
     
+    async def send_batch(self, messages: List[str]) -> bool:
+        """Queue several messages to be written as one chunk of SSE events."""
+        if not self.connected:
+            return False
+        
+        await self.queue.put(list(messages))
+        return True
+    
     async def stream_chunks(self, chunk_generator: AsyncGenerator[str, None], 
                            metadata: Dict[str, Any] = None):
         """Stream chunks through SSE."""
@@ -220,7 +491,7 @@ class SSEStreamManager(StreamManager):
                     "content": chunk,
                     "metadata": metadata or {}
                 }
-                await self.send_message(json.dumps(message))
+                await self.send_message(codec.dumps(message))
         except Exception as e:
             logger.error(f"Error in stream_chunks: {str(e)}")
             error_message = {
@@ -228,13 +499,24 @@ class SSEStreamManager(StreamManager):
                 "content": str(e),
                 "metadata": metadata or {}
             }
-            await self.send_message(json.dumps(error_message))
+            await self.send_message(codec.dumps(error_message))
     
     async def get_messages(self) -> AsyncGenerator[str, None]:
         """Get messages as an async generator for SSE streaming."""
-        while True:
-            message = await self.queue.get()
-            if message is None:  # None is a sentinel to stop
-                break
-            yield f"data: {message}\n\n"
-            self.queue.task_done()
\ No newline at end of file
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:  # None is a sentinel to stop
+                    break
+                if isinstance(message, list):
+                    # A batch is written in one chunk, one event per message
+                    yield "".join(f"data: {item}\n\n" for item in message)
+                else:
+                    yield f"data: {message}\n\n"
+                self.queue.task_done()
+        finally:
+            # The response stopped before disconnect() was called, so the client went away
+            if self.connected:
+                logger.info("SSE client disconnected")
+                self.connected = False
+                self._notify_disconnect()
\ No newline at end of file
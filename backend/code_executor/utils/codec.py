@@ -0,0 +1,159 @@
+# utils/codec.py
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+class StdlibCodec:
+    """JSON encoding and decoding with the standard library; always available."""
+
+    name = "json"
+
+    def dumps(self, value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """Encode a value as compact JSON text."""
+        return json.dumps(value, default=default)
+
+    def canonical_dumps(self, value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """
+        Encode a value with sorted keys and no whitespace, for hashing.
+
+        Every codec uses this standard library encoding, so plan and memo
+        hashes, some of which are stored, do not depend on which codec is
+        installed.
+        """
+        return json.dumps(value, sort_keys=True, separators=(",", ":"), default=default)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decode JSON text; raises ValueError if it is invalid."""
+        return json.loads(data)
+
+    def decode_flow_definition(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        """Decode a flow definition; its elements are validated when the flow is compiled."""
+        flow_definition = self.loads(data)
+        if not isinstance(flow_definition, dict):
+            raise ValueError("Flow definition must be a JSON object")
+        return flow_definition
+
+class OrjsonCodec(StdlibCodec):
+    """
+    JSON through orjson, falling back to the standard library for values it cannot encode.
+
+    Datetimes and dataclasses are passed to ``default`` as the standard
+    library does, so they are encoded the same way. NaN and infinity are
+    encoded as null rather than the standard library's non-standard NaN.
+    """
+
+    name = "orjson"
+
+    def dumps(self, value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        try:
+            return orjson.dumps(value, default=default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                                | orjson.OPT_PASSTHROUGH_DATACLASS).decode("utf-8")
+        except TypeError:
+            # e.g. integers beyond 64 bits; the standard library raises for truly unencodable values
+            return super().dumps(value, default)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson.JSONDecodeError is a ValueError
+        return orjson.loads(data)
+
+class MsgspecCodec(StdlibCodec):
+    """
+    JSON through msgspec.
+
+    Flow definitions are decoded into typed structs, so a malformed flow
+    envelope or connection is rejected while parsing. Element definitions
+    keep their type-specific fields and stay plain dicts.
+
+    msgspec encodes datetimes, sets, dataclasses and other types it supports
+    itself, without calling ``default``, so event payloads holding them
+    differ from the standard library's. NaN and infinity are encoded as null.
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._flow_decoder = msgspec.json.Decoder(_flow_definition_struct())
+
+    def dumps(self, value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        try:
+            encoder = self._encoder if default is None else msgspec.json.Encoder(enc_hook=default)
+            return encoder.encode(value).decode("utf-8")
+        except (TypeError, msgspec.EncodeError):
+            return super().dumps(value, default)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def decode_flow_definition(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        try:
+            return msgspec.to_builtins(self._flow_decoder.decode(data))
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Invalid flow definition: {str(e)}") from e
+
+def _flow_definition_struct() -> type:
+    """Build the msgspec struct mirroring the FlowDefinition request model."""
+    class Connection(msgspec.Struct):
+        from_id: str
+        to_id: str
+        from_output: Optional[str] = None
+        to_input: Optional[str] = None
+
+    class FlowDefinition(msgspec.Struct):
+        flow_id: str
+        elements: Dict[str, Dict[str, Any]]
+        connections: List[Connection]
+        start_element_id: str
+        metadata: Optional[Dict[str, Any]] = None
+
+    return FlowDefinition
+
+# Codecs whose library is installed, fastest first
+CODECS = {}
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+if msgspec is not None:
+    CODECS["msgspec"] = MsgspecCodec
+CODECS["json"] = StdlibCodec
+
+def get_codec(name: str = "auto") -> StdlibCodec:
+    """Create a codec by name, or the fastest installed one for "auto"."""
+    if name == "auto":
+        name = next(iter(CODECS))
+    if name not in CODECS:
+        raise ValueError(f"JSON codec '{name}' is not available, installed: {', '.join(CODECS)}")
+    return CODECS[name]()
+
+# Process-wide codec, chosen with JSON_CODEC ("auto", "orjson", "msgspec" or "json")
+codec = get_codec(os.getenv("JSON_CODEC", "auto").lower())
+
+def dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode a value as compact JSON text."""
+    return codec.dumps(value, default)
+
+def canonical_dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode a value with sorted keys and no whitespace, for hashing."""
+    return codec.canonical_dumps(value, default)
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text; raises ValueError if it is invalid."""
+    return codec.loads(data)
+
+def decode_flow_definition(data: Union[str, bytes]) -> Dict[str, Any]:
+    """Decode a flow definition; raises ValueError if it is invalid."""
+    return codec.decode_flow_definition(data)
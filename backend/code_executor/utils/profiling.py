@@ -0,0 +1,186 @@
+# utils/profiling.py
+import bisect
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+# Span phases aggregated in the process-wide histograms
+SPAN_PHASES = ("queue_wait", "execute", "external", "serialize")
+
+class ElementSpan:
+    """Timing of one element execution within a flow run, in seconds."""
+
+    def __init__(self, element_id: str, element_type: str, queue_wait: float = 0.0):
+        self.element_id = element_id
+        self.element_type = element_type
+        self.queue_wait = queue_wait
+        self.start = time.perf_counter()
+        self.execute = 0.0
+        self.external = 0.0
+        self.external_calls: Dict[str, float] = {}
+        self.serialize = 0.0
+        self.cached = False
+        self.status = "running"
+
+    def add_external(self, service: str, duration: float):
+        """Record time spent waiting on an external service."""
+        self.external += duration
+        self.external_calls[service] = self.external_calls.get(service, 0.0) + duration
+
+    def finish(self, status: str):
+        """Close the span."""
+        self.execute = time.perf_counter() - self.start
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the span as plain data, in milliseconds."""
+        return {
+            "element_id": self.element_id,
+            "element_type": self.element_type,
+            "status": self.status,
+            "cached": self.cached,
+            "queue_wait_ms": round(self.queue_wait * 1000, 3),
+            "execute_ms": round(self.execute * 1000, 3),
+            "external_ms": round(self.external * 1000, 3),
+            "external_calls_ms": {k: round(v * 1000, 3) for k, v in self.external_calls.items()},
+            "serialize_ms": round(self.serialize * 1000, 3)
+        }
+
+# Span of the element running in the current task, if any
+current_span: ContextVar[Optional[ElementSpan]] = ContextVar("current_span", default=None)
+
+@asynccontextmanager
+async def external_call(service: str):
+    """Attribute the time spent in the block to an external service on the current element span."""
+    span = current_span.get()
+    if span is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span.add_external(service, time.perf_counter() - start)
+
+@contextmanager
+def serialization():
+    """Attribute the time spent in the block to serialisation on the current element span."""
+    span = current_span.get()
+    if span is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span.serialize += time.perf_counter() - start
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last bucket holds everything above the largest bound
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        """Record one value, in milliseconds."""
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimate a percentile as the upper bound of the bucket it falls in, capped at the maximum."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(float(self.buckets[index]), self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the histogram summary and bucket counts."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 3),
+            "buckets": {f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)},
+            "buckets_over": self.counts[-1]
+        }
+
+class Profiler:
+    """Process-wide latency histograms per element type and span phase."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.flows = LatencyHistogram()
+        self.speculation = _speculation_totals()
+
+    def record_spans(self, spans: List[ElementSpan]):
+        """Add the spans of a finished run."""
+        with self._lock:
+            for span in spans:
+                phases = self.histograms.get(span.element_type)
+                if phases is None:
+                    phases = self.histograms[span.element_type] = {phase: LatencyHistogram() for phase in SPAN_PHASES}
+                for phase in SPAN_PHASES:
+                    phases[phase].observe(getattr(span, phase) * 1000)
+
+    def record_flow(self, duration: float):
+        """Add the duration of a finished run, in seconds."""
+        with self._lock:
+            self.flows.observe(duration * 1000)
+
+    def record_speculation(self, stats):
+        """Add the speculation counters of a finished run."""
+        with self._lock:
+            self.speculation["started"] += stats.started
+            self.speculation["committed"] += stats.committed
+            self.speculation["wasted"] += stats.wasted
+            self.speculation["saved_ms"] += stats.saved_time * 1000
+            self.speculation["wasted_ms"] += stats.wasted_time * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get every histogram, slowest element types first by total execute time."""
+        with self._lock:
+            element_types = sorted(self.histograms.items(),
+                                   key=lambda item: item[1]["execute"].total, reverse=True)
+            return {
+                "flows": self.flows.to_dict(),
+                "speculation": {k: round(v, 3) for k, v in self.speculation.items()},
+                "element_types": {
+                    element_type: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                    for element_type, phases in element_types
+                }
+            }
+
+    def reset(self):
+        """Drop all recorded values."""
+        with self._lock:
+            self.histograms = {}
+            self.flows = LatencyHistogram()
+            self.speculation = _speculation_totals()
+
+def _speculation_totals() -> Dict[str, float]:
+    """Get zeroed speculation counters."""
+    return {"started": 0, "committed": 0, "wasted": 0, "saved_ms": 0.0, "wasted_ms": 0.0}
+
+# Process-wide profiler shared by all flow runs
+profiler = Profiler()
@@ -0,0 +1,68 @@
+# utils/token_stream.py
+import asyncio
+from typing import Any, AsyncIterator, List, Optional
+
+class TokenStream:
+    """
+    Text produced incrementally by one element and read by downstream elements.
+
+    The producer appends chunks and closes the stream when it is done. Every
+    reader iterates over all chunks from the start, so any number of
+    consumers can read the same stream at their own pace.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self.forwarded = False  # A downstream element sends the text to the client
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: str):
+        """Add a chunk of text."""
+        if self.closed:
+            raise RuntimeError("Cannot append to a closed token stream")
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self):
+        """Mark the stream as complete."""
+        self.closed = True
+        self._notify()
+
+    def fail(self, error: BaseException):
+        """Close the stream because the producer failed; readers raise the error."""
+        self.error = error
+        self.close()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.closed:
+                if self.error is not None:
+                    raise RuntimeError(f"Upstream stream failed: {str(self.error)}") from self.error
+                return
+            await self._changed.wait()
+
+    async def text(self) -> str:
+        """Wait for the stream to complete and get the whole text."""
+        async for _ in self:
+            pass
+        return "".join(self.chunks)
+
+    def _notify(self):
+        """Wake the readers waiting for more chunks."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def __repr__(self) -> str:
+        return f"TokenStream(chunks={len(self.chunks)}, closed={self.closed})"
+
+async def resolve_text(value: Any) -> Any:
+    """Get the whole text of a token stream, or the value itself if it is not a stream."""
+    if isinstance(value, TokenStream):
+        return await value.text()
+    return value
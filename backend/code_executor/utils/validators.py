@@ -2,11 +2,12 @@
 from typing import Dict, Any, List, Union, Optional, Type
 import json
 from .logger import logger
+from .token_stream import TokenStream
 
 def validate_type(value: Any, expected_type: str) -> bool:
     """Validate that a value matches the expected type."""
     if expected_type == "string":
-        return isinstance(value, str)
+        return isinstance(value, (str, TokenStream))  # Streamed text is a string once complete
     elif expected_type == "int":
         return isinstance(value, int) and not isinstance(value, bool)
     elif expected_type == "float":